@@ -0,0 +1,440 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the readers and writers of relais.dev.io.
+
+Synthetic input of a given size is generated in a scratch directory, and then
+every reader and writer is timed over it, each in a separate process so that
+peak memory can be measured. For each benchmark, the throughput (in records
+and megabytes per second), the peak memory (in kilobytes) and the time to the
+first record are reported. Results are written as JSON, and can be compared
+against those of an earlier run to catch regressions::
+
+	python bench/bench_io.py --size 100 --out baseline.json
+	...
+	python bench/bench_io.py --size 100 --out new.json --baseline baseline.json
+
+Benchmarks can be selected by giving (part of) their names as arguments. This
+should be run from the root of the repository.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import resource
+import multiprocessing
+from optparse import OptionParser
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), '..'))
+
+from relais.dev import scratchfile
+from relais.dev.io.readers import linereader, singlereader, prefetch, \
+	delimreader
+from relais.dev.io.readers.cachedreader import CachedReader
+from relais.dev.io.writers import recordwriter, threadedwriter
+
+
+## CONSTANTS & DEFINES ###
+
+# a benchmark is slower than its baseline if it loses more than this fraction
+# of its throughput
+DEFAULT_TOLERANCE = 0.1
+
+# how many records to read or write at a time in batched benchmarks
+BATCH_SIZE = 10000
+
+
+### IMPLEMENTATION ###
+
+### INPUTS
+
+def make_inputs (scratch_dir, size_mb, seed=1):
+	"""
+	Generate the synthetic input files.
+
+	:Parameters:
+		scratch_dir
+			Where to write the files.
+		size_mb : float
+			The approximate size of the text input in megabytes.
+
+	:Returns:
+		A dictionary of input names to paths.
+
+	"""
+	rand = random.Random (seed)
+	target = int (size_mb * 1024 * 1024)
+	txt_path = os.path.join (scratch_dir, 'input.txt')
+	hndl = open (txt_path, 'wb')
+	written = 0
+	i = 0
+	bases = 'ACGT'
+	while (written < target):
+		seq = ''.join ([rand.choice (bases) for j in range (rand.randint (20, 80))])
+		line = 'rec%d\t%d\t%.4f\t%s\n' % (i, rand.randint (0, 10**6),
+			rand.random(), seq)
+		hndl.write (line)
+		written += len (line)
+		i += 1
+	hndl.close()
+	gz_path = txt_path + '.gz'
+	src = open (txt_path, 'rb')
+	dst = gzip.open (gz_path, 'wb')
+	dst.write (src.read())
+	dst.close()
+	src.close()
+	return {
+		'txt': txt_path,
+		'gz': gz_path,
+	}
+
+
+def read_records (path):
+	"""
+	Return the records of the text input, for use by the writers.
+	"""
+	hndl = open (path, 'rb')
+	recs = [l.rstrip ('\n') for l in hndl]
+	hndl.close()
+	return recs
+
+
+### BENCHMARKS
+# Each returns the number of records, and a reader or writer whose statistics
+# give the time to the first record. A benchmark may have a ``setup``
+# function, which is run (untimed) beforehand with the same arguments.
+
+class LineWriter (recordwriter.RecordWriter):
+	def format_record (self, rec):
+		return rec + '\n'
+
+
+def bench_linereader_read (inputs, scratch_dir):
+	rdr = linereader.LineReader (inputs['txt'])
+	rdr.collect_stats()
+	count = 0
+	while (not rdr.at_end()):
+		rdr.read()
+		count += 1
+	return count, rdr
+
+
+def bench_linereader_batch (inputs, scratch_dir):
+	rdr = linereader.LineReader (inputs['txt'])
+	rdr.collect_stats()
+	count = 0
+	for b in rdr.iter_batches (BATCH_SIZE):
+		count += len (b)
+	return count, rdr
+
+
+def bench_linereader_gzip (inputs, scratch_dir):
+	rdr = linereader.LineReader (inputs['gz'])
+	rdr.collect_stats()
+	count = 0
+	for b in rdr.iter_batches (BATCH_SIZE):
+		count += len (b)
+	return count, rdr
+
+
+def bench_linereader_prefetch (inputs, scratch_dir):
+	rdr = linereader.LineReader (prefetch.open_prefetched (inputs['txt']))
+	rdr.collect_stats()
+	count = 0
+	for b in rdr.iter_batches (BATCH_SIZE):
+		count += len (b)
+	rdr.hndl.close()
+	return count, rdr
+
+
+# the arguments for reading the text input as typed rows
+DELIM_ARGS = {'header': False, 'use_numpy': False}
+
+
+def bench_delimreader_rows (inputs, scratch_dir):
+	rdr = delimreader.DelimReader (inputs['txt'], **DELIM_ARGS)
+	rdr.collect_stats()
+	count = 0
+	for b in rdr.iter_batches (BATCH_SIZE):
+		count += len (b)
+	return count, rdr
+
+
+def _cached_reader (inputs, scratch_dir):
+	return CachedReader (inputs['txt'], delimreader.DelimReader,
+		cache_path=os.path.join (scratch_dir, 'input.rcache'),
+		reader_args=DELIM_ARGS)
+
+
+def _fill_cache (inputs, scratch_dir):
+	rdr = _cached_reader (inputs, scratch_dir)
+	for b in rdr.iter_batches (BATCH_SIZE):
+		pass
+	rdr.close()
+
+
+def bench_cachedreader_warm (inputs, scratch_dir):
+	# should be much faster than delimreader_rows, which it caches
+	rdr = _cached_reader (inputs, scratch_dir)
+	assert (rdr.from_cache), "cache wasn't filled"
+	# the reader of the cache itself
+	rdr.rdr.collect_stats()
+	count = 0
+	for b in rdr.iter_batches (BATCH_SIZE):
+		count += len (b)
+	rdr.close()
+	return count, rdr.rdr
+
+bench_cachedreader_warm.setup = _fill_cache
+
+
+def bench_mmaplinereader_read (inputs, scratch_dir):
+	rdr = linereader.MmapLineReader (inputs['txt'], as_buffer=True)
+	rdr.collect_stats()
+	count = 0
+	while (not rdr.at_end()):
+		rdr.read()
+		count += 1
+	return count, rdr
+
+
+def bench_singlereader_read (inputs, scratch_dir):
+	rdr = singlereader.SingleReader (inputs['txt'], mode='rb')
+	rdr.collect_stats()
+	rdr.read()
+	return 1, rdr
+
+
+def bench_singlereader_bytearray (inputs, scratch_dir):
+	rdr = singlereader.SingleReader (inputs['txt'], mode='rb')
+	rdr.collect_stats()
+	rdr.read_bytearray()
+	return 1, rdr
+
+
+def bench_mmapsinglereader_read (inputs, scratch_dir):
+	rdr = singlereader.MmapSingleReader (inputs['txt'])
+	rdr.collect_stats()
+	data = rdr.read()
+	# touch every page, so the file is actually read
+	data.find ('\0')
+	return 1, rdr
+
+
+def bench_recordwriter_write (inputs, scratch_dir):
+	recs = read_records (inputs['txt'])
+	wrtr = LineWriter (os.path.join (scratch_dir, 'out.txt'))
+	wrtr.collect_stats()
+	for r in recs:
+		wrtr.write (r)
+	wrtr.close()
+	return len (recs), wrtr
+
+
+def bench_recordwriter_gzip (inputs, scratch_dir):
+	recs = read_records (inputs['txt'])
+	wrtr = LineWriter (os.path.join (scratch_dir, 'out.txt.gz'))
+	wrtr.collect_stats()
+	wrtr.write_iter (recs)
+	wrtr.close()
+	return len (recs), wrtr
+
+
+def bench_threadedwriter_write (inputs, scratch_dir):
+	recs = read_records (inputs['txt'])
+	inner = LineWriter (os.path.join (scratch_dir, 'out.txt'))
+	inner.collect_stats()
+	wrtr = threadedwriter.ThreadedWriter (inner)
+	wrtr.write_iter (recs)
+	wrtr.close()
+	return len (recs), inner
+
+
+# name, the input it reads or (for writers) the input its records come from,
+# and the function
+BENCHMARKS = [
+	('linereader_read', 'txt', bench_linereader_read),
+	('linereader_batch', 'txt', bench_linereader_batch),
+	('linereader_gzip', 'gz', bench_linereader_gzip),
+	('linereader_prefetch', 'txt', bench_linereader_prefetch),
+	('delimreader_rows', 'txt', bench_delimreader_rows),
+	('cachedreader_warm', 'txt', bench_cachedreader_warm),
+	('mmaplinereader_read', 'txt', bench_mmaplinereader_read),
+	('singlereader_read', 'txt', bench_singlereader_read),
+	('singlereader_bytearray', 'txt', bench_singlereader_bytearray),
+	('mmapsinglereader_read', 'txt', bench_mmapsinglereader_read),
+	('recordwriter_write', 'txt', bench_recordwriter_write),
+	('recordwriter_gzip', 'txt', bench_recordwriter_gzip),
+	('threadedwriter_write', 'txt', bench_threadedwriter_write),
+]
+
+
+### RUNNING
+
+def _run_in_child (func, inputs, scratch_dir, queue):
+	"""
+	Run a benchmark and report its results, in a child process.
+	"""
+	try:
+		setup = getattr (func, 'setup', None)
+		if (setup):
+			setup (inputs, scratch_dir)
+		start = time.time()
+		count, obj = func (inputs, scratch_dir)
+		elapsed = time.time() - start
+		stats = obj.stats() or {}
+		queue.put ({
+			'records': count,
+			'seconds': elapsed,
+			'first_record_seconds': stats.get ('first_record_time'),
+			'peak_kb': resource.getrusage (resource.RUSAGE_SELF).ru_maxrss,
+		})
+	except Exception, err:
+		queue.put ({'error': '%s: %s' % (err.__class__.__name__, err)})
+
+
+def run_benchmark (name, input_name, func, inputs, scratch_dir):
+	"""
+	Run a single benchmark in its own process, and return its results.
+
+	:Returns:
+		A dictionary of the results, holding an 'error' message if the
+		benchmark failed.
+
+	"""
+	queue = multiprocessing.Queue()
+	proc = multiprocessing.Process (target=_run_in_child,
+		args=(func, inputs, scratch_dir, queue))
+	proc.start()
+	result = queue.get()
+	proc.join()
+	result['name'] = name
+	if ('error' not in result):
+		nbytes = os.path.getsize (inputs[input_name])
+		seconds = max (result['seconds'], 1e-9)
+		result['records_per_sec'] = result['records'] / seconds
+		result['mb_per_sec'] = nbytes / (1024.0 * 1024.0) / seconds
+	return result
+
+
+def compare (results, baseline, tolerance=DEFAULT_TOLERANCE):
+	"""
+	Compare results against a baseline, returning any that are slower.
+
+	:Parameters:
+		results, baseline : dict
+			Results, as from `run_benchmarks`.
+		tolerance : float
+			The fraction of throughput that can be lost before a benchmark
+			counts as slower.
+
+	:Returns:
+		A list of (name, baseline MB/s, new MB/s).
+
+	"""
+	slower = []
+	old = dict ([(r['name'], r) for r in baseline['benchmarks']])
+	for r in results['benchmarks']:
+		prev = old.get (r['name'])
+		if ((prev is None) or ('error' in r) or ('error' in prev)):
+			continue
+		if (r['mb_per_sec'] < prev['mb_per_sec'] * (1.0 - tolerance)):
+			slower.append ((r['name'], prev['mb_per_sec'], r['mb_per_sec']))
+	return slower
+
+
+def run_benchmarks (size_mb, names=None):
+	"""
+	Generate inputs and run the selected benchmarks.
+
+	:Parameters:
+		size_mb : float
+			The size of the input in megabytes.
+		names : list
+			Run only benchmarks whose names contain one of these.
+
+	:Returns:
+		A dictionary of the run settings and a list of benchmark results.
+
+	"""
+	scratch_dir = scratchfile.make_scratch_dir()
+	try:
+		inputs = make_inputs (scratch_dir, size_mb)
+		results = []
+		for name, input_name, func in BENCHMARKS:
+			if (names and not [n for n in names if n in name]):
+				continue
+			results.append (run_benchmark (name, input_name, func, inputs,
+				scratch_dir))
+	finally:
+		scratchfile.recursive_remove (scratch_dir)
+	return {
+		'size_mb': size_mb,
+		'python': sys.version.split()[0],
+		'timestamp': time.strftime ('%Y-%m-%dT%H:%M:%S'),
+		'benchmarks': results,
+	}
+
+
+def report (results, hndl=sys.stdout):
+	"""
+	Print a summary table of results.
+	"""
+	hndl.write ('%-26s %12s %10s %10s %12s\n' % ('benchmark', 'records/s',
+		'MB/s', 'peak KB', 'first rec s'))
+	for r in results['benchmarks']:
+		if ('error' in r):
+			hndl.write ('%-26s %s\n' % (r['name'], r['error']))
+		else:
+			first = r['first_record_seconds']
+			if (first is None):
+				first = float ('nan')
+			hndl.write ('%-26s %12.0f %10.2f %10d %12.6f\n' % (r['name'],
+				r['records_per_sec'], r['mb_per_sec'], r['peak_kb'], first))
+
+
+def main ():
+	parser = OptionParser (usage='%prog [options] [benchmark names]')
+	parser.add_option ('-s', '--size', type='float', default=10.0,
+		help='size of the synthetic input in MB (default %default)')
+	parser.add_option ('-o', '--out',
+		help='write the results to this JSON file')
+	parser.add_option ('-b', '--baseline',
+		help='compare the results with this earlier JSON file')
+	parser.add_option ('-t', '--tolerance', type='float',
+		default=DEFAULT_TOLERANCE,
+		help='fraction of throughput that may be lost (default %default)')
+	options, args = parser.parse_args()
+	results = run_benchmarks (options.size, args)
+	report (results)
+	if (options.out):
+		hndl = open (options.out, 'w')
+		json.dump (results, hndl, indent=1, sort_keys=True)
+		hndl.close()
+	if (options.baseline):
+		hndl = open (options.baseline)
+		baseline = json.load (hndl)
+		hndl.close()
+		slower = compare (results, baseline, options.tolerance)
+		for name, old_mbs, new_mbs in slower:
+			print "slower: %s (%.2f MB/s, was %.2f)" % (name, new_mbs, old_mbs)
+		if (slower):
+			sys.exit (1)
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	main()
+
+
+### END ########################################################################
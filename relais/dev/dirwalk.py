@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Walking large directory trees, and finding what has changed in them.
+
+Directories are listed with ``scandir`` where it is available (the
+``scandir`` package, installed with this one for Pythons before 3.5, or
+``os.scandir``), which returns the type of each entry along with its name,
+so that telling files from directories needs no further system calls.
+Otherwise, each entry is looked at with a single ``lstat``, rather than the
+separate calls of ``isfile`` and ``isdir``.
+
+A snapshot of a tree records the size and modification time of every file,
+so that a later walk can return only the files added, changed or removed
+since. For example, a job run periodically over an incoming directory::
+
+	for change, relpath in iter_changes ('incoming', 'incoming.snap',
+			include='*.csv'):
+		if (change != REMOVED):
+			ingest (os.path.join ('incoming', relpath))
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import stat
+import gzip
+import fnmatch
+
+try:
+	from scandir import scandir
+except ImportError:
+	scandir = getattr (os, 'scandir', None)
+HAVE_SCANDIR = scandir is not None
+
+__all__ = [
+	'list_dir',
+	'walk',
+	'snapshot_dir',
+	'save_snapshot',
+	'load_snapshot',
+	'diff_snapshots',
+	'iter_changes',
+	'ADDED',
+	'CHANGED',
+	'REMOVED',
+]
+
+
+### CONSTANTS & DEFINES ###
+
+# the kinds of change between snapshots
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+# separates the fields of a saved snapshot, as it can't occur in a path
+SNAPSHOT_SEP = '\0'
+
+
+### IMPLEMENTATION ###
+
+def _as_patterns (patterns):
+	if (isinstance (patterns, basestring)):
+		return [patterns]
+	return patterns or []
+
+
+def _matches (name, patterns):
+	for p in patterns:
+		if (fnmatch.fnmatch (name, p)):
+			return True
+	return False
+
+
+def list_dir (path, follow_links=True):
+	"""
+	List a single directory, with the type of each entry.
+
+	With ``scandir``, the types come with the listing. Otherwise, each entry
+	is looked at with a single ``stat``.
+
+	:Parameters:
+		path
+			The path of the directory.
+		follow_links : boolean
+			Should a link be typed as what it points to? If not, a link is
+			neither a directory nor a file.
+
+	:Returns:
+		A list of the name of each entry, and whether it is a directory and
+		whether it is a regular file. A broken link is neither.
+
+	"""
+	if (HAVE_SCANDIR):
+		return [(e.name, e.is_dir (follow_symlinks=follow_links),
+			e.is_file (follow_symlinks=follow_links)) for e in scandir (path)]
+	get_stat = follow_links and os.stat or os.lstat
+	prefix = os.path.join (path, '')
+	entries = []
+	for name in os.listdir (path):
+		try:
+			mode = get_stat (prefix + name).st_mode
+		except OSError:
+			entries.append ((name, False, False))
+			continue
+		entries.append ((name, stat.S_ISDIR (mode), stat.S_ISREG (mode)))
+	return entries
+
+
+def _walk_scandir (path, include, exclude, follow_links, want_stat):
+	# walk a tree using the types given by scandir, yielding (path, stat)
+	dirs = [path]
+	while (dirs):
+		subdirs = []
+		for entry in scandir (dirs.pop()):
+			if (exclude and _matches (entry.name, exclude)):
+				continue
+			if (entry.is_dir (follow_symlinks=follow_links)):
+				subdirs.append (entry.path)
+			elif (entry.is_file (follow_symlinks=follow_links)):
+				if (include and (not _matches (entry.name, include))):
+					continue
+				st = None
+				if (want_stat):
+					try:
+						st = entry.stat (follow_symlinks=follow_links)
+					except OSError:
+						# removed since it was listed
+						continue
+				yield entry.path, st
+		# so that subdirectories are walked in the order they were listed
+		subdirs.reverse()
+		dirs.extend (subdirs)
+
+
+def _walk_listdir (path, include, exclude, follow_links, want_stat):
+	# walk a tree with a single stat of each entry, yielding (path, stat)
+	get_stat = follow_links and os.stat or os.lstat
+	is_dir = stat.S_ISDIR
+	is_file = stat.S_ISREG
+	dirs = [path]
+	while (dirs):
+		dirpath = dirs.pop()
+		# joining by hand is much quicker than os.path.join
+		prefix = os.path.join (dirpath, '')
+		subdirs = []
+		for name in os.listdir (dirpath):
+			if (exclude and _matches (name, exclude)):
+				continue
+			fpath = prefix + name
+			try:
+				st = get_stat (fpath)
+			except OSError:
+				# removed since it was listed, or a broken link
+				continue
+			if (is_dir (st.st_mode)):
+				subdirs.append (fpath)
+			elif (is_file (st.st_mode)):
+				if ((not include) or _matches (name, include)):
+					yield fpath, st
+		subdirs.reverse()
+		dirs.extend (subdirs)
+
+
+def _walk (path, include, exclude, follow_links, want_stat):
+	if (HAVE_SCANDIR):
+		return _walk_scandir (path, _as_patterns (include),
+			_as_patterns (exclude), follow_links, want_stat)
+	return _walk_listdir (path, _as_patterns (include),
+		_as_patterns (exclude), follow_links, want_stat)
+
+
+def walk (path, include=None, exclude=None, follow_links=False):
+	"""
+	Iterate over every file below a directory.
+
+	The tree is walked depth-first. With ``scandir``, each directory is
+	listed with the type of every entry, so that no further system calls are
+	needed. Otherwise, each entry is looked at with a single ``stat``.
+
+	:Parameters:
+		path
+			The path of the directory at the top of the tree.
+		include
+			A shell-style pattern (e.g. ``'*.txt'``), or list of them, that the
+			names of files must match. By default, all files are included.
+		exclude
+			A pattern, or list of them, for the names of files and
+			directories to leave out. An excluded directory is not walked.
+		follow_links : boolean
+			Should links to files and directories be followed? If so, a link
+			back up the tree will be walked endlessly.
+
+	:Returns:
+		An iterator over the path of each file.
+
+	"""
+	return (f[0] for f in _walk (path, include, exclude, follow_links, False))
+
+
+def _relpath (path, root):
+	# the path of a file below a directory, relative to it
+	return path[len (root):].lstrip (os.sep)
+
+
+def _walk_stats (path, include, exclude, follow_links):
+	# iterate over the relative path, size and mtime of files in a tree
+	for fpath, st in _walk (path, include, exclude, follow_links, True):
+		yield _relpath (fpath, path), (st.st_size, st.st_mtime)
+
+
+def snapshot_dir (path, include=None, exclude=None, follow_links=False):
+	"""
+	Record the size and modification time of every file below a directory.
+
+	:Parameters:
+		path
+			The path of the directory at the top of the tree.
+		include, exclude, follow_links
+			Which files to record. See `walk`.
+
+	:Returns:
+		A dictionary of the path of each file, relative to the directory, to
+		a tuple of its size and modification time.
+
+	"""
+	return dict (_walk_stats (path, include, exclude, follow_links))
+
+
+def save_snapshot (snapshot, path):
+	"""
+	Save a snapshot of a directory tree to a file.
+
+	The snapshot is stored compactly, as a gzipped series of fields sorted by
+	path. It is written to a temporary file first, so that an interrupted
+	save leaves any earlier snapshot intact.
+
+	:Parameters:
+		snapshot : dict
+			A snapshot, as returned by `snapshot_dir`.
+		path
+			The path of the file to save to.
+
+	"""
+	tmp_path = path + '.tmp'
+	hndl = gzip.open (tmp_path, 'wb')
+	try:
+		for relpath in sorted (snapshot):
+			size, mtime = snapshot[relpath]
+			hndl.write (SNAPSHOT_SEP.join ([relpath, str (size), repr (mtime),
+				'']))
+	finally:
+		hndl.close()
+	os.rename (tmp_path, path)
+
+
+def load_snapshot (path):
+	"""
+	Load a snapshot saved by `save_snapshot`.
+
+	:Parameters:
+		path
+			The path of the snapshot file.
+
+	:Returns:
+		A snapshot, as returned by `snapshot_dir`.
+
+	"""
+	hndl = gzip.open (path, 'rb')
+	try:
+		fields = hndl.read().split (SNAPSHOT_SEP)
+	finally:
+		hndl.close()
+	# the last field is empty, from the trailing separator
+	return dict ((fields[i], (int (fields[i+1]), float (fields[i+2])))
+		for i in xrange (0, len (fields) - 1, 3))
+
+
+def _compare (old, new_stats):
+	# yield the changes from an old snapshot, as the new one is produced
+	old = dict (old)
+	for relpath, details in new_stats:
+		prev = old.pop (relpath, None)
+		if (prev is None):
+			yield ADDED, relpath
+		elif (prev != details):
+			yield CHANGED, relpath
+	for relpath in sorted (old):
+		yield REMOVED, relpath
+
+
+def diff_snapshots (old, new):
+	"""
+	Return the differences between two snapshots of a directory tree.
+
+	A file is changed if its size or modification time has changed.
+
+	:Parameters:
+		old, new : dict
+			Snapshots, as returned by `snapshot_dir`.
+
+	:Returns:
+		A list of the change (`ADDED`, `CHANGED` or `REMOVED`) and relative
+		path of every file that differs, sorted by path within each change.
+
+	"""
+	changes = list (_compare (old, sorted (new.items())))
+	order = {ADDED: 0, CHANGED: 1, REMOVED: 2}
+	changes.sort (key=lambda c: order[c[0]])
+	return changes
+
+
+def iter_changes (path, snapshot_path, include=None, exclude=None,
+		follow_links=False, update=True):
+	"""
+	Walk a directory tree, returning only the files changed since last time.
+
+	The tree is compared against the snapshot saved at the last walk, with
+	added and changed files returned as they are found, and removed files at
+	the end. If there is no saved snapshot, every file is new.
+
+	:Parameters:
+		path
+			The path of the directory at the top of the tree.
+		snapshot_path
+			The path of the file the snapshot is saved in.
+		include, exclude, follow_links
+			Which files to look at. See `walk`.
+		update : boolean
+			Save a new snapshot once the walk is complete. If the walk is
+			not completed, the old snapshot is kept, so that any changes are
+			returned again next time.
+
+	:Returns:
+		An iterator over the change (`ADDED`, `CHANGED` or `REMOVED`) and
+		path, relative to the directory, of every file that differs. The
+		snapshot file itself is left out, if it is in the tree.
+
+	"""
+	## Preparation:
+	if (os.path.exists (snapshot_path)):
+		old = load_snapshot (snapshot_path)
+	else:
+		old = {}
+	new = {}
+	own = os.path.relpath (os.path.abspath (snapshot_path),
+		os.path.abspath (path))
+	skip = set ([own, own + '.tmp'])
+	## Main:
+	def record (stats):
+		for relpath, details in stats:
+			if (relpath in skip):
+				continue
+			new[relpath] = details
+			yield relpath, details
+	stats = _walk_stats (path, include, exclude, follow_links)
+	for change in _compare (old, record (stats)):
+		yield change
+	## Postconditions & return:
+	if (update):
+		save_snapshot (new, snapshot_path)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -9,11 +9,25 @@ __docformat__ = 'restructuredtext en'
 
 ### IMPORTS ###
 
-import cStringIO, os
+import cStringIO, os, mmap, threading, time
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from UserDict import DictMixin
+
+from relais.dev import dirwalk
 
 
 ### CONSTANTS & DEFINES ###
 
+# how many threads hoover_dir reads files on by default
+HOOVER_THREADS = 4
+
+# the most bytes of file contents kept by the shared file cache
+FILE_CACHE_BYTES = 32 * 1024 * 1024
+
+# the most missing files a file cache remembers
+MISSING_MAX = 1024
+
 ### IMPLEMENTATION ###
 
 def string_to_handle (in_str):
@@ -70,6 +84,198 @@ def file_to_string (path, mode='rU'):
 	return buf
 
 
+def _stat_key (st):
+	# what identifies a version of a file, from its stat
+	return (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+
+
+class FileCache (object):
+	"""
+	A cache of file contents, checked against the file on every use.
+
+	Each lookup costs a single ``stat``, and the file is only read again if
+	its device, inode, size or modification time have changed. The most
+	recently used contents are kept, up to a total size. The cache may be
+	shared between threads. For example::
+
+		cache = FileCache (max_bytes=1024 * 1024)
+		template = cache.get ('templates/page.html')
+		print cache.stats()
+
+	"""
+	def __init__ (self, max_bytes=FILE_CACHE_BYTES, negative_ttl=None):
+		"""
+		Class c'tor.
+
+		:Params:
+			max_bytes : int
+				The most bytes of contents to keep. Files larger than this are
+				read but not kept. If None, there is no limit.
+			negative_ttl : float
+				How many seconds to remember that a file is missing. Until
+				then, a lookup of the file fails straight away, without a
+				``stat``, and counts as a hit. Up to `MISSING_MAX` missing
+				files are remembered. If None, missing files aren't
+				remembered.
+
+		"""
+		self.max_bytes = max_bytes
+		self.negative_ttl = negative_ttl
+		self.lock = threading.Lock()
+		# (path, mode) to (stat key, contents), least recently used first
+		self.entries = OrderedDict()
+		# (path, mode) to (expiry time, errno, error), oldest first
+		self.missing = OrderedDict()
+		self.cache_bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get (self, path, mode='rU'):
+		"""
+		Return the contents of a file, from the cache if it is unchanged.
+
+		:Params:
+			path
+				The path to the file.
+			mode
+				The mode to use when opening and reading the file.
+
+		:Returns:
+			A string.
+
+		Raises IOError if the file can't be read, as for `file_to_string`.
+
+		"""
+		## Preconditions:
+		assert ('w' not in mode)
+		## Main:
+		key = (os.path.abspath (path), mode)
+		if (self.missing):
+			err = self._check_missing (key)
+			if (err is not None):
+				raise IOError (err[0], err[1], path)
+		try:
+			st = os.stat (path)
+		except OSError, err:
+			self._note_missing (key, err)
+			raise IOError (err.errno, err.strerror, path)
+		self.lock.acquire()
+		try:
+			entry = self.entries.pop (key, None)
+			if (entry is not None):
+				if (entry[0] == _stat_key (st)):
+					self.entries[key] = entry
+					self.hits += 1
+					return entry[1]
+				self.cache_bytes -= len (entry[1])
+			self.misses += 1
+		finally:
+			self.lock.release()
+		# take the stat from the open file, so a change while reading is seen
+		fhndl = open (path, mode)
+		try:
+			st = os.fstat (fhndl.fileno())
+			contents = fhndl.read()
+		finally:
+			fhndl.close()
+		self._store (key, _stat_key (st), contents)
+		return contents
+
+	def clear (self):
+		"""
+		Forget all cached contents and statistics.
+		"""
+		self.lock.acquire()
+		try:
+			self.entries.clear()
+			self.missing.clear()
+			self.cache_bytes = self.hits = self.misses = self.evictions = 0
+		finally:
+			self.lock.release()
+
+	def stats (self):
+		"""
+		Return the statistics of the cache.
+
+		:Returns:
+			A dictionary of the number of hits, misses and evictions, and of
+			the entries and bytes held.
+
+		"""
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+			'entries': len (self.entries),
+			'bytes': self.cache_bytes,
+		}
+
+	def _check_missing (self, key):
+		# return the error for a file known to be missing, or None
+		self.lock.acquire()
+		try:
+			entry = self.missing.get (key)
+			if (entry is None):
+				return None
+			if (time.time() < entry[0]):
+				self.hits += 1
+				return entry[1:]
+			del self.missing[key]
+			return None
+		finally:
+			self.lock.release()
+
+	def _note_missing (self, key, err):
+		self.lock.acquire()
+		try:
+			entry = self.entries.pop (key, None)
+			if (entry is not None):
+				self.cache_bytes -= len (entry[1])
+			self.misses += 1
+			if (self.negative_ttl is not None):
+				self.missing[key] = (time.time() + self.negative_ttl,
+					err.errno, err.strerror)
+				while (MISSING_MAX < len (self.missing)):
+					self.missing.popitem (last=False)
+		finally:
+			self.lock.release()
+
+	def _store (self, key, stat_key, contents):
+		size = len (contents)
+		if ((self.max_bytes is not None) and (self.max_bytes < size)):
+			return
+		self.lock.acquire()
+		try:
+			old = self.entries.pop (key, None)
+			if (old is not None):
+				self.cache_bytes -= len (old[1])
+			self.entries[key] = (stat_key, contents)
+			self.cache_bytes += size
+			if (self.max_bytes is not None):
+				while (self.max_bytes < self.cache_bytes):
+					self.cache_bytes -= len (self.entries.popitem (last=False)[1][1])
+					self.evictions += 1
+		finally:
+			self.lock.release()
+
+
+# the cache shared by cached_file_to_string
+file_cache = FileCache()
+
+
+def cached_file_to_string (path, mode='rU'):
+	"""
+	Reads the contents of a file, using a cache shared across the process.
+
+	This is `file_to_string` for files that are read over and over, e.g.
+	configuration and templates. See `FileCache`; the shared cache is
+	``file_cache``.
+
+	"""
+	return file_cache.get (path, mode)
+
+
 def string_to_file (buf, path, mode='w'):
 	"""
 	Write the buffer to the given file.
@@ -92,38 +298,172 @@ def string_to_file (buf, path, mode='w'):
 	fhndl.write (buf)
 	fhndl.close()
 	
-def hoover_dir (path, filenames=None, mode='rU'):
+def _select_files (path, filenames):
+	# return the names of the files in a directory to be read
+	## Preconditions:
+	assert (os.path.exists (path))
+	assert (os.path.isdir (path))
+	## Main:
+	if ((filenames is None) or callable (filenames)):
+		selected = [e[0] for e in dirwalk.list_dir (path) if e[2]]
+		if (filenames is not None):
+			selected = [f for f in selected if filenames (f)]
+		return selected
+	selected = []
+	for f in filenames:
+		fpath = os.path.join (path, f)
+		assert (os.path.exists (fpath))
+		if (os.path.isfile (fpath)):
+			selected.append (f)
+	return selected
+
+
+def _read_file (path, mode, mmap_size):
+	# read a file, mapping it if it is big enough and there's no translation
+	# (an empty file can't be mapped)
+	if ((mmap_size is not None) and ('U' not in mode)):
+		size = os.path.getsize (path)
+	else:
+		size = 0
+	if (size and (mmap_size <= size)):
+		fhndl = open (path, 'rb')
+		try:
+			return mmap.mmap (fhndl.fileno(), 0, access=mmap.ACCESS_READ)
+		finally:
+			fhndl.close()
+	return file_to_string (path, mode)
+
+
+def hoover_dir (path, filenames=None, mode='rU', max_file_size=None,
+		max_total_size=None, threads=HOOVER_THREADS, mmap_size=None):
 	"""
 	Extract all the files in a given directory and return then in a dict.
 
+	Files are read concurrently on a pool of threads. To read files only as
+	they are needed, see `LazyDir`.
+
 	:Params:
 		path
 			Path to the target directory.
 		filenames
-			A list of files in the directory to extract. If none are provided,
-			all files will be extracted.
+			A list of files in the directory to extract, or a function that is
+			passed each file name and returns whether to extract it. If none
+			are provided, all files will be extracted.
 		mode
 			The mode to read files with.
+		max_file_size : int
+			Leave out any file bigger than this many bytes.
+		max_total_size : int
+			Stop extracting files, in the order they are listed, once their
+			total size would be more than this many bytes.
+		threads : int
+			How many threads to read files on.
+		mmap_size : int
+			Return files at least this big as read-only memory maps, rather
+			than reading them. As maps can't translate newlines, this is only
+			done if the mode isn't universal ('U').
 
 	:Returns:
 		A dictionary of (file-name, file-contents)
 
 	"""
-	# TODO: allow filenames to be a selector func?
-	## Preconditions:
-	assert (os.path.exists (path))
-	assert (os.path.isdir (path))
-	## Main:
-	if (filenames is None):
-		filenames = os.listdir (path)
-	results = {}
-	for f in filenames:
+	## Preparation:
+	selected = []
+	total = 0
+	for f in _select_files (path, filenames):
 		fpath = os.path.join (path, f)
-		assert (os.path.exists (fpath))
-		if (os.path.isfile (fpath)):
-			results[f] = file_to_string (fpath, mode)
+		if ((max_file_size is not None) or (max_total_size is not None)):
+			size = os.path.getsize (fpath)
+			if ((max_file_size is not None) and (max_file_size < size)):
+				continue
+			if ((max_total_size is not None) and
+					(max_total_size < total + size)):
+				break
+			total += size
+		selected.append ((f, fpath))
+	## Main:
+	read = lambda x: _read_file (x[1], mode, mmap_size)
+	if ((1 < threads) and (1 < len (selected))):
+		pool = ThreadPool (min (threads, len (selected)))
+		try:
+			contents = pool.map (read, selected)
+		finally:
+			pool.close()
+	else:
+		contents = map (read, selected)
 	## Return:
-	return results
+	return dict (zip ([x[0] for x in selected], contents))
+
+
+class LazyDir (DictMixin):
+	"""
+	A read-only mapping of the files in a directory to their contents.
+
+	Files are only read when they are accessed, and the most recently used
+	contents are kept up to a total size, so that looking at a few files of a
+	large directory costs only those files. For example::
+
+		outputs = LazyDir ('run/out', lambda f: f.endswith ('.log'),
+			max_bytes=64 * 1024 * 1024)
+		if ('errors.log' in outputs):
+			print outputs['errors.log']
+
+	"""
+	def __init__ (self, path, filenames=None, mode='rU', max_bytes=None):
+		"""
+		Class c'tor.
+
+		:Params:
+			path
+				Path to the target directory.
+			filenames
+				As for `hoover_dir`, a list of files in the directory or a
+				function that selects them. By default, all files.
+			mode
+				The mode to read files with.
+			max_bytes : int
+				The most bytes of file contents to keep at once. If None, all
+				contents read are kept.
+
+		"""
+		self.path = path
+		self.mode = mode
+		self.max_bytes = max_bytes
+		self.filenames = _select_files (path, filenames)
+		self.names = set (self.filenames)
+		# contents read, least recently used first
+		self.cache = OrderedDict()
+		self.cache_bytes = 0
+
+	def __getitem__ (self, name):
+		if (name not in self.names):
+			raise KeyError (name)
+		cache = self.cache
+		if (name in cache):
+			# move to the most recently used end
+			contents = cache.pop (name)
+		else:
+			contents = file_to_string (os.path.join (self.path, name),
+				self.mode)
+			self.cache_bytes += len (contents)
+		cache[name] = contents
+		if (self.max_bytes is not None):
+			# keep at least the contents just asked for
+			while ((self.max_bytes < self.cache_bytes) and (1 < len (cache))):
+				self.cache_bytes -= len (cache.popitem (last=False)[1])
+		return contents
+
+	def __contains__ (self, name):
+		return name in self.names
+
+	def __iter__ (self):
+		return iter (self.filenames)
+
+	def __len__ (self):
+		return len (self.filenames)
+
+	def keys (self):
+		return list (self.filenames)
 
 
 ### TEST & DEBUG ###
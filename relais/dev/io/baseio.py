@@ -13,6 +13,8 @@ __docformat__ = 'restructuredtext en'
 import os
 
 from relais.dev import fileutils, options
+from relais.dev.io import compression as comp
+from relais.dev.io import iostats
 
 
 __all__ = [
@@ -29,7 +31,8 @@ class BaseIO (object):
 	"""
 	dialect = options.Options()
 	
-	def __init__ (self, hndl, mode='rb', fmt=None, dialect=None):
+	def __init__ (self, hndl, mode='rb', fmt=None, dialect=None,
+			compression=comp.AUTO):
 		"""
 		Class c'tor.
 
@@ -48,6 +51,14 @@ class BaseIO (object):
 				an error if the handle has no name.
 			dialect : dict or Options
 				A set of properties for IO behaviour.
+			compression
+				How any file path is compressed: 'gz', 'bgzf', 'bz2', 'xz', None
+				for uncompressed, or 'auto' (the default) to detect compression
+				from the file's leading bytes (for reading) or extension (for
+				writing). Compressed files are read or written as a stream, and
+				the format is taken from the inner extension, so that
+				``reads.fastq.gz`` has the format ``fastq``. If an open
+				file-like is supplied, this isn't used.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
@@ -56,7 +67,7 @@ class BaseIO (object):
 		## Preconditions & preparations:
 		# if file is a filename
 		if (isinstance (hndl, basestring)):
-			hndl = open (hndl, mode)
+			hndl = comp.open_compressed (hndl, mode, compression)
 			hndl_opened = True
 		else:
 			hndl_opened = False
@@ -69,16 +80,55 @@ class BaseIO (object):
 			self.dialect = options.Options()
 		if (dialect):
 			self.dialect.update (dialect)
+		# collect statistics if asked
+		self.iostats = None
+		if (iostats.is_enabled()):
+			self.collect_stats()
 		
 	def __del__ (self):
 		"""
 		Note this may generate an error if the object is disposed of unnaturally.
 		"""
 		try:
+			if (self.iostats):
+				self.iostats.finish()
 			if (self.hndl_opened):
 				self.hndl.close()
 		except:
 			pass
+
+	## STATISTICS:
+	def collect_stats (self):
+		"""
+		Start collecting statistics on the use of this object.
+
+		The reading, writing and flushing methods are timed and counted, and
+		the statistics added to the registry in `iostats`. Collection starts
+		automatically if enabled there.
+
+		"""
+		if (self.iostats is not None):
+			return
+		label = '%s (%s)' % (self.__class__.__name__,
+			getattr (self.hndl, 'name', self.fmt))
+		self.iostats = iostats.IoStats (label, self.hndl)
+		for name, kind in iostats.TIMED_METHODS:
+			if (hasattr (self.__class__, name)):
+				setattr (self, name, self.iostats.wrap (self, name, kind))
+		iostats.register (self.iostats)
+
+	def stats (self):
+		"""
+		Return the statistics collected on this object.
+
+		:Returns:
+			A dictionary (see `iostats.IoStats.as_dict`) or None if statistics
+			aren't being collected.
+
+		"""
+		if (self.iostats is None):
+			return None
+		return self.iostats.as_dict()
 	
 	## INTERNALS:		
 	def get_format (self, fmt, lower=True):
@@ -101,6 +151,7 @@ class BaseIO (object):
 			fname = getattr (self.hndl, 'name', None)
 			if (fname is None):
 				return None
+			fname = comp.split_compression_ext (fname)[0]
 			return fileutils.ext_from_filepath (fname, lower)
 
 	def get_dialect (prop, default=None):
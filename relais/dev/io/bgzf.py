@@ -0,0 +1,539 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Block-compressed gzip (BGZF) files, that can be compressed in parallel and
+read at random.
+
+A BGZF file is a standard multi-member gzip file, readable by any gzip
+tool, in which every member holds at most 64KB of data and records its own
+compressed size in a header field. As the blocks are independent, they can
+be compressed on several threads at once, and a position in the file can be
+given as a *virtual offset*: the offset of a block in the compressed file,
+shifted left 16 bits, plus an offset in the block's uncompressed data. A
+``.gzi`` index, as made by ``bgzip -i``, maps the start of every block to its
+offset in the uncompressed data, so that any uncompressed offset can also be
+reached with one seek. For example::
+
+	hndl = BgzfFile ('export.txt.bgz', 'wb', threads=4)
+	hndl.write (text)
+	hndl.close()
+
+	hndl = BgzfFile ('export.txt.bgz')
+	hndl.seek (1000000)
+	line = hndl.readline()
+
+BGZF is also available as the compression type 'bgzf' in `open_compressed`,
+and so for any reader or writer.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import zlib
+import struct
+from bisect import bisect_right
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+__all__ = [
+	'BgzfFile',
+	'compress_block',
+	'make_virtual_offset',
+	'split_virtual_offset',
+	'scan_blocks',
+	'load_gzi',
+	'save_gzi',
+	'GZI_EXT',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the most uncompressed data put in a block, as used by bgzip
+BLOCK_SIZE = 0xff00
+
+# the largest a compressed block can be
+MAX_BLOCK = 0x10000
+
+# magic, flags, mtime, extra flags, OS, extra length
+GZIP_HEADER = struct.Struct ('<4sIBBH')
+# the "BC" extra subfield, giving the size of the block less one
+BC_FIELD = struct.Struct ('<2sHH')
+# CRC32 and uncompressed size
+GZIP_TRAILER = struct.Struct ('<II')
+
+BGZF_MAGIC = '\x1f\x8b\x08\x04'
+
+# the empty block that marks the end of a file
+EOF_BLOCK = BGZF_MAGIC + '\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00' \
+	'\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+
+# the extension added to a file path to make the index path
+GZI_EXT = '.gzi'
+
+GZI_COUNT = struct.Struct ('<Q')
+GZI_ENTRY = struct.Struct ('<QQ')
+
+# how many blocks per thread to compress at once
+BLOCKS_PER_THREAD = 4
+
+
+### IMPLEMENTATION ###
+
+def make_virtual_offset (block_start, within):
+	"""
+	Combine a block offset and an offset within its data to a virtual offset.
+
+	For example::
+
+		>>> make_virtual_offset (100000, 20)
+		6553600020
+
+	"""
+	assert (0 <= within < MAX_BLOCK), "bad offset within block %s" % within
+	return (block_start << 16) | within
+
+
+def split_virtual_offset (voffset):
+	"""
+	Split a virtual offset to a block offset and an offset within its data.
+
+	For example::
+
+		>>> split_virtual_offset (6553600020)
+		(100000, 20)
+
+	"""
+	return voffset >> 16, voffset & 0xffff
+
+
+def compress_block (data, level=6):
+	"""
+	Compress some data, of up to `BLOCK_SIZE` bytes, as a single block.
+
+	:Returns:
+		The whole block, as a string.
+
+	"""
+	comp = zlib.compressobj (level, zlib.DEFLATED, -15)
+	cdata = comp.compress (data) + comp.flush()
+	size = GZIP_HEADER.size + BC_FIELD.size + len (cdata) + GZIP_TRAILER.size
+	if (MAX_BLOCK < size):
+		# incompressible data can come out a little larger, so just store it
+		return compress_block (data, 0)
+	return ''.join ([
+		GZIP_HEADER.pack (BGZF_MAGIC, 0, 0, 0xff, BC_FIELD.size),
+		BC_FIELD.pack ('BC', 2, size - 1),
+		cdata,
+		GZIP_TRAILER.pack (zlib.crc32 (data) & 0xffffffff, len (data)),
+	])
+
+
+def _read_header (hndl):
+	# return the size of the block starting here, or None at the end
+	head = hndl.read (GZIP_HEADER.size)
+	if (not head):
+		return None
+	if ((len (head) < GZIP_HEADER.size) or (not head.startswith (BGZF_MAGIC))):
+		raise IOError ("not a BGZF block at offset %s" % (hndl.tell() -
+			len (head)))
+	xlen = GZIP_HEADER.unpack (head)[-1]
+	extra = hndl.read (xlen)
+	posn = 0
+	while (posn + 4 <= len (extra)):
+		sub_id, sub_len = struct.unpack ('<2sH', extra[posn:posn + 4])
+		if ((sub_id == 'BC') and (sub_len == 2)):
+			return struct.unpack ('<H', extra[posn + 4:posn + 6])[0] + 1
+		posn += 4 + sub_len
+	raise IOError ("BGZF block has no size field")
+
+
+def scan_blocks (hndl):
+	"""
+	List the blocks of a BGZF file, by reading their headers.
+
+	:Parameters:
+		hndl
+			The compressed file, open for reading in binary mode.
+
+	:Returns:
+		A list of the compressed and uncompressed offset of every block, as
+		pairs, including the empty block at the end.
+
+	"""
+	blocks = []
+	cstart = ustart = 0
+	hndl.seek (0)
+	while (True):
+		size = _read_header (hndl)
+		if (size is None):
+			break
+		hndl.seek (cstart + size - 4)
+		usize = struct.unpack ('<I', hndl.read (4))[0]
+		blocks.append ((cstart, ustart))
+		cstart += size
+		ustart += usize
+	return blocks
+
+
+def load_gzi (path):
+	"""
+	Read the block offsets from a ``.gzi`` index file.
+
+	:Returns:
+		A list of the compressed and uncompressed offset of every block, as
+		pairs, starting with the first block at (0, 0).
+
+	"""
+	hndl = open (path, 'rb')
+	try:
+		count = GZI_COUNT.unpack (hndl.read (GZI_COUNT.size))[0]
+		data = hndl.read (count * GZI_ENTRY.size)
+	finally:
+		hndl.close()
+	blocks = [(0, 0)]
+	for i in xrange (count):
+		blocks.append (GZI_ENTRY.unpack_from (data, i * GZI_ENTRY.size))
+	return blocks
+
+
+def save_gzi (path, blocks):
+	"""
+	Write block offsets to a ``.gzi`` index file.
+
+	:Parameters:
+		path
+			The path of the index file.
+		blocks
+			The compressed and uncompressed offset of every block, as pairs.
+			As is usual, the first block (at 0, 0) isn't written.
+
+	"""
+	blocks = [b for b in blocks if (b != (0, 0))]
+	hndl = open (path, 'wb')
+	try:
+		hndl.write (GZI_COUNT.pack (len (blocks)))
+		hndl.write (''.join ([GZI_ENTRY.pack (*b) for b in blocks]))
+	finally:
+		hndl.close()
+
+
+class BgzfFile (object):
+	"""
+	A BGZF file, open for reading or writing.
+
+	When writing, data is cut into blocks which are compressed a batch at a
+	time on a pool of threads (zlib doesn't hold the interpreter lock while
+	compressing) and written in order. When reading, the file can be
+	seeked to any uncompressed offset, using the block index, or to any
+	virtual offset.
+
+	"""
+	def __init__ (self, path, mode='rb', level=6, threads=None, index=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			path
+				The path of the file.
+			mode
+				'r' or 'w', with or without 'b'.
+			level : int
+				The compression level, from 0 to 9.
+			threads : int
+				How many threads to compress on. By default, one per CPU.
+			index
+				Where to keep the ``.gzi`` index. By default, this is the path
+				with `GZI_EXT` added. An index is written when the file is
+				closed after writing, and when reading is loaded (or built, if
+				missing or out of date) on the first seek.
+
+		"""
+		self.name = path
+		self.mode = mode[:1]
+		assert (self.mode in 'rw'), "bad mode '%s'" % mode
+		self.level = level
+		self.index_path = index or (path + GZI_EXT)
+		self.hndl = open (path, self.mode + 'b')
+		self.closed = False
+		if (self.mode == 'w'):
+			self.threads = threads or cpu_count()
+			self.pool = None
+			if (1 < self.threads):
+				self.pool = ThreadPool (self.threads)
+			self.buf = []
+			self.buf_size = 0
+			# the compressed and uncompressed offsets of every block written
+			self.blocks = []
+			self.cposn = 0
+			self.uposn = 0
+		else:
+			self.blocks = None
+			self._load_block (0, 0)
+
+	def __del__ (self):
+		"""
+		Class d'tor.
+
+		This exists purely to close the file before destroying it.
+		"""
+		try:
+			self.close()
+		except:
+			pass
+
+	## WRITING:
+	def write (self, data):
+		"""
+		Write some data, compressing it once there is enough.
+
+		"""
+		self.buf.append (data)
+		self.buf_size += len (data)
+		if ((BLOCK_SIZE * self.threads * BLOCKS_PER_THREAD) <= self.buf_size):
+			self._write_blocks (False)
+
+	def flush (self):
+		"""
+		Compress and write all data so far, ending the current block.
+
+		"""
+		if (self.mode == 'w'):
+			self._write_blocks (True)
+		self.hndl.flush()
+
+	def close (self):
+		"""
+		Close the file, writing any remaining data, the end marker and index.
+
+		Closing more than once is harmless.
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		if (self.mode == 'w'):
+			self._write_blocks (True)
+			self.hndl.write (EOF_BLOCK)
+			self.blocks.append ((self.cposn, self.uposn))
+			if (self.pool is not None):
+				self.pool.close()
+			save_gzi (self.index_path, self.blocks)
+		self.hndl.close()
+
+	def _write_blocks (self, flush):
+		# compress and write the buffer, keeping any partial block unless
+		# flushing
+		data = ''.join (self.buf)
+		chunks = [data[i:i + BLOCK_SIZE] for i in
+			xrange (0, len (data), BLOCK_SIZE)]
+		if (chunks and (not flush) and (len (chunks[-1]) < BLOCK_SIZE)):
+			self.buf = [chunks.pop()]
+		else:
+			self.buf = []
+		self.buf_size = sum ([len (b) for b in self.buf])
+		level = self.level
+		compress = lambda x: compress_block (x, level)
+		if (self.pool is not None):
+			blocks = self.pool.map (compress, chunks)
+		else:
+			blocks = map (compress, chunks)
+		for chunk, block in zip (chunks, blocks):
+			self.blocks.append ((self.cposn, self.uposn))
+			self.cposn += len (block)
+			self.uposn += len (chunk)
+		self.hndl.write (''.join (blocks))
+
+	## READING:
+	def read (self, size=-1):
+		"""
+		Read up to a given number of bytes, or to the end if not given.
+
+		"""
+		parts = []
+		while ((size < 0) or (0 < size)):
+			data = self.data
+			posn = self.posn
+			avail = len (data) - posn
+			if (not avail):
+				if (not self._next_block()):
+					break
+				continue
+			if ((size < 0) or (avail <= size)):
+				parts.append (data[posn:])
+				self.posn = len (data)
+				size -= avail
+			else:
+				parts.append (data[posn:posn + size])
+				self.posn = posn + size
+				size = 0
+		return ''.join (parts)
+
+	def readline (self, size=-1):
+		"""
+		Read a line, including its newline, or up to a given number of bytes.
+
+		"""
+		parts = []
+		got = 0
+		while (True):
+			data = self.data
+			posn = self.posn
+			end = data.find ('\n', posn)
+			if (end == -1):
+				stop = len (data)
+			else:
+				stop = end + 1
+			if ((0 <= size) and ((size - got) < (stop - posn))):
+				stop = posn + size - got
+			parts.append (data[posn:stop])
+			got += stop - posn
+			self.posn = stop
+			if (((end != -1) and (stop == end + 1)) or (got == size)):
+				break
+			if (not self._next_block()):
+				break
+		return ''.join (parts)
+
+	def readlines (self, sizehint=0):
+		"""
+		Read lines until the end, or until about ``sizehint`` bytes.
+
+		"""
+		lines = []
+		total = 0
+		while (True):
+			line = self.readline()
+			if (not line):
+				break
+			lines.append (line)
+			total += len (line)
+			if (sizehint and (sizehint <= total)):
+				break
+		return lines
+
+	def __iter__ (self):
+		return iter (self.readline, '')
+
+	def tell (self):
+		"""
+		Return the uncompressed offset of the current position.
+
+		"""
+		if (self.mode == 'w'):
+			return self.uposn + self.buf_size
+		if (self.ustart is None):
+			blocks = self.get_index()
+			i = bisect_right (blocks, (self.cstart, -1))
+			self.ustart = blocks[i][1]
+		return self.ustart + self.posn
+
+	def seek (self, offset, whence=0):
+		"""
+		Move to an uncompressed offset, using the index.
+
+		"""
+		assert (self.mode == 'r'), "can only seek when reading"
+		if (whence == 1):
+			offset += self.tell()
+		elif (whence == 2):
+			offset += self.get_index()[-1][1]
+		blocks = self.get_index()
+		i = bisect_right (self.ustarts, offset) - 1
+		cstart, ustart = blocks[max (i, 0)]
+		self._load_block (cstart, ustart)
+		self.posn = min (offset - ustart, len (self.data))
+
+	def tell_virtual (self):
+		"""
+		Return the virtual offset of the current position.
+
+		"""
+		assert (self.mode == 'r'), "virtual offsets are only for reading"
+		if ((self.posn == len (self.data)) and self.data):
+			# at the end of a block is the start of the next
+			return make_virtual_offset (self.cnext, 0)
+		return make_virtual_offset (self.cstart, self.posn)
+
+	def seek_virtual (self, voffset):
+		"""
+		Move to a virtual offset, with a single seek.
+
+		"""
+		cstart, within = split_virtual_offset (voffset)
+		self._load_block (cstart)
+		self.posn = within
+
+	def get_index (self):
+		"""
+		Return the block offsets, loading or building the index if need be.
+
+		:Returns:
+			A list of the compressed and uncompressed offset of every block.
+
+		"""
+		if (self.blocks is None):
+			path = self.index_path
+			if (os.path.exists (path) and
+					(os.path.getmtime (self.name) <= os.path.getmtime (path))):
+				self.blocks = load_gzi (path)
+			else:
+				cposn = self.hndl.tell()
+				self.blocks = scan_blocks (self.hndl)
+				self.hndl.seek (cposn)
+				try:
+					save_gzi (path, self.blocks)
+				except (IOError, OSError):
+					pass
+			self.ustarts = [b[1] for b in self.blocks]
+		return self.blocks
+
+	def _load_block (self, cstart, ustart=None):
+		# read and decompress the block at an offset
+		hndl = self.hndl
+		hndl.seek (cstart)
+		size = _read_header (hndl)
+		self.cstart = cstart
+		self.ustart = ustart
+		self.posn = 0
+		if (size is None):
+			self.data = ''
+			self.cnext = cstart
+			return
+		head_size = hndl.tell() - cstart
+		rest = hndl.read (size - head_size)
+		self.data = zlib.decompress (rest[:-GZIP_TRAILER.size], -15)
+		self.cnext = cstart + size
+
+	def _next_block (self):
+		# move on to the next block with any data, returning False at the end
+		while (True):
+			ustart = self.ustart
+			if (ustart is not None):
+				ustart += len (self.data)
+			cnext = self.cnext
+			if (cnext == self.cstart):
+				return False
+			self._load_block (cnext, ustart)
+			if (self.data):
+				return True
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Detection and transparent handling of compressed files.
+
+Compressed files are recognised by their leading "magic" bytes or, failing
+that, by their extension. They are then opened through a streaming
+decompressor, so the contents never need be unpacked to disk.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import gzip
+import bz2
+import zlib
+
+try:
+	import lzma
+except ImportError:
+	try:
+		from backports import lzma
+	except ImportError:
+		lzma = None
+
+from relais.dev import fileutils
+import bgzf
+
+__all__ = [
+	'AUTO',
+	'COMPRESSION_EXTS',
+	'sniff_compression',
+	'compression_from_filepath',
+	'split_compression_ext',
+	'open_compressed',
+	'DecompressingHandle',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# request that compression be detected
+AUTO = 'auto'
+
+# map file extensions to compression type
+COMPRESSION_EXTS = {
+	'gz': 'gz',
+	'gzip': 'gz',
+	'bgz': 'bgzf',
+	'bz2': 'bz2',
+	'xz': 'xz',
+	'lzma': 'xz',
+}
+
+# leading bytes of compressed files
+MAGIC = [
+	('\x1f\x8b', 'gz'),
+	('BZh', 'bz2'),
+	('\xfd7zXZ\x00', 'xz'),
+]
+
+MAGIC_LEN = max ([len (m[0]) for m in MAGIC])
+
+# how much compressed data to read at a time when streaming
+STREAM_CHUNK = 64 * 1024
+
+# BGZF files are gzip files with a "BC" subfield in the header
+BGZF_SUBFIELD = 'BC'
+BGZF_SUBFIELD_POSN = 12
+
+
+### IMPLEMENTATION ###
+
+def sniff_compression (path):
+	"""
+	Detect the compression of a file from its leading bytes.
+
+	:Parameters:
+		path
+			The path to an existing file.
+
+	:Returns:
+		The compression type ('gz', 'bgzf', 'bz2' or 'xz') or None.
+
+	"""
+	hndl = open (path, 'rb')
+	try:
+		head = hndl.read (max (MAGIC_LEN, BGZF_SUBFIELD_POSN + 2))
+	finally:
+		hndl.close()
+	if (head.startswith (bgzf.BGZF_MAGIC) and
+			(head[BGZF_SUBFIELD_POSN:].startswith (BGZF_SUBFIELD))):
+		return 'bgzf'
+	for magic, comp in MAGIC:
+		if (head.startswith (magic)):
+			return comp
+	return None
+
+
+def compression_from_filepath (path):
+	"""
+	Detect the compression of a file from its extension.
+
+	:Returns:
+		The compression type ('gz', 'bgzf', 'bz2' or 'xz') or None.
+
+	"""
+	return COMPRESSION_EXTS.get (fileutils.ext_from_filepath (path))
+
+
+def split_compression_ext (path):
+	"""
+	Remove any compression extension from a file name or path.
+
+	For example::
+
+		>>> split_compression_ext ('reads.fastq.gz')
+		('reads.fastq', 'gz')
+		>>> split_compression_ext ('reads.fastq')
+		('reads.fastq', None)
+
+	:Returns:
+		The path without the compression extension, and the compression type.
+
+	"""
+	comp = compression_from_filepath (path)
+	if (comp):
+		path = os.path.splitext (path)[0]
+	return path, comp
+
+
+def open_compressed (path, mode='rb', compression=AUTO):
+	"""
+	Open a file path, decompressing or compressing as required.
+
+	:Parameters:
+		path
+			The path to open.
+		mode
+			The mode to open it in. Compressed files are always opened in binary
+			mode.
+		compression
+			The compression to use: one of 'gz', 'bgzf', 'bz2' or 'xz', None
+			for none or `AUTO` to detect it. Files being read are detected by
+			their leading bytes, files being written by their extension.
+
+	:Returns:
+		A file or file-like object.
+
+	"""
+	## Preconditions & preparations:
+	if (compression == AUTO):
+		if (('r' in mode) and ('+' not in mode) and os.path.isfile (path)):
+			compression = sniff_compression (path)
+		else:
+			compression = compression_from_filepath (path)
+	## Main:
+	if (not compression):
+		return open (path, mode)
+	bin_mode = mode.replace ('U', '').replace ('t', '').replace ('b', '')
+	bin_mode = bin_mode[:1] + 'b'
+	if (compression == 'gz'):
+		return gzip.open (path, bin_mode)
+	elif (compression == 'bgzf'):
+		return bgzf.BgzfFile (path, bin_mode)
+	elif (compression == 'bz2'):
+		return bz2.BZ2File (path, bin_mode[:1])
+	elif (compression == 'xz'):
+		if (lzma is None):
+			raise ImportError ("xz compression requires the lzma module")
+		return lzma.LZMAFile (path, bin_mode)
+	else:
+		raise ValueError ("unknown compression '%s'" % compression)
+
+
+class DecompressingHandle (object):
+	"""
+	A readable file-like object that decompresses another as it is read.
+
+	Unlike the ``gzip`` module, this never seeks or tells on the underlying
+	handle, so it can decompress pipes, sockets and archive members. Files
+	of several concatenated streams (e.g. multi-member gzip) are read
+	through to the end.
+
+	"""
+	def __init__ (self, hndl, compression, name=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			hndl
+				The compressed input, a readable file-like object.
+			compression
+				The compression of the input: one of 'gz', 'bz2' or 'xz'.
+			name
+				The name of the input, by default that of the handle. This
+				keeps any compression extension, as for an opened file.
+
+		"""
+		if ((compression == 'xz') and (lzma is None)):
+			raise ImportError ("xz compression requires the lzma module")
+		if (compression not in ('gz', 'bgzf', 'bz2', 'xz')):
+			raise ValueError ("can't stream compression '%s'" % compression)
+		self.hndl = hndl
+		self.compression = compression
+		self.name = name or getattr (hndl, 'name', None)
+		self.decomp = self._new_decompressor()
+		self.data = ''
+		self.posn = 0
+		self.eof = False
+
+	def __iter__ (self):
+		return iter (self.readline, '')
+
+	## ACCESSORS:
+	def read (self, size=-1):
+		parts = []
+		while ((size < 0) or (0 < size)):
+			avail = len (self.data) - self.posn
+			if (not avail):
+				if (not self._fill()):
+					break
+				continue
+			if ((size < 0) or (avail <= size)):
+				parts.append (self.data[self.posn:])
+				self.posn = len (self.data)
+				size -= avail
+			else:
+				parts.append (self.data[self.posn:self.posn + size])
+				self.posn += size
+				size = 0
+		return ''.join (parts)
+
+	def readline (self, size=-1):
+		parts = []
+		got = 0
+		while (True):
+			data = self.data
+			posn = self.posn
+			end = data.find ('\n', posn)
+			if (end == -1):
+				stop = len (data)
+			else:
+				stop = end + 1
+			if ((0 <= size) and ((size - got) < (stop - posn))):
+				stop = posn + size - got
+			parts.append (data[posn:stop])
+			got += stop - posn
+			self.posn = stop
+			if (((end != -1) and (stop == end + 1)) or (got == size)):
+				break
+			if (not self._fill()):
+				break
+		return ''.join (parts)
+
+	def readlines (self, sizehint=0):
+		lines = []
+		total = 0
+		for line in self:
+			lines.append (line)
+			total += len (line)
+			if (sizehint and (sizehint <= total)):
+				break
+		return lines
+
+	## MUTATORS:
+	def close (self):
+		self.hndl.close()
+
+	## INTERNALS:
+	def _new_decompressor (self):
+		if (self.compression in ('gz', 'bgzf')):
+			# accept the gzip header and trailer
+			return zlib.decompressobj (16 + zlib.MAX_WBITS)
+		elif (self.compression == 'bz2'):
+			return bz2.BZ2Decompressor()
+		else:
+			return lzma.LZMADecompressor()
+
+	def _fill (self):
+		# decompress more data, returning False at the end of the input
+		while (not self.eof):
+			chunk = self.hndl.read (STREAM_CHUNK)
+			if (not chunk):
+				self.eof = True
+				break
+			data = self._decompress (chunk)
+			if (data):
+				self.data = data
+				self.posn = 0
+				return True
+		return False
+
+	def _decompress (self, chunk):
+		# decompress a chunk, starting a new stream wherever one ends
+		parts = []
+		while (chunk):
+			try:
+				parts.append (self.decomp.decompress (chunk))
+			except EOFError:
+				# the last stream ended exactly at the end of a chunk
+				self.decomp = self._new_decompressor()
+				continue
+			chunk = getattr (self.decomp, 'unused_data', '')
+			if (chunk):
+				self.decomp = self._new_decompressor()
+		return ''.join (parts)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
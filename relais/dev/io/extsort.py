@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sorting streams of records too large to hold in memory.
+
+Records are read in runs of a bounded number and size, each run is sorted in
+memory and spilt to a scratch file, and the runs are then merged. Only one run (or one
+per worker process) and one record from each run are in memory at a time.
+For example, to sort a file of records by their second field::
+
+	rdr = MyRecordReader ('big.txt')
+	wrtr = MyRecordWriter ('sorted.txt')
+	sort_records (rdr, wrtr, key=operator.itemgetter (1))
+	wrtr.close()
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import cPickle
+import multiprocessing
+
+from relais.dev import scratchfile
+from relais.dev.io.readers.picklereader import PickleReader
+from relais.dev.io.readers.mergereader import MergeReader
+from relais.dev.io.writers.picklewriter import PickleWriter
+
+__all__ = [
+	'iter_sorted',
+	'sort_records',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the default number of records in each run
+RUN_SIZE = 100000
+
+# the default size of each run, as pickled, in bytes
+RUN_BYTES = 64 * 1024 * 1024
+
+
+### IMPLEMENTATION ###
+
+def _sort_run (recs, key, reverse, path):
+	"""
+	Sort a run of records and write it to a scratch file.
+
+	This is a top-level function, so it can be sent to other processes.
+	"""
+	recs.sort (key=key, reverse=reverse)
+	wrtr = PickleWriter (path, compression=None)
+	wrtr.write_iter (recs)
+	wrtr.close()
+	return path
+
+
+def iter_sorted (recs, key=None, reverse=False, run_size=RUN_SIZE,
+		run_bytes=RUN_BYTES, processes=None, scratch_dir=None):
+	"""
+	Yield records in sorted order, using scratch files if need be.
+
+	:Parameters:
+		recs
+			An iterable of records, such as a `RecordReader`.
+		key
+			A function giving the key to sort each record by, as for
+			``sorted``. If None, records are compared directly.
+		reverse : boolean
+			Sort in descending order.
+		run_size : int
+			The most records to sort in memory at once. If None, there is no
+			limit.
+		run_bytes : int
+			The most bytes of records, as pickled, to sort in memory at once.
+			Records take more memory than their pickles (often a few times
+			more), so this bounds the memory of a run only roughly. If None,
+			there is no limit, and records aren't pickled to measure them.
+			If all the records fit within both limits, no scratch files are
+			used.
+		processes : int
+			If given, sort runs in a pool of this many processes, while the
+			next run is read. Up to this many runs may be in memory at once,
+			and ``key`` must be picklable.
+		scratch_dir
+			A directory to write runs to. By default, a new scratch directory
+			is made and removed afterwards.
+
+	The sort is stable. Records are spilt to scratch files as pickles, so they
+	must be picklable.
+
+	"""
+	## Preparation:
+	itr = iter (recs)
+	run, done = _take (itr, run_size, run_bytes)
+	# if it all fits in memory, don't bother with runs
+	if (done):
+		run.sort (key=key, reverse=reverse)
+		for r in run:
+			yield r
+		return
+	remove_dir = scratch_dir is None
+	if (remove_dir):
+		scratch_dir = scratchfile.make_scratch_dir()
+	pool = None
+	if (processes):
+		# an unpicklable key would otherwise leave the pool hanging
+		cPickle.dumps (key, 2)
+		pool = multiprocessing.Pool (processes)
+	## Main:
+	try:
+		paths = []
+		pending = []
+		while (run):
+			path = os.path.join (scratch_dir, 'run%06d.pickle' % len (paths))
+			paths.append (path)
+			if (pool):
+				pending.append (pool.apply_async (_sort_run,
+					(run, key, reverse, path)))
+				# bound the number of runs in flight
+				if (processes <= len (pending)):
+					pending.pop (0).get()
+			else:
+				_sort_run (run, key, reverse, path)
+			run, done = _take (itr, run_size, run_bytes)
+		for p in pending:
+			p.get()
+		# ties go to the earlier run, so the merge keeps the sort stable
+		merged = MergeReader (paths, key=key, reverse=reverse,
+			reader_cls=PickleReader, reader_args={'compression': None})
+		try:
+			for r in merged:
+				yield r
+		finally:
+			merged.close()
+	finally:
+		if (pool):
+			pool.terminate()
+		if (remove_dir):
+			scratchfile.recursive_remove (scratch_dir)
+
+
+def sort_records (rdr, wrtr, **kwargs):
+	"""
+	Sort all the records from a reader and write them to a writer.
+
+	:Parameters:
+		rdr
+			A `RecordReader` or other iterable of records.
+		wrtr
+			A `RecordWriter` or other object with a ``write_iter`` method.
+		kwargs
+			Arguments for sorting, as for `iter_sorted`.
+
+	"""
+	wrtr.write_iter (iter_sorted (rdr, **kwargs))
+
+
+def _take (itr, count, nbytes):
+	"""
+	Return a run of items from an iterator, and whether it is exhausted.
+
+	The run ends once it holds count items, or nbytes bytes of pickled items.
+	Either limit may be None.
+	"""
+	items = []
+	append = items.append
+	if (count is None):
+		count = -1
+	if (nbytes is None):
+		for item in itr:
+			append (item)
+			if (count == len (items)):
+				return items, False
+	else:
+		dumps = cPickle.dumps
+		size = 0
+		for item in itr:
+			append (item)
+			size += len (dumps (item, 2))
+			if ((count == len (items)) or (nbytes <= size)):
+				return items, False
+	return items, True
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sequence records and ``.fai`` indices, shared by FASTA readers and writers.
+
+A ``.fai`` index, as made by ``samtools faidx``, has a line for every
+sequence in a FASTA file giving its name, its length, the offset of its
+first base, and the number of bases and bytes on each of its lines. Since
+every line of a sequence (but the last) has the same length, this is enough
+to find the offset of any base, and so to fetch any stretch of sequence with
+a single seek.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+
+from relais.dev.errors import FormatError
+
+__all__ = [
+	'FastaRecord',
+	'parse_title',
+	'FaiEntry',
+	'FaiIndex',
+	'FAI_EXT',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the extension added to a FASTA path to make the index path
+FAI_EXT = '.fai'
+
+
+### IMPLEMENTATION ###
+
+class FastaRecord (object):
+	"""
+	A single sequence, with its name and any description.
+
+	"""
+	__slots__ = ['name', 'desc', 'seq']
+
+	def __init__ (self, name, seq, desc=''):
+		self.name = name
+		self.seq = seq
+		self.desc = desc
+
+	def __eq__ (self, other):
+		return ((self.name, self.desc, self.seq) ==
+			(other.name, other.desc, other.seq))
+
+	def __ne__ (self, other):
+		return not (self == other)
+
+	def __repr__ (self):
+		return 'FastaRecord (%r, %r, %r)' % (self.name, self.seq, self.desc)
+
+	def title (self):
+		"""
+		Return the title line contents, i.e. the name and any description.
+		"""
+		if (self.desc):
+			return '%s %s' % (self.name, self.desc)
+		return self.name
+
+
+def parse_title (line):
+	"""
+	Split a FASTA title line into a name and description.
+
+	For example::
+
+		>>> parse_title ('>seq1 a test sequence\\n')
+		('seq1', 'a test sequence')
+		>>> parse_title ('>seq2\\n')
+		('seq2', '')
+
+	"""
+	fields = line[1:].strip().split (None, 1)
+	if (not fields):
+		return '', ''
+	if (len (fields) == 1):
+		return fields[0], ''
+	return fields[0], fields[1]
+
+
+class FaiEntry (object):
+	"""
+	The index of a single sequence in a FASTA file.
+
+	"""
+	__slots__ = ['name', 'length', 'offset', 'line_bases', 'line_width']
+
+	def __init__ (self, name, length, offset, line_bases, line_width):
+		self.name = name
+		self.length = length
+		self.offset = offset
+		self.line_bases = line_bases
+		self.line_width = line_width
+
+	def __repr__ (self):
+		return 'FaiEntry (%r, %s, %s, %s, %s)' % (self.name, self.length,
+			self.offset, self.line_bases, self.line_width)
+
+	def posn (self, i):
+		"""
+		Return the file offset of a base in the sequence, counting from 0.
+		"""
+		if (not self.line_bases):
+			return self.offset
+		return self.offset + ((i // self.line_bases) * self.line_width) + \
+			(i % self.line_bases)
+
+
+class FaiIndex (object):
+	"""
+	An index of the sequences in a FASTA file, compatible with ``.fai`` files.
+
+	For example::
+
+		idx = FaiIndex.load ('ref.fa.fai')
+		hndl = open ('ref.fa', 'rb')
+		seq = idx.fetch (hndl, 'chr7', 117199644, 117199744)
+
+	"""
+	def __init__ (self, entries=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			entries
+				A sequence of `FaiEntry`, in file order.
+
+		"""
+		self.entries = []
+		self.by_name = {}
+		for e in (entries or []):
+			self.add (e)
+
+	@classmethod
+	def load (cls, path):
+		"""
+		Read an index from a ``.fai`` file.
+		"""
+		idx = cls()
+		hndl = open (path, 'rb')
+		try:
+			for line in hndl:
+				fields = line.rstrip ('\r\n').split ('\t')
+				if (len (fields) < 5):
+					raise FormatError ("bad index line '%s'" % line.strip())
+				idx.add (FaiEntry (fields[0], *[int (x) for x in fields[1:5]]))
+		finally:
+			hndl.close()
+		return idx
+
+	@classmethod
+	def build (cls, path):
+		"""
+		Index a FASTA file, in a single pass.
+
+		:Parameters:
+			path
+				The path of an uncompressed FASTA file.
+
+		Every line of a sequence, except its last, must have the same length,
+		or the sequence couldn't be fetched by offset.
+
+		"""
+		idx = cls()
+		hndl = open (path, 'rb')
+		try:
+			entry = None
+			# has a sequence had its last (short or blank) line?
+			ended = False
+			posn = 0
+			for line in hndl:
+				size = len (line)
+				if (line.startswith ('>')):
+					if (entry):
+						idx.add (entry)
+					name = parse_title (line)[0]
+					entry = FaiEntry (name, 0, posn + size, 0, 0)
+					ended = False
+				elif (entry is None):
+					if (line.strip()):
+						raise FormatError (
+							"sequence before first title in '%s'" % path)
+				else:
+					bases = len (line.rstrip ('\r\n'))
+					if (not bases):
+						ended = True
+					elif (ended):
+						raise FormatError ("uneven line lengths in '%s'" %
+							entry.name)
+					elif (not entry.line_bases):
+						entry.line_bases = bases
+						entry.line_width = size
+					elif ((bases != entry.line_bases) or
+							(size != entry.line_width)):
+						if (entry.line_bases < bases):
+							raise FormatError ("uneven line lengths in '%s'" %
+								entry.name)
+						ended = True
+					entry.length += bases
+				posn += size
+			if (entry):
+				idx.add (entry)
+		finally:
+			hndl.close()
+		return idx
+
+	@classmethod
+	def for_fasta (cls, path, index_path=None):
+		"""
+		Return the index of a FASTA file, building and saving it if need be.
+
+		:Parameters:
+			path
+				The path of an uncompressed FASTA file.
+			index_path
+				Where the index is kept. By default, this is the FASTA path with
+				`FAI_EXT` added.
+
+		An index that is older than the FASTA file is rebuilt.
+
+		"""
+		index_path = index_path or (path + FAI_EXT)
+		if (os.path.exists (index_path) and
+				(os.path.getmtime (path) <= os.path.getmtime (index_path))):
+			return cls.load (index_path)
+		idx = cls.build (path)
+		idx.save (index_path)
+		return idx
+
+	def save (self, path):
+		"""
+		Write the index as a ``.fai`` file.
+		"""
+		hndl = open (path, 'wb')
+		try:
+			hndl.write (''.join (['%s\t%s\t%s\t%s\t%s\n' % (e.name, e.length,
+				e.offset, e.line_bases, e.line_width) for e in self.entries]))
+		finally:
+			hndl.close()
+
+	def add (self, entry):
+		"""
+		Append the index of a sequence.
+		"""
+		self.entries.append (entry)
+		self.by_name[entry.name] = entry
+
+	def fetch (self, hndl, name, start=0, end=None):
+		"""
+		Read all or part of a sequence, with a single seek.
+
+		:Parameters:
+			hndl
+				The FASTA file, open for reading in binary mode.
+			name : string
+				The name of the sequence.
+			start, end : int
+				The range of bases to fetch, counting from 0 and excluding
+				``end``, as for slicing. By default, the whole sequence.
+
+		"""
+		e = self.by_name[name]
+		start, end, step = slice (start, end).indices (e.length)
+		if (end <= start):
+			return ''
+		first = e.posn (start)
+		hndl.seek (first)
+		data = hndl.read (e.posn (end - 1) + 1 - first)
+		if (e.line_width != e.line_bases + 1):
+			data = data.replace ('\r', '')
+		return data.replace ('\n', '')
+
+	def names (self):
+		"""
+		Return the names of the sequences, in file order.
+		"""
+		return [e.name for e in self.entries]
+
+	def __getitem__ (self, name):
+		return self.by_name[name]
+
+	def __contains__ (self, name):
+		return name in self.by_name
+
+	def __len__ (self):
+		return len (self.entries)
+
+	def __iter__ (self):
+		return iter (self.entries)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Collection of statistics on the work of readers and writers.
+
+When enabled, every reader and writer created records how many calls are made
+to it, how many records and bytes pass through it, the time spent in reading,
+writing and flushing, and the time until the first record. Statistics are
+kept in a process-wide registry, which can be dumped at any time or on exit.
+The registry doesn't keep readers and writers (or their handles) alive, and
+keeps the final statistics of only the last `FINISHED_MAX` that have been
+done with::
+
+	from relais.dev.io import iostats
+	iostats.enable()
+	iostats.dump_on_exit ('iostats.txt')
+
+Statistics can also be collected for a single reader or writer, by calling
+its ``collect_stats`` method. When not enabled, there is no cost beyond a
+single check on creation. Collection can also be switched on by setting the
+environment variable ``RELAIS_IOSTATS``.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import sys
+import time
+import atexit
+import weakref
+from itertools import count
+from collections import deque
+
+__all__ = [
+	'IoStats',
+	'enable',
+	'is_enabled',
+	'register',
+	'get_registry',
+	'clear_registry',
+	'dump_stats',
+	'dump_on_exit',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# which methods are timed, and where that time is counted
+TIMED_METHODS = [
+	('read', 'read'),
+	('read_batch', 'read'),
+	('read_into', 'read'),
+	('read_bytearray', 'read'),
+	('read_range', 'read'),
+	('write', 'write'),
+	('write_iter', 'write'),
+	('flush', 'flush'),
+	('close', 'flush'),
+]
+
+# methods that return or accept a single record, or a list of them
+SINGLE_RECORD_METHODS = ['read', 'read_bytearray', 'write']
+MULTI_RECORD_METHODS = ['read_batch']
+
+# the order statistics are reported in
+FIELDS = [
+	'label',
+	'calls',
+	'records',
+	'bytes',
+	'read_time',
+	'write_time',
+	'flush_time',
+	'first_record_time',
+]
+
+# how many finished readers and writers to keep the statistics of
+FINISHED_MAX = 1000
+
+_enabled = bool (os.environ.get ('RELAIS_IOSTATS'))
+# the statistics of live readers and writers, by order of registration
+_registry = weakref.WeakValueDictionary()
+_next_id = count()
+_finished = deque (maxlen=FINISHED_MAX)
+
+
+### IMPLEMENTATION ###
+
+class IoStats (object):
+	"""
+	Counters and timings for a single reader or writer.
+
+	"""
+	def __init__ (self, label, hndl=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			label : string
+				A description of the reader or writer.
+			hndl
+				The handle being read or written, whose position is used to
+				count bytes.
+
+		"""
+		self.label = label
+		self.hndl = hndl
+		self.created = time.time()
+		self.calls = 0
+		self.records = 0
+		self.times = {'read': 0.0, 'write': 0.0, 'flush': 0.0}
+		self.first_record_time = None
+		# the depth of timed calls, so nested calls aren't counted twice
+		self.depth = 0
+		self.start_posn = self._tell()
+		self.posn = self.start_posn
+		self.reg_id = None
+		self.finished = False
+
+	def wrap (self, obj, name, kind):
+		"""
+		Return a version of a method that updates these statistics.
+
+		The wrapper holds only a weak reference to the object, so it can be
+		stored on the object without making a reference cycle.
+
+		:Parameters:
+			obj
+				The reader or writer.
+			name : string
+				The name of the method.
+			kind : string
+				Whether this is a 'read', 'write' or 'flush'.
+
+		"""
+		func = getattr (obj.__class__, name).im_func
+		ref = weakref.ref (obj)
+		if (name in SINGLE_RECORD_METHODS):
+			count = lambda result: 1
+		elif (name in MULTI_RECORD_METHODS):
+			count = len
+		else:
+			count = None
+		timer = time.time
+		times = self.times
+		def wrapper (*args, **kwargs):
+			if (self.depth):
+				# a nested call is counted only for records
+				result = func (ref(), *args, **kwargs)
+				if (count):
+					self._count_records (count (result))
+				return result
+			self.depth += 1
+			before = self.records
+			start = timer()
+			try:
+				if (name == 'close'):
+					self.update_posn()
+				result = func (ref(), *args, **kwargs)
+			finally:
+				self.depth -= 1
+				times[kind] += timer() - start
+				self.calls += 1
+			if (count):
+				# don't count records already counted by nested calls
+				self._count_records (count (result) - (self.records - before))
+			return result
+		wrapper.__name__ = name
+		wrapper.__doc__ = func.__doc__
+		return wrapper
+
+	def update_posn (self):
+		"""
+		Note the position of the handle, before it is closed.
+		"""
+		posn = self._tell()
+		if (posn is not None):
+			self.posn = posn
+
+	def finish (self):
+		"""
+		Keep the final statistics in the registry, and let go of the handle.
+
+		This is called when the reader or writer is destroyed.
+		"""
+		if (self.finished):
+			return
+		self.finished = True
+		self.update_posn()
+		self.hndl = None
+		if (self.reg_id is not None):
+			_registry.pop (self.reg_id, None)
+			self.reg_id = None
+			_finished.append (self.as_dict())
+
+	def as_dict (self):
+		"""
+		Return the statistics as a dictionary.
+
+		Bytes are counted by the movement of the handle position, and so are
+		None for a handle that has no position (e.g. a pipe).
+
+		"""
+		self.update_posn()
+		if ((self.posn is None) or (self.start_posn is None)):
+			nbytes = None
+		else:
+			nbytes = self.posn - self.start_posn
+		return {
+			'label': self.label,
+			'calls': self.calls,
+			'records': self.records,
+			'bytes': nbytes,
+			'read_time': self.times['read'],
+			'write_time': self.times['write'],
+			'flush_time': self.times['flush'],
+			'first_record_time': self.first_record_time,
+		}
+
+	def _count_records (self, count):
+		self.records += count
+		if ((self.first_record_time is None) and self.records):
+			self.first_record_time = time.time() - self.created
+
+	def _tell (self):
+		try:
+			return self.hndl.tell()
+		except:
+			return None
+
+
+def enable (flag=True):
+	"""
+	Switch on (or off) statistics for every reader and writer created after.
+	"""
+	global _enabled
+	_enabled = flag
+
+
+def is_enabled ():
+	"""
+	Are statistics collected for new readers and writers?
+	"""
+	return _enabled
+
+
+def register (stats):
+	"""
+	Add statistics to the process-wide registry.
+
+	Only a weak reference is kept, until `IoStats.finish` is called.
+	"""
+	stats.reg_id = next (_next_id)
+	_registry[stats.reg_id] = stats
+
+
+def get_registry ():
+	"""
+	Return the statistics of every reader and writer collected so far.
+
+	:Returns:
+		A list of dictionaries, as from `IoStats.as_dict`, for those finished
+		and then those still in use.
+
+	"""
+	live = [_registry.get (k) for k in sorted (_registry.keys())]
+	return list (_finished) + [s.as_dict() for s in live if s is not None]
+
+
+def clear_registry ():
+	"""
+	Forget all collected statistics.
+	"""
+	_registry.clear()
+	_finished.clear()
+
+
+def dump_stats (dst=None):
+	"""
+	Write all collected statistics, as tab-delimited text.
+
+	:Parameters:
+		dst
+			A file path or writable file-like object. By default, stderr.
+
+	"""
+	if (dst is None):
+		dst = sys.stderr
+	if (isinstance (dst, basestring)):
+		hndl = open (dst, 'w')
+	else:
+		hndl = dst
+	try:
+		hndl.write ('\t'.join (FIELDS) + '\n')
+		for s in get_registry():
+			hndl.write ('\t'.join ([str (s[f]) for f in FIELDS]) + '\n')
+	finally:
+		if (hndl is not dst):
+			hndl.close()
+
+
+def dump_on_exit (dst=None):
+	"""
+	Arrange for all collected statistics to be written when the process ends.
+
+	:Parameters:
+		dst
+			See `dump_stats`.
+
+	"""
+	atexit.register (dump_stats, dst)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Reading the members of zip and tar archives, without extracting them.
+
+Members are opened as streaming file-like objects, named after the member,
+which can be passed to any reader just like an open file. The reader then
+takes the format from the member name, and any compressed member (e.g.
+``reads.fastq.gz`` in a tarball) is decompressed as it is read. For
+example::
+
+	for name, hndl in iter_members ('bundle.tar.gz', '*.fasta'):
+		for rec in FastaReader (hndl):
+			...
+
+Members can also be processed in parallel, each worker process opening the
+archive for itself, as with `splitreader.map_ranges`.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import fnmatch
+import tarfile
+import zipfile
+import multiprocessing
+
+from relais.dev.io import compression as comp
+import linereader
+
+__all__ = [
+	'list_members',
+	'open_member',
+	'iter_members',
+	'map_members',
+	'MemberHandle',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class MemberHandle (object):
+	"""
+	A readable file-like object over a single archive member.
+
+	Closing the handle also closes the archive, if it was opened for it.
+
+	"""
+	def __init__ (self, hndl, name, archive=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			hndl
+				The (possibly decompressing) handle of the member.
+			name
+				The name of the member in the archive.
+			archive
+				An archive to close along with the member.
+
+		"""
+		self.hndl = hndl
+		self.name = name
+		self.archive = archive
+		self.closed = False
+
+	def __iter__ (self):
+		return iter (self.hndl.readline, '')
+
+	## ACCESSORS:
+	def read (self, size=-1):
+		return self.hndl.read (size)
+
+	def readline (self, size=-1):
+		return self.hndl.readline (size)
+
+	def readlines (self, sizehint=0):
+		# tar members can't take a sizehint, so read lines until it's reached
+		if (not sizehint):
+			return self.hndl.readlines()
+		readline = self.hndl.readline
+		lines = []
+		total = 0
+		while (total < sizehint):
+			line = readline()
+			if (not line):
+				break
+			lines.append (line)
+			total += len (line)
+		return lines
+
+	## MUTATORS:
+	def close (self):
+		if (self.closed):
+			return
+		self.closed = True
+		self.hndl.close()
+		if (self.archive is not None):
+			self.archive.close()
+
+
+def _wrap (hndl, name, compression, archive=None):
+	# decompress a member if need be, and give it the member name
+	if (compression == comp.AUTO):
+		compression = comp.compression_from_filepath (name)
+	if (compression):
+		hndl = comp.DecompressingHandle (hndl, compression, name=name)
+	return MemberHandle (hndl, name, archive)
+
+
+def list_members (path, pattern=None):
+	"""
+	Return the names of the files in an archive.
+
+	:Parameters:
+		path
+			The path of a zip or tar archive, which may be compressed.
+		pattern
+			A shell-style pattern (e.g. ``'*.txt'``) that names must match.
+
+	:Returns:
+		The names of the file members, in archive order. Directories and
+		other special members are left out.
+
+	"""
+	if (zipfile.is_zipfile (path)):
+		arch = zipfile.ZipFile (path)
+		try:
+			names = [i.filename for i in arch.infolist()
+				if (not i.filename.endswith ('/'))]
+		finally:
+			arch.close()
+	else:
+		arch = tarfile.open (path)
+		try:
+			names = [m.name for m in arch.getmembers() if m.isfile()]
+		finally:
+			arch.close()
+	if (pattern):
+		names = fnmatch.filter (names, pattern)
+	return names
+
+
+def open_member (path, name, compression=comp.AUTO):
+	"""
+	Open a single member of an archive for reading.
+
+	:Parameters:
+		path
+			The path of a zip or tar archive, which may be compressed.
+		name
+			The name of the member.
+		compression
+			How the member is compressed. By default, this is taken from the
+			member name.
+
+	:Returns:
+		A `MemberHandle`, which closes the archive when it is closed.
+
+	"""
+	if (zipfile.is_zipfile (path)):
+		arch = zipfile.ZipFile (path)
+		hndl = arch.open (name)
+	else:
+		arch = tarfile.open (path)
+		hndl = arch.extractfile (name)
+	return _wrap (hndl, name, compression, arch)
+
+
+def iter_members (path, pattern=None, compression=comp.AUTO):
+	"""
+	Iterate over the file members of an archive, in a single pass.
+
+	Tar archives are read as a stream, so each member must be read before
+	moving on to the next. This makes the pass over a compressed tarball as
+	cheap as decompressing it once.
+
+	:Parameters:
+		path
+			The path of a zip or tar archive, which may be compressed.
+		pattern
+			A shell-style pattern (e.g. ``'*.txt'``) that names must match.
+		compression
+			How members are compressed. By default, this is taken from each
+			member name.
+
+	:Returns:
+		An iterator over the name and a `MemberHandle` for every member.
+
+	"""
+	if (zipfile.is_zipfile (path)):
+		arch = zipfile.ZipFile (path)
+		members = [(i.filename, i) for i in arch.infolist()
+			if (not i.filename.endswith ('/'))]
+		opener = arch.open
+	else:
+		arch = tarfile.open (path, 'r|*')
+		members = ((m.name, m) for m in arch if m.isfile())
+		opener = arch.extractfile
+	try:
+		for name, m in members:
+			if (pattern and (not fnmatch.fnmatch (name, pattern))):
+				continue
+			hndl = _wrap (opener (m), name, compression)
+			try:
+				yield name, hndl
+			finally:
+				hndl.close()
+	finally:
+		arch.close()
+
+
+def _map_member (args):
+	"""
+	Read a single member in a worker process.
+	"""
+	path, name, func, reader_cls, reader_args = args
+	hndl = open_member (path, name)
+	try:
+		return func (reader_cls (hndl, **reader_args))
+	finally:
+		hndl.close()
+
+
+def map_members (path, func, reader_cls=linereader.LineReader,
+		reader_args=None, processes=None, ordered=True, pattern=None):
+	"""
+	Apply a function to a reader over each member of an archive, in parallel.
+
+	:Parameters:
+		path
+			The path of a zip or tar archive. Each worker opens the archive
+			itself, so this is best for uncompressed archives, or zip files
+			(whose members are compressed separately).
+		func
+			A callable that accepts a reader and returns a result. As it is
+			sent to other processes, it must be picklable (e.g. defined at the
+			top level of a module).
+		reader_cls
+			The reader class to use over each member. It is passed a handle
+			for the member, and must be picklable.
+		reader_args : dict
+			Any further keyword arguments for the reader.
+		processes : int
+			How many worker processes to use, by default one per CPU.
+		ordered : boolean
+			Should results be returned in the order of the members in the
+			archive, or as they are completed?
+		pattern
+			A shell-style pattern (e.g. ``'*.txt'``) that names must match.
+
+	:Returns:
+		An iterator over the results of ``func`` for each member.
+
+	"""
+	## Preparation:
+	if (processes is None):
+		processes = multiprocessing.cpu_count()
+	tasks = [(path, name, func, reader_cls, reader_args or {})
+		for name in list_members (path, pattern)]
+	## Main:
+	pool = multiprocessing.Pool (processes)
+	try:
+		if (ordered):
+			results = pool.imap (_map_member, tasks)
+		else:
+			results = pool.imap_unordered (_map_member, tasks)
+		for r in results:
+			yield r
+	finally:
+		pool.terminate()
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
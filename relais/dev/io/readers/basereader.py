@@ -26,7 +26,7 @@ class BaseReader (BaseIO):
 	A base class for all readers.
 
 	"""
-	def __init__ (self, src, mode='r', fmt=None):
+	def __init__ (self, src, mode='r', fmt=None, compression='auto'):
 		"""
 		Class c'tor.
 
@@ -38,12 +38,15 @@ class BaseReader (BaseIO):
 				What mode to open any output file path as.
 			fmt
 				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
 		
 		"""
-		BaseIO.__init__ (self, src, mode=mode, fmt=fmt)
+		BaseIO.__init__ (self, src, mode=mode, fmt=fmt,
+			compression=compression)
 		
 
 
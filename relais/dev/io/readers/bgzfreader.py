@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A line-oriented reader for BGZF files, with random access.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import recordreader
+from relais.dev.io.bgzf import BgzfFile
+
+__all__ = [
+	'BgzfReader',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class BgzfReader (recordreader.RecordReader):
+	"""
+	A reader for the lines of a BGZF file, that can seek straight to a line.
+
+	The virtual offset of every line can be noted as it is read (by calling
+	`tell` beforehand), and the reader later moved back to it with `seek`,
+	which needs only a single seek and the decompression of a single block.
+	Thus an index of records in a compressed file can be kept, e.g.::
+
+		rdr = BgzfReader ('calls.txt.bgz')
+		offsets = {}
+		while (not rdr.at_end()):
+			posn = rdr.tell()
+			offsets[rdr.read().split()[0]] = posn
+		...
+		rdr.seek (offsets['rs1234'])
+		line = rdr.read()
+
+	"""
+	def __init__ (self, src, fmt=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open `BgzfFile`.
+			fmt
+				The file format.
+
+		"""
+		recordreader.RecordReader.__init__ (self, src, mode='rb', fmt=fmt,
+			compression='bgzf')
+		assert (isinstance (self.hndl, BgzfFile)), "source must be BGZF"
+		self._fill()
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single line from the input.
+
+		"""
+		tmp = self.buf
+		self._fill()
+		return tmp
+
+	def seek (self, voffset):
+		"""
+		Move to a virtual offset, as from `tell`.
+
+		"""
+		self.hndl.seek_virtual (voffset)
+		self._fill()
+
+	def seek_offset (self, offset):
+		"""
+		Move to an offset in the uncompressed data, using the block index.
+
+		"""
+		self.hndl.seek (offset)
+		self._fill()
+
+	## ACCESSORS:
+	def tell (self):
+		"""
+		Return the virtual offset of the next line to be read.
+
+		"""
+		return self.voffset
+
+	## INTERNALS:
+	def at_end (self):
+		return (not self.buf)
+
+	def _fill (self):
+		self.voffset = self.hndl.tell_virtual()
+		self.buf = self.hndl.readline()
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
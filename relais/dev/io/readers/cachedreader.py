@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader that keeps a binary cache of the records parsed from a file.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+
+from picklereader import PickleReader
+from relais.dev.io.writers.picklewriter import PickleWriter
+
+__all__ = [
+	'CachedReader',
+	'cache_key',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# bump this when the layout of cache files changes
+CACHE_VERSION = 2
+
+CACHE_EXT = 'rcache'
+
+# how many records are pickled together in the cache
+FRAME_SIZE = 1000
+
+
+### IMPLEMENTATION ###
+
+def cache_key (path, reader_cls, reader_args=None):
+	"""
+	Return what a cache of the records parsed from a file depends on.
+
+	:Parameters:
+		path : string
+			The path of the source file.
+		reader_cls
+			The `RecordReader` subclass that parses the source.
+		reader_args : dict
+			Any further arguments the reader is created with.
+
+	:Returns:
+		A tuple of the cache version, the absolute path, size and modification
+		time of the file, the name of the reader class and its arguments.
+
+	"""
+	st = os.stat (path)
+	return (
+		CACHE_VERSION,
+		os.path.abspath (path),
+		st.st_size,
+		st.st_mtime,
+		'%s.%s' % (reader_cls.__module__, reader_cls.__name__),
+		sorted ((reader_args or {}).items()),
+	)
+
+
+class CachedReader (object):
+	"""
+	Read records from a file, parsing it only if there is no cache of them.
+
+	The first time a file is read, it is parsed with the given reader and the
+	records are written as they are read to a cache file next to it, as a
+	stream of pickled frames of records. Later reads come from the cache, so
+	long as the file, the reader class and its arguments are unchanged, and
+	unpickle a whole frame at once. The cache is only put in place once every
+	record has been read, so an interrupted read never leaves a partial
+	cache. For example::
+
+		rdr = CachedReader ('big.txt', MyRecordReader)
+		for rec in rdr:
+			...
+		rdr.close()
+
+	Records must be picklable. If the cache can't be written (e.g. the
+	directory is read-only), the file is simply parsed every time.
+
+	"""
+	def __init__ (self, src, reader_cls, cache_path=None, reader_args=None,
+			frame_size=FRAME_SIZE):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src : string
+				The path of the file to read.
+			reader_cls
+				The `RecordReader` subclass to parse the file with.
+			cache_path : string
+				Where to keep the cache. By default, this is the source path
+				with the name of the reader class and ``.rcache`` appended.
+			reader_args : dict
+				Further keyword arguments for creating the reader.
+			frame_size : int
+				How many records to pickle together, when writing the cache.
+
+		"""
+		## Preparation:
+		if (cache_path is None):
+			cache_path = '%s.%s.%s' % (src, reader_cls.__name__.lower(),
+				CACHE_EXT)
+		self.cache_path = cache_path
+		self.key = cache_key (src, reader_cls, reader_args)
+		self.frame_size = frame_size
+		self.wrtr = None
+		self.tmp_path = None
+		self.closed = False
+		# the records of the frame being read or written, and the next to read
+		self.frame = []
+		self.posn = 0
+		## Main:
+		self.rdr = self._open_cache()
+		self.from_cache = self.rdr is not None
+		if (not self.from_cache):
+			self.rdr = reader_cls (src, **(reader_args or {}))
+			self._start_cache()
+			self._check_end()
+
+	def __del__ (self):
+		"""
+		Class d'tor.
+
+		This exists purely to discard any unfinished cache.
+		"""
+		try:
+			self.close()
+		except:
+			pass
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single record from the input.
+
+		"""
+		if (self.from_cache):
+			if (len (self.frame) <= self.posn):
+				self._next_frame()
+			rec = self.frame[self.posn]
+			self.posn += 1
+			return rec
+		rec = self.rdr.read()
+		if (self.wrtr is not None):
+			self._add_to_cache ([rec])
+		return rec
+
+	def read_batch (self, size):
+		"""
+		Read up to a given number of records from the input.
+
+		"""
+		if (self.from_cache):
+			batch = []
+			while ((len (batch) < size) and (not self.at_end())):
+				if (len (self.frame) <= self.posn):
+					self._next_frame()
+				posn = self.posn
+				recs = self.frame[posn:posn + size - len (batch)]
+				batch.extend (recs)
+				self.posn = posn + len (recs)
+			return batch
+		batch = self.rdr.read_batch (size)
+		if (self.wrtr is not None):
+			self._add_to_cache (batch)
+		return batch
+
+	def __iter__ (self):
+		"""
+		Iterate over every record in the source.
+		"""
+		if (self.from_cache):
+			# a frame at a time
+			for batch in self.iter_batches (self.frame_size):
+				for rec in batch:
+					yield rec
+			return
+		read = self.read
+		at_end = self.rdr.at_end
+		while (not at_end()):
+			yield read()
+
+	def iter_batches (self, size):
+		"""
+		Iterate over the records in the source, a list at a time.
+		"""
+		while (True):
+			batch = self.read_batch (size)
+			if (not batch):
+				break
+			yield batch
+
+	def close (self):
+		"""
+		Close the input, discarding any cache that wasn't finished.
+
+		Closing more than once is harmless.
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		if (self.wrtr is not None):
+			self.wrtr.close()
+			self.wrtr = None
+			os.remove (self.tmp_path)
+		if (self.rdr.hndl_opened):
+			self.rdr.hndl.close()
+
+	## INTERNALS:
+	def at_end (self):
+		if (self.from_cache):
+			return (len (self.frame) <= self.posn) and self.rdr.at_end()
+		return self.rdr.at_end()
+
+	def _next_frame (self):
+		# unpickle the next frame of records from the cache
+		self.frame = self.rdr.read()
+		self.posn = 0
+
+	def _open_cache (self):
+		# return a reader positioned after the header of a valid cache, or None
+		if (not os.path.exists (self.cache_path)):
+			return None
+		try:
+			rdr = PickleReader (self.cache_path, compression=None)
+		except Exception:
+			return None
+		try:
+			if ((not rdr.at_end()) and (rdr.read() == self.key)):
+				return rdr
+		except Exception:
+			pass
+		rdr.hndl.close()
+		return None
+
+	def _start_cache (self):
+		# write to a temporary file, so readers never see a partial cache
+		self.tmp_path = '%s.%s.tmp' % (self.cache_path, os.getpid())
+		try:
+			self.wrtr = PickleWriter (self.tmp_path, compression=None)
+		except (IOError, OSError):
+			self.wrtr = None
+			return
+		self.wrtr.write (self.key)
+
+	def _add_to_cache (self, recs):
+		# add records to the frame, writing it out once it's full
+		frame = self.frame
+		frame.extend (recs)
+		if (self.frame_size <= len (frame)):
+			self.wrtr.write (frame)
+			self.frame = []
+		self._check_end()
+
+	def _check_end (self):
+		# once the source is exhausted, put the finished cache in place
+		if ((self.wrtr is not None) and self.rdr.at_end()):
+			if (self.frame):
+				self.wrtr.write (self.frame)
+				self.frame = []
+			self.wrtr.close()
+			self.wrtr = None
+			os.rename (self.tmp_path, self.cache_path)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader for formats where records are separated by a delimiter.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import recordreader
+
+__all__ = [
+	'ChunkReader',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# how much to read at a time
+BLOCK_SIZE = 1024 * 1024
+
+# by default, how long a match of a regular expression delimiter may be
+REGEX_OVERLAP = 1024
+
+# where the delimiter goes: to the record before it, the one after, or neither
+KEEP_END = 'end'
+KEEP_START = 'start'
+KEEP_NONE = None
+
+
+### IMPLEMENTATION ###
+
+class ChunkReader (recordreader.RecordReader):
+	"""
+	A reader that splits its input into records at a delimiter.
+
+	The input is read in large blocks and searched for the delimiter, with
+	records that straddle blocks carried over to the next. Each record is
+	returned as a single string, for a format reader to parse. For example::
+
+		# GenBank, where each record ends with '//'
+		rdr = ChunkReader ('seqs.gb', '//\\n', keep='end')
+		# blank-line separated blocks
+		rdr = ChunkReader ('stanzas.txt', re.compile (r'\\n\\s*\\n'))
+		# FASTA, where each record starts with '>'
+		rdr = ChunkReader ('seqs.fa', re.compile ('^>', re.M), keep='start')
+
+	A record longer than a block is read in ever bigger pieces, so the cost of
+	carrying it over stays linear in its size. Blank records (e.g. between
+	two delimiters, or after the last) are skipped.
+
+	"""
+	def __init__ (self, src, delim, keep=KEEP_NONE, block_size=BLOCK_SIZE,
+			overlap=None, fmt=None, compression='auto'):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open and readable file-like object.
+			delim
+				The delimiter, either a string or a compiled regular
+				expression. The delimiter must match at least one character,
+				unless it is kept at the start of records.
+			keep
+				Where to keep the delimiter: at the end of the record before
+				it ('end'), at the start of the record after it ('start'), or
+				not at all (None).
+			block_size : int
+				How many bytes to read from the source at once.
+			overlap : int
+				For a regular expression, the longest that a match can be, so
+				that a match split between blocks is found. By default, this is
+				`REGEX_OVERLAP`.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+
+		"""
+		## Preconditions:
+		assert (keep in (KEEP_END, KEEP_START, KEEP_NONE)), \
+			"bad place to keep delimiter '%s'" % keep
+		## Main:
+		recordreader.RecordReader.__init__ (self, src, mode='rb', fmt=fmt,
+			compression=compression)
+		self.delim = delim
+		self.keep = keep
+		self.block_size = block_size
+		if (isinstance (delim, basestring)):
+			self.overlap = len (delim) - 1
+		else:
+			self.overlap = overlap or REGEX_OVERLAP
+		# the text read but not yet returned, which starts at self.posn
+		self.data = ''
+		self.posn = 0
+		self.eof = False
+		self.buf = self._next_record()
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single record from the input.
+
+		"""
+		tmp = self.buf
+		self.buf = self._next_record()
+		return tmp
+
+	## INTERNALS:
+	def at_end (self):
+		return self.buf is None
+
+	def _search (self, data, start):
+		# return the span of the next delimiter, or None
+		delim = self.delim
+		if (isinstance (delim, basestring)):
+			i = data.find (delim, start)
+			if (i == -1):
+				return None
+			return i, i + len (delim)
+		match = delim.search (data, start)
+		if (match is None):
+			return None
+		return match.span()
+
+	def _next_record (self):
+		# return the next record that isn't blank, or None at the end
+		while (True):
+			rec = self._split()
+			if (rec is None):
+				return None
+			if (rec and not rec.isspace()):
+				return rec
+
+	def _split (self):
+		# return the text up to the next delimiter, or None at the end
+		data = self.data
+		posn = self.posn
+		if (self.eof and (len (data) <= posn)):
+			return None
+		# a delimiter that starts this record doesn't end it
+		start = posn
+		if (self.keep == KEEP_START):
+			start += 1
+		while (True):
+			span = self._search (data, start)
+			# a match at the very end might go on in the next block
+			if (span and ((span[1] < len (data)) or self.eof)):
+				break
+			if (self.eof):
+				break
+			# read at least as much as is held, so long records are linear
+			block = self.hndl.read (max (self.block_size, len (data) - posn))
+			if (not block):
+				self.eof = True
+				continue
+			if (span):
+				start = span[0]
+			else:
+				start = max (start, len (data) - self.overlap)
+			start -= posn
+			data = data[posn:] + block
+			posn = 0
+		if (span is None):
+			self.data = ''
+			self.posn = 0
+			return data[posn:]
+		mstart, mend = span
+		if (self.keep == KEEP_END):
+			rec = data[posn:mend]
+			nxt = mend
+		elif (self.keep == KEEP_START):
+			rec = data[posn:mstart]
+			nxt = mstart
+		else:
+			rec = data[posn:mstart]
+			nxt = mend
+		if (nxt == posn):
+			raise ValueError ("delimiter matched nothing at offset %s" % posn)
+		self.data = data
+		self.posn = nxt
+		return rec
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
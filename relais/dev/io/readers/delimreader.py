@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader for delimited text tables (CSV, TSV), with typed columns.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import csv
+from array import array
+from itertools import chain, islice
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+import recordreader
+from relais.dev.errors import FormatError
+
+__all__ = [
+	'DelimReader',
+	'sniff_types',
+	'make_column',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# formats that are tab-delimited by default, the rest being comma-delimited
+TAB_FORMATS = ['tsv', 'tab', 'txt']
+
+# how many rows to look at when guessing column types
+SAMPLE_SIZE = 1000
+
+# the typecodes for numeric columns, as arrays and as numpy arrays
+ARRAY_TYPES = {int: 'l', float: 'd'}
+if (numpy is not None):
+	NUMPY_TYPES = {int: numpy.int64, float: numpy.float64}
+
+# what a column becomes when its values don't fit its type
+WIDER_TYPES = {int: float, float: str}
+
+# the values taken as missing by default
+NA_VALUES = ['', 'NA', 'N/A', 'NaN', 'nan', 'null']
+
+NAN = float ('nan')
+
+
+### IMPLEMENTATION ###
+
+def sniff_types (rows, na_values=()):
+	"""
+	Guess the type of every column in a set of rows.
+
+	Each column is int if all its values convert to int, float if they all
+	convert to float, and otherwise str. Missing values are ignored, but a
+	column with no other values is str. For example::
+
+		>>> sniff_types ([['1', '2.5', 'a'], ['NA', '4', '5']], ['NA'])
+		[<type 'int'>, <type 'float'>, <type 'str'>]
+
+	:Parameters:
+		rows
+			A sequence of rows, each a sequence of strings of the same length.
+		na_values
+			The strings that stand for a missing value.
+
+	"""
+	na_values = set (na_values)
+	types = []
+	for col in zip (*rows):
+		if (na_values):
+			col = [v for v in col if v not in na_values]
+		if (not col):
+			types.append (str)
+			continue
+		for t in (int, float):
+			try:
+				map (t, col)
+				break
+			except (ValueError, OverflowError):
+				pass
+		else:
+			t = str
+		types.append (t)
+	return types
+
+
+def make_column (values, typ, use_numpy=False, na_values=()):
+	"""
+	Convert a column of strings in bulk, to a typed container.
+
+	Missing values are None in a str column and NaN in a numeric one. As
+	ints have no missing value, an int column holding any is returned as
+	float.
+
+	:Parameters:
+		values
+			A sequence of strings.
+		typ
+			The type of the column: int, float or str.
+		use_numpy : boolean
+			Return numeric columns as numpy arrays, rather than arrays. The
+			strings are then converted by numpy, as a whole.
+		na_values
+			The strings that stand for a missing value.
+
+	:Returns:
+		An ``array.array`` or numpy array for a numeric column, or a list of
+		strings (and None).
+
+	Raises ValueError (or OverflowError) if a value can't be converted.
+
+	"""
+	na_values = set (na_values)
+	has_na = not na_values.isdisjoint (values)
+	if (typ is str):
+		if (has_na):
+			return [None if (v in na_values) else v for v in values]
+		return list (values)
+	if (has_na):
+		typ = float
+	if (use_numpy):
+		strs = numpy.array (values)
+		if (not has_na):
+			return strs.astype (NUMPY_TYPES[typ])
+		missing = numpy.in1d (strs, list (na_values))
+		col = numpy.empty (len (strs), dtype=NUMPY_TYPES[float])
+		col[missing] = numpy.nan
+		col[~missing] = strs[~missing].astype (NUMPY_TYPES[float])
+		return col
+	if (has_na):
+		return array ('d', [NAN if (v in na_values) else float (v)
+			for v in values])
+	return array (ARRAY_TYPES[typ], map (typ, values))
+
+
+class DelimReader (recordreader.RecordReader):
+	"""
+	A reader for delimited text, that can return its rows a column at a time.
+
+	The types of the columns are guessed from a sample of rows at the start
+	(or given), and are then used to convert each batch of rows a column at a
+	time, rather than a cell at a time. For example::
+
+		rdr = DelimReader ('results.tsv')
+		for name, count, score in rdr.iter_columns (100000):
+			total += sum (count)
+
+	Rows can also be read one at a time, as lists of converted values.
+	Missing values (e.g. 'NA') are read as NaN or None, an int column that
+	holds any becoming float. If any other value later in the file doesn't
+	fit the type of its column, the column is widened (from int to float to
+	str) from then on.
+
+	"""
+	def __init__ (self, src, delim=None, header=True, types=None,
+			sample_size=SAMPLE_SIZE, use_numpy=None, na_values=NA_VALUES,
+			fmt=None, compression='auto', **csv_args):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open and readable file-like object.
+			delim : string
+				The field delimiter. By default, this is a tab for the formats
+				in `TAB_FORMATS`, and a comma otherwise.
+			header : boolean
+				Is the first row a header, giving the column names?
+			types
+				The type of each column (int, float or str). By default, this
+				is guessed from the first rows.
+			sample_size : int
+				How many rows to guess column types from.
+			use_numpy : boolean
+				Return numeric columns as numpy arrays. By default, numpy is
+				used if it is installed.
+			na_values
+				The strings that stand for a missing value. By default, those
+				in `NA_VALUES`.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+			csv_args
+				Further arguments for ``csv.reader``, e.g. ``quotechar``.
+
+		"""
+		## Preparation:
+		recordreader.RecordReader.__init__ (self, src, mode='rb', fmt=fmt,
+			compression=compression)
+		if (delim is None):
+			if (self.fmt in TAB_FORMATS):
+				delim = '\t'
+			else:
+				delim = ','
+		if (use_numpy is None):
+			use_numpy = numpy is not None
+		assert ((not use_numpy) or numpy), "numpy is not installed"
+		self.use_numpy = use_numpy
+		self.na_values = set (na_values or [])
+		## Main:
+		rows = csv.reader (self.hndl, delimiter=delim, **csv_args)
+		self.names = None
+		if (header):
+			self.names = next (rows, None)
+		sample = list (islice (rows, sample_size))
+		if (types is None):
+			types = sniff_types ([r for r in sample if r], self.na_values)
+			if ((not sample) and self.names):
+				types = [str] * len (self.names)
+		self.types = list (types)
+		self.rows = chain (sample, rows)
+		self.buf = self._next_row()
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single row, as a list of converted values.
+
+		"""
+		return [c[0] for c in self.read_columns (1)]
+
+	def read_columns (self, size):
+		"""
+		Read up to a given number of rows, as columns.
+
+		:Parameters:
+			size : int
+				The maximum number of rows to read. Blank lines are skipped,
+				but count towards this.
+
+		:Returns:
+			A list of columns, one for each column of the table, in order.
+			Numeric columns are arrays (or numpy arrays) and others are lists
+			of strings. Missing values are NaN or None. If there are no more
+			rows, an empty list is returned.
+
+		"""
+		## Preconditions:
+		if (self.at_end()):
+			return []
+		## Main:
+		rows = [self.buf]
+		rows.extend (islice (self.rows, size - 1))
+		self.buf = self._next_row()
+		return self._to_columns (rows)
+
+	def iter_columns (self, size):
+		"""
+		Iterate over the rows of the table, as columns, a batch at a time.
+
+		:Parameters:
+			size : int
+				The maximum number of rows in each batch.
+
+		"""
+		while (True):
+			cols = self.read_columns (size)
+			if (not cols):
+				break
+			yield cols
+
+	## INTERNALS:
+	def at_end (self):
+		return self.buf is None
+
+	def _next_row (self):
+		# skip any blank lines, so the lookahead is a real row or None
+		for r in self.rows:
+			if (r):
+				return r
+		return None
+
+	def _to_columns (self, rows):
+		width = len (self.types)
+		if (set (map (len, rows)) != set ([width])):
+			# allow for blank lines, but not ragged rows
+			rows = [r for r in rows if r]
+			if (set (map (len, rows)) != set ([width])):
+				raise FormatError ("rows must have %s fields" % width)
+		na_values = self.na_values
+		cols = []
+		for i, values in enumerate (zip (*rows)):
+			if ((self.types[i] is int) and (not na_values.isdisjoint (values))):
+				# only a float column can hold a missing number
+				self.types[i] = float
+			while (True):
+				try:
+					cols.append (make_column (values, self.types[i],
+						self.use_numpy, na_values))
+					break
+				except (ValueError, OverflowError):
+					self.types[i] = WIDER_TYPES[self.types[i]]
+		return cols
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader for FASTA sequence files.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import recordreader
+from relais.dev.errors import FormatError
+from relais.dev.io.fasta import FastaRecord, FaiIndex, parse_title
+
+__all__ = [
+	'FastaReader',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# how much to read at a time
+BLOCK_SIZE = 1024 * 1024
+
+
+### IMPLEMENTATION ###
+
+class FastaReader (recordreader.RecordReader):
+	"""
+	A reader for FASTA files, returning a `FastaRecord` for each sequence.
+
+	The input is read in large blocks and split into records by searching for
+	title lines, and the lines of each sequence are joined by a single
+	``replace``, so no work is done per line. Uncompressed files can also be
+	fetched from at random, through a ``.fai`` index::
+
+		rdr = FastaReader ('ref.fa')
+		seq = rdr.fetch ('chr7', 117199644, 117199744)
+
+	"""
+	def __init__ (self, src, fmt='fasta', compression='auto',
+			block_size=BLOCK_SIZE, index_path=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open and readable file-like object.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+			block_size : int
+				How many bytes to read from the source at once.
+			index_path
+				Where to keep the index used for random access. See
+				`FaiIndex.for_fasta`.
+
+		"""
+		recordreader.RecordReader.__init__ (self, src, mode='rb', fmt=fmt,
+			compression=compression)
+		self.block_size = block_size
+		self.index_path = index_path
+		self.index = None
+		# the text read but not yet returned, which starts at self.posn
+		self.data = self._read_start()
+		self.posn = 0
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single sequence from the input.
+
+		"""
+		data = self.data
+		posn = self.posn
+		end = data.find ('\n>', posn)
+		if (end != -1):
+			text = data[posn:end + 1]
+			self.posn = end + 1
+		else:
+			# the record runs past this block
+			chunks = [data[posn:]]
+			read = self.hndl.read
+			block_size = self.block_size
+			self.data = ''
+			self.posn = 0
+			while (True):
+				block = read (block_size)
+				if (not block):
+					break
+				# a title may start right at the block boundary
+				if (block.startswith ('>') and chunks[-1].endswith ('\n')):
+					self.data = block
+					break
+				end = block.find ('\n>')
+				if (end != -1):
+					chunks.append (block[:end + 1])
+					self.data = block
+					self.posn = end + 1
+					break
+				chunks.append (block)
+			text = ''.join (chunks)
+		return self._parse (text)
+
+	def fetch (self, name, start=0, end=None):
+		"""
+		Return all or part of a sequence, using the index.
+
+		The index is built on first use if need be, so the source must be an
+		uncompressed file. Reading carries on from where it was afterwards.
+
+		:Parameters:
+			name : string
+				The name of the sequence.
+			start, end : int
+				The range of bases to fetch, counting from 0 and excluding
+				``end``, as for slicing. By default, the whole sequence.
+
+		"""
+		idx = self.get_index()
+		posn = self.hndl.tell()
+		try:
+			return idx.fetch (self.hndl, name, start, end)
+		finally:
+			self.hndl.seek (posn)
+
+	## ACCESSORS:
+	def get_index (self):
+		"""
+		Return the index for the source, loading or building it if need be.
+
+		"""
+		if (self.index is None):
+			if (not isinstance (self.hndl, file)):
+				raise ValueError ("random access needs an uncompressed file")
+			self.index = FaiIndex.for_fasta (self.hndl.name, self.index_path)
+		return self.index
+
+	## INTERNALS:
+	def at_end (self):
+		return not self.data
+
+	def _read_start (self):
+		# skip any leading blank lines, to the first title
+		while (True):
+			block = self.hndl.read (self.block_size)
+			if (not block):
+				return ''
+			block = block.lstrip()
+			if (block):
+				break
+		if (not block.startswith ('>')):
+			raise FormatError ("FASTA input doesn't start with a title")
+		return block
+
+	def _parse (self, text):
+		nl = text.find ('\n')
+		if (nl == -1):
+			name, desc = parse_title (text)
+			return FastaRecord (name, '', desc)
+		name, desc = parse_title (text[:nl])
+		seq = text[nl + 1:].replace ('\n', '')
+		if ('\r' in seq):
+			seq = seq.replace ('\r', '')
+		return FastaRecord (name, seq, desc)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A persistent index of line offsets, for random access into text files.
+
+The index is built in a single pass over a file and stored in a "sidecar"
+file next to it, as a short header followed by the offset of the start of
+every line as little-endian unsigned 64-bit integers. The header records the
+size and modification time of the indexed file, and an index that doesn't
+match is rebuilt. Offsets are read through a memory map, so opening even a
+very large index is cheap.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import mmap
+import struct
+
+__all__ = [
+	'LineIndex',
+	'INDEX_EXT',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the extension added to a file path to make the index path
+INDEX_EXT = '.lidx'
+
+# magic, indexed file size, indexed file mtime, number of lines
+HEADER = struct.Struct ('<8sQdQ')
+MAGIC = 'RLSLIDX1'
+
+OFFSET = struct.Struct ('<Q')
+
+# how much to read at a time while building
+BLOCK_SIZE = 1024 * 1024
+
+
+### IMPLEMENTATION ###
+
+class LineIndex (object):
+	"""
+	The offsets of every line in a file, kept in a sidecar file.
+
+	For example::
+
+		idx = LineIndex ('big.txt')
+		start, end = idx.span (9000000, 9000010)
+
+	"""
+	def __init__ (self, path, index_path=None):
+		"""
+		Class c'tor.
+
+		The index is loaded from the sidecar, or built if it is missing or out
+		of date.
+
+		:Parameters:
+			path
+				The path of the file to index.
+			index_path
+				Where to keep the index. By default, this is the file path with
+				`INDEX_EXT` added.
+
+		"""
+		self.path = path
+		self.index_path = index_path or (path + INDEX_EXT)
+		self.mmap = None
+		if (not self.is_current()):
+			self.build()
+		self._load()
+
+	def __del__ (self):
+		try:
+			self.mmap.close()
+		except:
+			pass
+
+	def __len__ (self):
+		"""
+		Return the number of lines in the indexed file.
+		"""
+		return self.count
+
+	## ACCESSORS:
+	def offset (self, index):
+		"""
+		Return the byte offset of the start of a line.
+
+		:Parameters:
+			index : int
+				The zero-based index of the line. The index one past the last
+				line gives the size of the file.
+
+		"""
+		assert (0 <= index <= self.count), "line index out of range"
+		return OFFSET.unpack_from (self.mmap,
+			HEADER.size + (index * OFFSET.size))[0]
+
+	def span (self, start, stop):
+		"""
+		Return the byte offsets that bound a run of lines.
+
+		:Returns:
+			The offset of the start of line ``start`` and of the end of the line
+			before ``stop``.
+
+		"""
+		assert (start <= stop), "line range is reversed"
+		return self.offset (start), self.offset (stop)
+
+	def is_current (self):
+		"""
+		Does the sidecar exist and match the indexed file?
+		"""
+		try:
+			idx_hndl = open (self.index_path, 'rb')
+		except IOError:
+			return False
+		try:
+			header = idx_hndl.read (HEADER.size)
+		finally:
+			idx_hndl.close()
+		if (len (header) < HEADER.size):
+			return False
+		magic, size, mtime, count = HEADER.unpack (header)
+		stat = os.stat (self.path)
+		return ((magic == MAGIC) and (size == stat.st_size) and
+			(mtime == stat.st_mtime))
+
+	## MUTATORS:
+	def build (self):
+		"""
+		Scan the file and (re)write the sidecar.
+
+		"""
+		stat = os.stat (self.path)
+		src = open (self.path, 'rb')
+		dst = open (self.index_path, 'wb')
+		try:
+			# write a placeholder header until the count is known
+			dst.write (HEADER.pack (MAGIC, 0, 0.0, 0))
+			count = 0
+			posn = 0
+			last = None
+			offsets = [0]
+			while (True):
+				block = src.read (BLOCK_SIZE)
+				if (not block):
+					break
+				find = block.find
+				i = find ('\n')
+				while (i != -1):
+					offsets.append (posn + i + 1)
+					i = find ('\n', i + 1)
+				posn += len (block)
+				if (offsets):
+					dst.write (struct.pack ('<%sQ' % len (offsets), *offsets))
+					count += len (offsets)
+					last = offsets[-1]
+					offsets = []
+			if (offsets):
+				# the file is empty
+				dst.write (OFFSET.pack (0))
+				count += 1
+				last = 0
+			# end with the size of the file, as a final unterminated line
+			if (last != posn):
+				dst.write (OFFSET.pack (posn))
+				count += 1
+			dst.seek (0)
+			dst.write (HEADER.pack (MAGIC, posn, stat.st_mtime, count - 1))
+		finally:
+			src.close()
+			dst.close()
+
+	## INTERNALS:
+	def _load (self):
+		hndl = open (self.index_path, 'rb')
+		try:
+			self.mmap = mmap.mmap (hndl.fileno(), 0, access=mmap.ACCESS_READ)
+		finally:
+			hndl.close()
+		magic, self.size, self.mtime, self.count = \
+			HEADER.unpack_from (self.mmap)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
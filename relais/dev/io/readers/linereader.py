@@ -7,27 +7,54 @@ A line-oriented reader.
 
 ### IMPORTS ###
 
-import recordreader
+import os
+import mmap
+from array import array
+
+import basereader, recordreader
+from lineindex import LineIndex
 
 __all__ = [
 	'LineReader',
+	'MmapLineReader',
 ]
 
 
 ### CONSTANTS & DEFINES ###
 
+# the line terminator searched for in mapped files
+NEWLINE = '\n'
+
+# the approximate number of bytes to pull in by each bulk read
+SIZEHINT = 1024 * 1024
+
 ### IMPLEMENTATION ###
 
 class LineReader (recordreader.RecordReader):
 	"""
 	A line-oriented reader.
 	"""
-	def __init__ (self, src):
+	def __init__ (self, src, sizehint=SIZEHINT, index_path=None):
 		"""
 		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open and readable file-like object.
+			sizehint : int
+				The approximate number of bytes to read in one go when reading
+				lines in batches.
+			index_path
+				Where to keep the line index used for random access. See
+				`LineIndex`.
 		
 		"""
 		basereader.BaseReader.__init__ (self, src, fmt='txt')
+		self.sizehint = sizehint
+		self.index_path = index_path
+		self.index = None
+		# lines read in bulk but not yet returned, stored last first
+		self.pending = []
 		self.buf = self._readline()
 		
 	## MUTATORS:
@@ -39,15 +66,245 @@ class LineReader (recordreader.RecordReader):
 		tmp = self.buf
 		self.buf = self._readline()
 		return tmp
+
+	def read_batch (self, size):
+		"""
+		Read up to a given number of lines from the input.
+
+		This reads from the source in bulk (via ``readlines``), which is much
+		faster than reading a line at a time.
+
+		:Parameters:
+			size : int
+				The maximum number of lines to return.
+
+		"""
+		## Preconditions:
+		if (self.at_end()):
+			return []
+		## Main:
+		batch = [self.buf]
+		if (self.pending):
+			self.pending.reverse()
+			batch.extend (self.pending)
+			self.pending = []
+		while (len (batch) < size):
+			lines = self.hndl.readlines (self.sizehint)
+			if (not lines):
+				break
+			batch.extend (lines)
+		# keep any surplus for the next read
+		surplus = batch[size:]
+		del batch[size:]
+		surplus.reverse()
+		self.pending = surplus
+		self.buf = self._readline()
+		return batch
 	
+	def seek_record (self, index):
+		"""
+		Move to a line, so that it will be the next one read.
+
+		This uses a persistent index of line offsets, which is built on first
+		use if need be, so the source must be an uncompressed file. See
+		`get_index`.
+
+		:Parameters:
+			index : int
+				The zero-based index of the line.
+
+		"""
+		self.hndl.seek (self.get_index().offset (index))
+		self.pending = []
+		self.buf = self._readline()
+
+	def read_range (self, start, stop):
+		"""
+		Return a run of lines as a single string.
+
+		Like `seek_record`, this uses the line index. Afterwards, the reader is
+		positioned at the line ``stop``.
+
+		:Parameters:
+			start : int
+				The index of the first line.
+			stop : int
+				The index after the last line.
+
+		"""
+		begin, end = self.get_index().span (start, stop)
+		self.hndl.seek (begin)
+		lines = self.hndl.read (end - begin)
+		self.pending = []
+		self.buf = self._readline()
+		return lines
+
+	## ACCESSORS:
+	def get_index (self):
+		"""
+		Return the line index for the source, loading or building it if need be.
+
+		"""
+		if (self.index is None):
+			if (not isinstance (self.hndl, file)):
+				raise ValueError ("random access needs an uncompressed file")
+			self.index = LineIndex (self.hndl.name, self.index_path)
+		return self.index
+
 	## INTERNALS:
 	def at_end (self):
 		return (not self.buf)
 		
 	def _readline (self):
+		if (self.pending):
+			return self.pending.pop()
 		return self.hndl.readline()
 
 
+class MmapLineReader (LineReader):
+	"""
+	A line-oriented reader that works over a memory-mapped file.
+
+	On construction, the source is mapped into memory and scanned once for
+	line offsets. Lines are then returned as slices of the map, or as
+	``buffer`` objects that reference the map without copying. Ranges of lines
+	may be taken as a single contiguous buffer.
+
+	As the source must be mapped, it has to be a file path or a real file
+	(i.e. one with a ``fileno``), not a file-like object.
+
+	"""
+	def __init__ (self, src, as_buffer=False):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open file.
+			as_buffer : boolean
+				Should lines be returned as ``buffer`` objects over the map,
+				rather than as fresh strings?
+
+		"""
+		# a compressed file can't be usefully mapped
+		basereader.BaseReader.__init__ (self, src, mode='rb', fmt='txt',
+			compression=None)
+		self.as_buffer = as_buffer
+		size = os.fstat (self.hndl.fileno()).st_size
+		if (size):
+			self.mmap = mmap.mmap (self.hndl.fileno(), size,
+				access=mmap.ACCESS_READ)
+		else:
+			# can't map an empty file
+			self.mmap = ''
+		self.offsets = self._scan_offsets (size)
+		self.posn = 0
+
+	def __del__ (self):
+		try:
+			self.mmap.close()
+		except:
+			pass
+		LineReader.__del__ (self)
+
+	def __len__ (self):
+		"""
+		Return the number of lines in the source.
+		"""
+		return len (self.offsets) - 1
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single line from the input.
+
+		"""
+		line = self.get_line (self.posn)
+		self.posn += 1
+		return line
+
+	def read_batch (self, size):
+		"""
+		Read up to a given number of lines from the input.
+
+		:Parameters:
+			size : int
+				The maximum number of lines to return.
+
+		"""
+		start = self.posn
+		stop = min (start + size, len (self))
+		self.posn = stop
+		get_line = self.get_line
+		return [get_line (i) for i in xrange (start, stop)]
+
+	def seek_record (self, index):
+		"""
+		Move to a line, so that it will be the next one read.
+
+		:Parameters:
+			index : int
+				The zero-based index of the line.
+
+		"""
+		assert (0 <= index <= len (self)), "line index out of range"
+		self.posn = index
+
+	## ACCESSORS:
+	def get_line (self, index):
+		"""
+		Return a line by index, without moving the current position.
+
+		:Parameters:
+			index : int
+				The zero-based index of the line.
+
+		"""
+		return self.read_range (index, index + 1)
+
+	def read_range (self, start, stop):
+		"""
+		Return a run of lines as a single slice of the source.
+
+		:Parameters:
+			start : int
+				The index of the first line.
+			stop : int
+				The index after the last line.
+
+		:Returns:
+			The lines from ``start`` up to but not including ``stop``, with
+			their terminators, as a string or (if the reader was created with
+			``as_buffer``) a buffer over the map.
+
+		"""
+		assert (0 <= start <= stop <= len (self)), "line range out of bounds"
+		begin = self.offsets[start]
+		end = self.offsets[stop]
+		if (self.as_buffer):
+			return buffer (self.mmap, begin, end - begin)
+		return self.mmap[begin:end]
+
+	## INTERNALS:
+	def at_end (self):
+		return (len (self) <= self.posn)
+
+	def _scan_offsets (self, size):
+		"""
+		Find the start of every line, plus a sentinel at the end of the file.
+		"""
+		offsets = array ('L', [0])
+		find = self.mmap.find
+		posn = find (NEWLINE)
+		while (posn != -1):
+			offsets.append (posn + 1)
+			posn = find (NEWLINE, posn + 1)
+		# catch a final unterminated line
+		if (offsets[-1] != size):
+			offsets.append (size)
+		return offsets
+
+
 
 ### TEST & DEBUG ###
 
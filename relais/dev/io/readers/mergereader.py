@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader that merges several sorted sources into a single sorted stream.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import heapq
+
+import recordreader
+
+__all__ = [
+	'MergeReader',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class _Reversed (object):
+	"""
+	Wraps a key so that it sorts in reverse.
+	"""
+	__slots__ = ['key']
+
+	def __init__ (self, key):
+		self.key = key
+
+	def __lt__ (self, other):
+		return other.key < self.key
+
+	def __eq__ (self, other):
+		return self.key == other.key
+
+	def __ne__ (self, other):
+		return self.key != other.key
+
+
+class MergeReader (recordreader.RecordReader):
+	"""
+	Read records in order from several sources that are each already sorted.
+
+	Only the next record from each source is held, in a heap, so memory use
+	depends on the number of sources and not on their size. Records with
+	equal keys come out in the order of their sources, so the merge is
+	stable. For example, to consolidate a set of sorted shards::
+
+		rdr = MergeReader (glob.glob ('export.*.txt'), reader_cls=MyReader,
+			key=operator.itemgetter (0), unique=True)
+		wrtr.write_iter (rdr)
+		rdr.close()
+
+	"""
+	def __init__ (self, srcs, key=None, reverse=False, unique=False,
+			reader_cls=None, reader_args=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			srcs
+				A sequence of sources, each being a `RecordReader` (or any
+				iterable of records) or a file path.
+			key
+				A function giving the key each source is sorted by, as for
+				``sorted``. If None, records are compared directly.
+			reverse : boolean
+				Are the sources sorted in descending order?
+			unique : boolean
+				Collapse records with equal keys, keeping only the first.
+			reader_cls
+				The `RecordReader` subclass to read any file paths with.
+			reader_args : dict
+				Further keyword arguments for creating each reader.
+
+		Note that readers opened here from file paths are closed by `close`,
+		but readers that are passed in are not.
+
+		"""
+		## Preparation:
+		# there is no single handle, the sources having their own
+		recordreader.RecordReader.__init__ (self, None)
+		if (key is None):
+			key = lambda x: x
+		if (reverse):
+			plain_key = key
+			key = lambda x: _Reversed (plain_key (x))
+		self.key = key
+		self.unique = unique
+		## Main:
+		self.rdrs = []
+		self.opened = []
+		for s in srcs:
+			if (isinstance (s, basestring)):
+				assert (reader_cls), "need a reader class to open '%s'" % s
+				s = reader_cls (s, **(reader_args or {}))
+				self.opened.append (s)
+			self.rdrs.append (iter (s))
+		# the next record from each source, as (key, source index, record)
+		self.heap = []
+		for i, r in enumerate (self.rdrs):
+			self._push (i)
+		heapq.heapify (self.heap)
+		self.closed = False
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read the next record in order.
+
+		"""
+		heap = self.heap
+		k, i, rec = heap[0]
+		self._advance (i)
+		if (self.unique):
+			while (heap and (heap[0][0] == k)):
+				self._advance (heap[0][1])
+		return rec
+
+	def read_batch (self, size):
+		"""
+		Read up to a given number of records, in order.
+
+		"""
+		batch = []
+		read = self.read
+		heap = self.heap
+		while ((len (batch) < size) and heap):
+			batch.append (read())
+		return batch
+
+	def __iter__ (self):
+		"""
+		Iterate over every record, in order.
+		"""
+		read = self.read
+		heap = self.heap
+		while (heap):
+			yield read()
+
+	def close (self):
+		"""
+		Close any sources opened from file paths.
+
+		Closing more than once is harmless.
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		for r in self.opened:
+			if (r.hndl_opened):
+				r.hndl.close()
+		self.heap = []
+
+	## INTERNALS:
+	def at_end (self):
+		return not self.heap
+
+	def _push (self, i):
+		# add the next record of a source to the heap (not yet heapified)
+		for rec in self.rdrs[i]:
+			self.heap.append ((self.key (rec), i, rec))
+			break
+
+	def _advance (self, i):
+		# replace the head of the heap, from source i, with its next record
+		for rec in self.rdrs[i]:
+			heapq.heapreplace (self.heap, (self.key (rec), i, rec))
+			return
+		heapq.heappop (self.heap)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A reader for records stored as a stream of pickles.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import cPickle
+
+import recordreader
+
+__all__ = [
+	'PickleReader',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class PickleReader (recordreader.RecordReader):
+	"""
+	A reader for the records written by `PickleWriter`.
+
+	Records are unpickled one at a time, as they are read, so the whole
+	stream is never held in memory.
+
+	"""
+	def __init__ (self, src, fmt='pickle', compression='auto'):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open and readable file-like object.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+
+		"""
+		recordreader.RecordReader.__init__ (self, src, mode='rb', fmt=fmt,
+			compression=compression)
+		self.unpickler = cPickle.Unpickler (self.hndl)
+		self.done = False
+		self.buf = self._load()
+
+	## MUTATORS:
+	def read (self):
+		"""
+		Read a single record from the input.
+
+		"""
+		tmp = self.buf
+		self.buf = self._load()
+		return tmp
+
+	## INTERNALS:
+	def at_end (self):
+		return self.done
+
+	def _load (self):
+		try:
+			return self.unpickler.load()
+		except EOFError:
+			self.done = True
+			return None
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Read-ahead of input on a background thread.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import sys
+import threading
+import Queue
+
+from relais.dev.io.compression import open_compressed
+
+__all__ = [
+	'PrefetchHandle',
+	'open_prefetched',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the default size of each block read ahead
+BLOCK_SIZE = 1024 * 1024
+
+# the default number of blocks held, including the one being consumed
+BUFFERS = 2
+
+
+### IMPLEMENTATION ###
+
+class PrefetchHandle (object):
+	"""
+	A readable file-like object that reads ahead of its consumer.
+
+	This wraps another readable handle. A background thread reads the
+	wrapped handle a large block at a time, while the consumer works on the
+	block before. Thus parsing overlaps with the latency of the underlying
+	I/O, which is of most use on network filesystems and slow disks. It
+	can be passed to any reader in place of a file::
+
+		rdr = LineReader (PrefetchHandle (open ('big.txt', 'rb')))
+
+	Lines are split on ``\\n`` only, as if the wrapped handle were opened in
+	binary mode.
+
+	"""
+	def __init__ (self, hndl, block_size=BLOCK_SIZE, buffers=BUFFERS):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			hndl
+				An open and readable file-like object. It will be closed when
+				this is.
+			block_size : int
+				How many bytes to read from the handle at a time.
+			buffers : int
+				How many blocks to hold at once: 2 for double buffering, 3 for
+				triple buffering and so on.
+
+		"""
+		## Preconditions:
+		assert (2 <= buffers), "need at least two buffers"
+		## Main:
+		self.hndl = hndl
+		self.name = getattr (hndl, 'name', None)
+		self.block_size = block_size
+		self.closed = False
+		# the block being consumed and the position within it
+		self.buf = ''
+		self.posn = 0
+		self.eof = False
+		# the block being consumed is held here, not in the queue
+		self.queue = Queue.Queue (buffers - 1)
+		self.stopping = threading.Event()
+		self.thread = threading.Thread (target=_read_ahead,
+			args=(hndl, block_size, self.queue, self.stopping),
+			name='PrefetchHandle')
+		self.thread.daemon = True
+		self.thread.start()
+
+	def __del__ (self):
+		try:
+			self.close()
+		except:
+			pass
+
+	def __iter__ (self):
+		readline = self.readline
+		while (True):
+			line = readline()
+			if (not line):
+				break
+			yield line
+
+	## ACCESSORS:
+	def read (self, size=-1):
+		"""
+		Read up to a number of bytes, or to the end of the input.
+
+		"""
+		if (size < 0):
+			chunks = [self.buf[self.posn:]]
+			while (self._next_block()):
+				chunks.append (self.buf)
+			self.buf = ''
+			self.posn = 0
+			return ''.join (chunks)
+		while (len (self.buf) - self.posn < size):
+			if (not self._fill()):
+				break
+		end = min (self.posn + size, len (self.buf))
+		data = self.buf[self.posn:end]
+		self.posn = end
+		return data
+
+	def readline (self):
+		"""
+		Read a single line, including its terminator.
+
+		"""
+		start = self.posn
+		while (True):
+			i = self.buf.find ('\n', start)
+			if (i != -1):
+				end = i + 1
+				break
+			# after filling, resume the search where this one stopped
+			searched = len (self.buf) - self.posn
+			if (not self._fill()):
+				end = len (self.buf)
+				break
+			start = searched
+		line = self.buf[self.posn:end]
+		self.posn = end
+		return line
+
+	def readlines (self, sizehint=0):
+		"""
+		Read lines, until the input is exhausted or about ``sizehint`` bytes.
+
+		Only whole lines are returned, unless the input ends without a
+		terminator.
+
+		"""
+		lines = []
+		total = 0
+		while (True):
+			cut = self.buf.rfind ('\n', self.posn)
+			if (cut != -1):
+				chunk = self.buf[self.posn:cut]
+				total += cut + 1 - self.posn
+				self.posn = cut + 1
+				lines.extend ([l + '\n' for l in chunk.split ('\n')])
+				if (0 < sizehint <= total):
+					break
+			if (not self._fill()):
+				if (self.posn < len (self.buf)):
+					lines.append (self.buf[self.posn:])
+					self.buf = ''
+					self.posn = 0
+				break
+		return lines
+
+	## MUTATORS:
+	def close (self):
+		"""
+		Stop reading ahead and close the wrapped handle.
+
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		self.stopping.set()
+		# drain the queue so a blocked reader thread can finish
+		while (self.thread.isAlive()):
+			try:
+				self.queue.get (timeout=0.01)
+			except Queue.Empty:
+				pass
+		self.hndl.close()
+
+	## INTERNALS:
+	def _next_block (self):
+		"""
+		Make the next block from the thread current, returning False at the end.
+		"""
+		if (self.eof):
+			return False
+		block = self.queue.get()
+		if (isinstance (block, tuple)):
+			self.eof = True
+			exc_type, exc_value, exc_tb = block
+			raise exc_type, exc_value, exc_tb
+		if (not block):
+			self.eof = True
+			return False
+		self.buf = block
+		self.posn = 0
+		return True
+
+	def _fill (self):
+		"""
+		Add the next block to what remains unread, returning False at the end.
+		"""
+		rest = self.buf[self.posn:]
+		if (not self._next_block()):
+			return False
+		if (rest):
+			self.buf = rest + self.buf
+		return True
+
+
+def _read_ahead (hndl, block_size, queue, stopping):
+	"""
+	Read blocks from a handle onto a queue, until the end or stopped.
+
+	This is not a method, so the thread holds no reference to the
+	`PrefetchHandle` and doesn't keep it alive.
+	"""
+	try:
+		while (not stopping.isSet()):
+			block = hndl.read (block_size)
+			queue.put (block)
+			if (not block):
+				break
+	except:
+		queue.put (sys.exc_info())
+
+
+def open_prefetched (path, mode='rb', block_size=BLOCK_SIZE, buffers=BUFFERS,
+		compression='auto'):
+	"""
+	Open a file path for reading, with read-ahead.
+
+	:Parameters:
+		path
+			The file to open.
+		mode
+			What mode to open it as.
+		block_size, buffers
+			See `PrefetchHandle`.
+		compression
+			How the file is compressed. See `BaseIO`. Decompression also
+			happens on the read-ahead thread.
+
+	:Returns:
+		A `PrefetchHandle`. Note that as this is an open handle, a reader it is
+		passed to will not close it.
+
+	"""
+	hndl = open_compressed (path, mode, compression)
+	return PrefetchHandle (hndl, block_size=block_size, buffers=buffers)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -26,7 +26,7 @@ class RecordReader (basereader.BaseReader):
 	A base class for all readers.
 
 	"""
-	def __init__ (self, src, mode='r', fmt=None):
+	def __init__ (self, src, mode='r', fmt=None, compression='auto'):
 		"""
 		Class c'tor.
 
@@ -38,12 +38,15 @@ class RecordReader (basereader.BaseReader):
 				What mode to open any output file path as.
 			fmt
 				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
 		
 		"""
-		basereader.BaseReader.__init__ (self, src, mode=mode, fmt=fmt)
+		basereader.BaseReader.__init__ (self, src, mode=mode, fmt=fmt,
+			compression=compression)
 		
 	## MUTATORS:
 	def read (self):
@@ -53,12 +56,49 @@ class RecordReader (basereader.BaseReader):
 		"""
 		raise NotImplementedError ('must override method in subclass')
 
-	def __iter__ (self, recs):
+	def read_batch (self, size):
+		"""
+		Read up to a given number of records from the input.
+
+		Subclasses that can read in bulk should override this.
+
+		:Parameters:
+			size : int
+				The maximum number of records to return.
+
+		:Returns:
+			A list of records, that will be shorter than ``size`` only if the
+			input is exhausted, and empty if there are no more records.
+
+		"""
+		batch = []
+		read = self.read
+		at_end = self.at_end
+		while ((len (batch) < size) and (not at_end())):
+			batch.append (read())
+		return batch
+
+	def __iter__ (self):
 		"""
 		Iterate over every record in the source.
 		"""
 		while (not self.at_end()):
 			yield self.read()
+
+	def iter_batches (self, size):
+		"""
+		Iterate over the records in the source, a list at a time.
+
+		:Parameters:
+			size : int
+				The maximum number of records in each batch.
+
+		"""
+		while (True):
+			batch = self.read_batch (size)
+			if (not batch):
+				break
+			yield batch
 	
 	## INTERNALS:
 	def at_end (self):
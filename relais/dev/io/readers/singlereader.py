@@ -10,21 +10,31 @@ __docformat__ = 'restructuredtext en'
 
 ### IMPORTS ###
 
+import os
+import mmap
+
 from relais.dev.io.baseio import BaseIO
 
 __all__ = [
 	'SingleReader',
+	'MmapSingleReader',
 ]
 
 
 ## CONSTANTS & DEFINES ###
 
+# how much to read at a time from sources of unknown size
+CHUNK_SIZE = 1024 * 1024
+
+
+### IMPLEMENTATION ###
+
 class SingleReader (BaseIO):
 	"""
 	A base class for all readers.
 
 	"""
-	def __init__ (self, src, mode='r', fmt=None):
+	def __init__ (self, src, mode='r', fmt=None, compression='auto'):
 		"""
 		Class c'tor.
 
@@ -36,19 +46,136 @@ class SingleReader (BaseIO):
 				What mode to open any output file path as.
 			fmt
 				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
 		
 		"""
-		BaseIO.__init__ (self, src, mode=mode, fmt=fmt)
+		BaseIO.__init__ (self, src, mode=mode, fmt=fmt,
+			compression=compression)
 		
 	def read (self):
 		"""
 		Subclass as appropriate.
 		"""
 		return self.hndl.read()
-		
+
+	def read_into (self, buf):
+		"""
+		Read the source into an existing writable buffer.
+
+		This avoids allocating a new string for the contents. Reading stops
+		when the buffer is full or the source is exhausted.
+
+		:Parameters:
+			buf
+				A writable buffer, such as a ``bytearray`` or a ``memoryview``
+				of one.
+
+		:Returns:
+			The number of bytes read.
+
+		"""
+		view = memoryview (buf)
+		size = len (view)
+		total = 0
+		readinto = getattr (self.hndl, 'readinto', None)
+		while (total < size):
+			if (readinto):
+				count = readinto (view[total:])
+			else:
+				data = self.hndl.read (min (size - total, CHUNK_SIZE))
+				count = len (data)
+				view[total:total + count] = data
+			if (not count):
+				break
+			total += count
+		return total
+
+	def read_bytearray (self):
+		"""
+		Read the entire source into a ``bytearray``.
+
+		Where the size of the source is known, the array is allocated once and
+		read into directly, so the contents are not copied. The result can be
+		parsed or altered in place, or wrapped in a ``memoryview``.
+
+		"""
+		size = self._remaining_size()
+		if (size is None):
+			buf = bytearray()
+		else:
+			buf = bytearray (size)
+			count = self.read_into (buf)
+			del buf[count:]
+		# catch a source of unknown size, or one that has grown
+		while (True):
+			data = self.hndl.read (CHUNK_SIZE)
+			if (not data):
+				break
+			buf.extend (data)
+		return buf
+
+	## INTERNALS:
+	def _remaining_size (self):
+		"""
+		Return how many bytes are left in the source, or None if unknown.
+		"""
+		if (isinstance (self.hndl, file)):
+			return max (os.fstat (self.hndl.fileno()).st_size - self.hndl.tell(),
+				0)
+		return None
+
+
+class MmapSingleReader (SingleReader):
+	"""
+	A reader that returns the entirety of a file as a memory map.
+
+	The file is not read into memory as a whole, but paged in as it is used.
+	The returned map supports slicing, searching and regular expressions, as
+	a string does. As the source must be mapped, it has to be an uncompressed
+	file path or a real file.
+
+	"""
+	def __init__ (self, src, fmt=None):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			src
+				A file path or open file.
+			fmt
+				The file format.
+
+		"""
+		SingleReader.__init__ (self, src, mode='rb', fmt=fmt, compression=None)
+		self.mmap = None
+
+	def __del__ (self):
+		try:
+			self.mmap.close()
+		except:
+			pass
+		SingleReader.__del__ (self)
+
+	def read (self):
+		"""
+		Return a read-only memory map of the file.
+
+		An empty file, which can't be mapped, gives an empty string.
+
+		"""
+		if (self.mmap is None):
+			size = os.fstat (self.hndl.fileno()).st_size
+			if (size):
+				self.mmap = mmap.mmap (self.hndl.fileno(), size,
+					access=mmap.ACCESS_READ)
+			else:
+				self.mmap = ''
+		return self.mmap
+
 
 
 
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Splitting a file into record-aligned ranges, to be read in parallel.
+
+A large file of records can be divided into byte ranges whose boundaries fall
+between records. Each range can then be given its own reader in a separate
+process, with each process opening the file itself, so that no data need be
+passed from the parent. For example, to count the lines of a file on every
+core::
+
+	def count_lines (rdr):
+		return sum ([len (b) for b in rdr.iter_batches (10000)])
+
+	total = sum (map_ranges ('big.txt', count_lines))
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import os
+import multiprocessing
+
+from relais.dev.io.compression import sniff_compression
+import linereader
+
+__all__ = [
+	'split_ranges',
+	'RangeHandle',
+	'map_ranges',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# how much to read at a time when searching for a boundary
+SEARCH_SIZE = 64 * 1024
+
+
+### IMPLEMENTATION ###
+
+def split_ranges (path, count, delim='\n', split_at=None):
+	"""
+	Divide a file into byte ranges that start and end on record boundaries.
+
+	Nominal boundaries are placed at even intervals through the file, and then
+	moved forward to the next occurence of the delimiter. As a result, there
+	may be fewer ranges than requested, if records are large or the file is
+	small.
+
+	:Parameters:
+		path
+			The path to an uncompressed file.
+		count : int
+			How many ranges to divide the file into.
+		delim : string
+			The string that separates records.
+		split_at : int
+			Where in the delimiter to split, by default after it (i.e. at
+			``len (delim)``). For example, to split FASTA between a newline and
+			the ``>`` that starts a record, use ``delim='\\n>', split_at=1``.
+
+	:Returns:
+		A list of (start, end) byte offsets, covering the whole file.
+
+	"""
+	## Preconditions & preparation:
+	assert (0 < count), "must ask for at least one range"
+	assert (delim), "need a delimiter"
+	if (split_at is None):
+		split_at = len (delim)
+	size = os.path.getsize (path)
+	## Main:
+	bounds = [0]
+	hndl = open (path, 'rb')
+	try:
+		for i in range (1, count):
+			nominal = (size * i) // count
+			if (nominal <= bounds[-1]):
+				continue
+			bound = _find_boundary (hndl, nominal, delim, split_at)
+			if (bound is None):
+				break
+			if (bounds[-1] < bound < size):
+				bounds.append (bound)
+	finally:
+		hndl.close()
+	bounds.append (size)
+	return [(bounds[i], bounds[i + 1]) for i in range (len (bounds) - 1)
+		if bounds[i] < bounds[i + 1]]
+
+
+def _find_boundary (hndl, posn, delim, split_at):
+	"""
+	Return the first split point at or after a position, or None if there is
+	none.
+	"""
+	# start early enough to catch a delimiter split by the position
+	start = max (posn - split_at, 0)
+	hndl.seek (start)
+	carry = ''
+	while (True):
+		block = hndl.read (SEARCH_SIZE)
+		if (not block):
+			return None
+		buf = carry + block
+		i = buf.find (delim)
+		while (i != -1):
+			bound = start - len (carry) + i + split_at
+			if (posn <= bound):
+				return bound
+			i = buf.find (delim, i + 1)
+		start += len (block)
+		carry = buf[-(len (delim) - 1):] if (1 < len (delim)) else ''
+
+
+class RangeHandle (object):
+	"""
+	A readable file-like object over a byte range of a file.
+
+	Reading stops at the end of the range, as if it were the end of the file.
+	The file is opened in binary mode, so lines are split on ``\\n``.
+
+	"""
+	def __init__ (self, path, start, end):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			path
+				The path to the file.
+			start, end : int
+				The byte offsets of the start and (exclusive) end of the range.
+
+		"""
+		self.name = path
+		self.hndl = open (path, 'rb')
+		self.hndl.seek (start)
+		self.posn = start
+		self.end = end
+
+	def __iter__ (self):
+		readline = self.readline
+		while (True):
+			line = readline()
+			if (not line):
+				break
+			yield line
+
+	## ACCESSORS:
+	def read (self, size=-1):
+		remaining = self.end - self.posn
+		if ((size < 0) or (remaining < size)):
+			size = remaining
+		data = self.hndl.read (size)
+		self.posn += len (data)
+		return data
+
+	def readline (self, size=-1):
+		remaining = self.end - self.posn
+		if ((size < 0) or (remaining < size)):
+			size = remaining
+		if (size <= 0):
+			return ''
+		line = self.hndl.readline (size)
+		self.posn += len (line)
+		return line
+
+	def readlines (self, sizehint=0):
+		if (sizehint <= 0):
+			data = self.read()
+		else:
+			data = self.read (sizehint)
+			if (data and (not data.endswith ('\n'))):
+				data += self.readline()
+		if (not data):
+			return []
+		lines = [l + '\n' for l in data.split ('\n')]
+		# the split adds a terminator to the final piece
+		if (lines[-1] == '\n'):
+			del lines[-1]
+		else:
+			lines[-1] = lines[-1][:-1]
+		return lines
+
+	def tell (self):
+		return self.posn
+
+	## MUTATORS:
+	def close (self):
+		self.hndl.close()
+
+
+def _map_range (args):
+	"""
+	Read a single range in a worker process.
+	"""
+	path, start, end, func, reader_cls, reader_args = args
+	hndl = RangeHandle (path, start, end)
+	try:
+		return func (reader_cls (hndl, **reader_args))
+	finally:
+		hndl.close()
+
+
+def map_ranges (path, func, reader_cls=linereader.LineReader, reader_args=None,
+		processes=None, ordered=True, delim='\n', split_at=None, count=None):
+	"""
+	Apply a function to a reader over each range of a file, in parallel.
+
+	:Parameters:
+		path
+			The path to an uncompressed file.
+		func
+			A callable that accepts a reader and returns a result. As it is
+			sent to other processes, it must be picklable (e.g. defined at the
+			top level of a module).
+		reader_cls
+			The reader class to use over each range. It is passed a handle for
+			the range, and must be picklable.
+		reader_args : dict
+			Any further keyword arguments for the reader.
+		processes : int
+			How many worker processes to use, by default one per CPU.
+		ordered : boolean
+			Should results be returned in the order of the ranges in the
+			file, or as they are completed?
+		delim, split_at
+			How records are separated. See `split_ranges`.
+		count : int
+			How many ranges to split the file into, by default one per process.
+
+	:Returns:
+		An iterator over the results of ``func`` for each range.
+
+	"""
+	## Preconditions & preparation:
+	if (sniff_compression (path)):
+		raise ValueError ("can't split compressed file '%s'" % path)
+	if (processes is None):
+		processes = multiprocessing.cpu_count()
+	reader_args = reader_args or {}
+	ranges = split_ranges (path, count or processes, delim, split_at)
+	tasks = [(path, start, end, func, reader_cls, reader_args)
+		for start, end in ranges]
+	## Main:
+	pool = multiprocessing.Pool (processes)
+	try:
+		if (ordered):
+			results = pool.imap (_map_range, tasks)
+		else:
+			results = pool.imap_unordered (_map_range, tasks)
+		for r in results:
+			yield r
+	finally:
+		pool.terminate()
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
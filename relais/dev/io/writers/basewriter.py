@@ -26,7 +26,7 @@ class BaseWriter (BaseIO):
 	A base class for all all writers.
 
 	"""
-	def __init__ (self, dst, mode='w', fmt=None):
+	def __init__ (self, dst, mode='w', fmt=None, compression='auto'):
 		"""
 		Class c'tor.
 
@@ -38,20 +38,51 @@ class BaseWriter (BaseIO):
 				What mode to open any output file path as.
 			fmt
 				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
 		
 		"""
-		BaseIO.__init__ (self, dst, mode=mode, fmt=fmt)
+		BaseIO.__init__ (self, dst, mode=mode, fmt=fmt,
+			compression=compression)
+		self.closed = False
 		
 	def __del__ (self):
 		"""
 		Class d'tor.
 		
-		This exists purely to flush the writer before destroying it.
+		This exists purely to close (and so flush) the writer before destroying
+		it.
 		"""
+		try:
+			self.close()
+		except:
+			pass
+		BaseIO.__del__ (self)
+
+	## MUTATORS:
+	def flush (self):
+		"""
+		Write any accumulated output to the destination.
+		"""
+		flush = getattr (self.hndl, 'flush', None)
+		if (flush):
+			flush()
+
+	def close (self):
+		"""
+		Flush the writer and close the output, if the writer opened it.
+
+		Closing a writer more than once is harmless.
+		"""
+		if (self.closed):
+			return
 		self.flush()
+		self.closed = True
+		if (self.hndl_opened):
+			self.hndl.close()
 
 
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A writer for FASTA sequence files.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import recordwriter
+from relais.dev.io.fasta import FaiEntry, FaiIndex, FAI_EXT
+
+__all__ = [
+	'FastaWriter',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the default number of bases on each line
+WIDTH = 60
+
+
+### IMPLEMENTATION ###
+
+class FastaWriter (recordwriter.RecordWriter):
+	"""
+	A writer for FASTA files, wrapping sequences to a fixed width.
+
+	Records are `FastaRecord` objects, or anything with ``name`` and ``seq``
+	(and optionally ``desc``) attributes. Each sequence is wrapped by slicing
+	and a single ``join``, and many records are buffered for each write to the
+	output. The ``.fai`` index of what is written is built along the way, and
+	can be saved when the writer is closed::
+
+		wrtr = FastaWriter ('out.fa', index=True)
+		wrtr.write_iter (recs)
+		wrtr.close()
+
+	"""
+	def __init__ (self, dst, width=WIDTH, index=False, fmt='fasta',
+			compression='auto', **kwargs):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			dst
+				The output point for the writer, a file path or an open and
+				writable file-like object.
+			width : int
+				The most bases on each line. If None, sequences aren't wrapped.
+			index
+				Where to save the index when closed, either a path or True for
+				the output path with ``.fai`` added. If False, the index is
+				kept (as `self.index`) but not saved. As the index gives
+				offsets in the uncompressed output, it is only of use for
+				uncompressed files.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+			kwargs
+				Further arguments for `RecordWriter` (e.g. ``flush_bytes``).
+
+		"""
+		recordwriter.RecordWriter.__init__ (self, dst, mode='wb', fmt=fmt,
+			compression=compression, **kwargs)
+		self.width = width
+		if (index is True):
+			index = self.hndl.name + FAI_EXT
+		self.index_path = index or None
+		self.index = FaiIndex()
+		# index offsets are relative to where the output started
+		try:
+			self.start = self.hndl.tell()
+		except (AttributeError, IOError):
+			self.start = 0
+
+	def close (self):
+		"""
+		Flush the writer and save any index.
+
+		"""
+		if (self.closed):
+			return
+		recordwriter.RecordWriter.close (self)
+		if (self.index_path):
+			self.index.save (self.index_path)
+
+	## INTERNALS:
+	def format_record (self, rec):
+		desc = getattr (rec, 'desc', '')
+		if (desc):
+			title = '>%s %s\n' % (rec.name, desc)
+		else:
+			title = '>%s\n' % rec.name
+		seq = rec.seq
+		size = len (seq)
+		width = self.width or size
+		if (size):
+			lines = [seq[i:i + width] for i in xrange (0, size, width)]
+			lines.append ('')
+			text = title + '\n'.join (lines)
+			line_bases = min (width, size)
+			line_width = line_bases + 1
+		else:
+			text = title
+			line_bases = line_width = 0
+		# byte_count doesn't yet include this record
+		self.index.add (FaiEntry (rec.name, size,
+			self.start + self.byte_count + len (title), line_bases, line_width))
+		return text
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A writer that stores arbitrary records as a stream of pickles.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import cPickle
+
+import recordwriter
+
+__all__ = [
+	'PickleWriter',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+PROTOCOL = 2
+
+
+### IMPLEMENTATION ###
+
+class PickleWriter (recordwriter.RecordWriter):
+	"""
+	A writer that stores each record as a binary pickle.
+
+	Records can be any picklable object, and are written one after another.
+	They can be read back with `PickleReader`. This is intended for scratch
+	and cache files, not for exchange.
+
+	"""
+	def __init__ (self, dst, fmt='pickle', compression='auto', **kwargs):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			dst
+				The output point for the writer, a file path or an open and
+				writable file-like object.
+			fmt
+				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+			kwargs
+				Further arguments for `RecordWriter` (e.g. ``flush_bytes``).
+
+		"""
+		recordwriter.RecordWriter.__init__ (self, dst, mode='wb', fmt=fmt,
+			compression=compression, **kwargs)
+
+	## INTERNALS:
+	def format_record (self, rec):
+		return cPickle.dumps (rec, PROTOCOL)
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
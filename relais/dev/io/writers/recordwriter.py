@@ -15,18 +15,32 @@ from exceptions import NotImplementedError
 import basewriter
 
 __all__ = [
-	'BaseWriter',
+	'RecordWriter',
 ]
 
 
 ## CONSTANTS & DEFINES ###
 
+# by default, flush after this many bytes are buffered
+FLUSH_BYTES = 64 * 1024
+
+
+### IMPLEMENTATION ###
+
 class RecordWriter (basewriter.BaseWriter):
 	"""
-	A base class for all all writers.
+	A base class for writers that write a record at a time.
+
+	Records are serialized by `format_record` and the results buffered, being
+	written to the output in a single call when enough bytes or records have
+	accumulated, or when the writer is flushed or closed. Only an explicit
+	`flush` or `close` flushes the output handle itself. Subclasses need only
+	override `format_record`, although those that have to write directly may
+	instead override `write`.
 
 	"""
-	def __init__ (self, dst, mode='w', fmt=None):
+	def __init__ (self, dst, mode='w', fmt=None, compression='auto',
+			flush_bytes=FLUSH_BYTES, flush_recs=None):
 		"""
 		Class c'tor.
 
@@ -38,21 +52,28 @@ class RecordWriter (basewriter.BaseWriter):
 				What mode to open any output file path as.
 			fmt
 				The file format.
+			compression
+				How any file path is compressed. See `BaseIO`.
+			flush_bytes : int
+				Write out the buffer once it holds this many bytes. If None,
+				there is no limit.
+			flush_recs : int
+				Write out the buffer once it holds this many records. If None,
+				there is no limit.
 		
 		Note that if an open handle is passed to the reader it will not close
 		it, but if it has to open a handle, it will close it.
 		
 		"""
-		basewriter.BaseWriter.__init__ (self, dst, mode=mode, fmt=fmt)
-		
-		
-	def __del__ (self):
-		"""
-		Class d'tor.
-		
-		This exists purely to flush the writer before destroying it.
-		"""
-		self.flush()
+		basewriter.BaseWriter.__init__ (self, dst, mode=mode, fmt=fmt,
+			compression=compression)
+		self.flush_bytes = flush_bytes
+		self.flush_recs = flush_recs
+		self.buf = []
+		self.buf_bytes = 0
+		# the total records and bytes written through the buffer
+		self.rec_count = 0
+		self.byte_count = 0
 		
 	## MUTATORS:
 	def write (self, rec):
@@ -60,22 +81,50 @@ class RecordWriter (basewriter.BaseWriter):
 		Write a single record to the output.
 
 		"""
-		raise NotImplementedError ('must override method in subclass')
+		data = self.format_record (rec)
+		self.buf.append (data)
+		self.buf_bytes += len (data)
+		self.rec_count += 1
+		self.byte_count += len (data)
+		if (self._buf_full()):
+			self._drain()
 
 	def write_iter (self, recs):
 		"""
 		For every record in an iterable, write it.
 		"""
+		write = self.write
 		for r in recs:
-			self.write (rec)
+			write (r)
 	
 	def flush (self):
 		"""
-		Write any accumulated output to the destination.
+		Write any accumulated output to the destination, and flush it.
 		"""
-		raise NotImplementedError ('must override method in subclass')
+		self._drain()
+		basewriter.BaseWriter.flush (self)
 	
 	## INTERNALS:
+	def format_record (self, rec):
+		"""
+		Serialize a record, returning a string to be written.
+
+		"""
+		raise NotImplementedError ('must override method in subclass')
+
+	def _drain (self):
+		# write out the buffer, without flushing the handle, which for a
+		# compressed output would end a compressed block early
+		if (self.buf):
+			self.hndl.write (''.join (self.buf))
+			self.buf = []
+			self.buf_bytes = 0
+
+	def _buf_full (self):
+		return (((self.flush_bytes is not None) and
+				(self.flush_bytes <= self.buf_bytes)) or
+			((self.flush_recs is not None) and
+				(self.flush_recs <= len (self.buf))))
 
 
 
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A writer that splits its output over a series of files.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+__all__ = [
+	'ShardWriter',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class ShardWriter (object):
+	"""
+	Write records across several files, rolling over when one is big enough.
+
+	Each shard is written by its own `RecordWriter`. When a shard holds a
+	given number of records or bytes, it is closed and the next record starts
+	a new one. Thus downstream jobs can start on each shard as soon as it is
+	closed. If a manifest is asked for, each shard is listed there as it is
+	closed, along with its record and byte counts. For example::
+
+		wrtr = ShardWriter ('export.%03d.txt.gz', MyRecordWriter,
+			max_recs=1000000, manifest='export.manifest')
+		wrtr.write_iter (recs)
+		wrtr.close()
+
+	"""
+	def __init__ (self, template, writer_cls, max_recs=None, max_bytes=None,
+			manifest=None, **writer_args):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			template : string
+				How to name the shards, formatted with the index of each shard
+				(counting from 0), e.g. ``'out.%04d.txt'``. Compression is taken
+				from the extension, as for any writer.
+			writer_cls
+				The `RecordWriter` subclass to write each shard with. It must
+				serialize records via ``format_record``, so their size can be
+				counted.
+			max_recs : int
+				The most records to put in a shard. If None, there is no limit.
+			max_bytes : int
+				Roll over to a new shard once this many (uncompressed) bytes
+				have been written to the current one. If None, there is no
+				limit.
+			manifest
+				A file path or writable file-like object to list the closed
+				shards in, one per line as tab-separated path, records and
+				bytes.
+			writer_args
+				Further keyword arguments for creating each shard writer.
+
+		"""
+		## Preconditions:
+		assert (max_recs or max_bytes), "need a limit on shard size"
+		## Main:
+		self.template = template
+		self.writer_cls = writer_cls
+		self.writer_args = writer_args
+		self.max_recs = max_recs
+		self.max_bytes = max_bytes
+		if (isinstance (manifest, basestring)):
+			self.manifest = open (manifest, 'w')
+			self.manifest_opened = True
+		else:
+			self.manifest = manifest
+			self.manifest_opened = False
+		# the completed shards, as (path, records, bytes)
+		self.shards = []
+		self.wrtr = None
+		self.path = None
+		self.closed = False
+
+	def __del__ (self):
+		"""
+		Class d'tor.
+
+		This exists purely to close the writer before destroying it.
+		"""
+		try:
+			self.close()
+		except:
+			pass
+
+	## MUTATORS:
+	def write (self, rec):
+		"""
+		Write a single record to the current shard.
+
+		"""
+		wrtr = self.wrtr
+		if (wrtr is None):
+			wrtr = self._open_shard()
+		wrtr.write (rec)
+		if (((self.max_recs is not None) and
+				(self.max_recs <= wrtr.rec_count)) or
+				((self.max_bytes is not None) and
+				(self.max_bytes <= wrtr.byte_count))):
+			self._close_shard()
+
+	def write_iter (self, recs):
+		"""
+		For every record in an iterable, write it.
+		"""
+		write = self.write
+		for r in recs:
+			write (r)
+
+	def flush (self):
+		"""
+		Write any accumulated output in the current shard.
+		"""
+		if (self.wrtr is not None):
+			self.wrtr.flush()
+
+	def close (self):
+		"""
+		Close the current shard and the manifest.
+
+		Closing more than once is harmless.
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		if (self.wrtr is not None):
+			self._close_shard()
+		if (self.manifest_opened):
+			self.manifest.close()
+
+	## INTERNALS:
+	def _open_shard (self):
+		path = self.template % len (self.shards)
+		self.wrtr = self.writer_cls (path, **self.writer_args)
+		self.path = path
+		return self.wrtr
+
+	def _close_shard (self):
+		wrtr = self.wrtr
+		self.wrtr = None
+		wrtr.close()
+		shard = (self.path, wrtr.rec_count, wrtr.byte_count)
+		self.shards.append (shard)
+		if (self.manifest is not None):
+			self.manifest.write ('%s\t%s\t%s\n' % shard)
+			self.manifest.flush()
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
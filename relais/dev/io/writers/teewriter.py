@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A writer that sends the same output to several destinations.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import basewriter, recordwriter
+from threadedwriter import ThreadedWriter
+
+__all__ = [
+	'TeeWriter',
+	'TeeHandle',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+### IMPLEMENTATION ###
+
+class _SinkWriter (basewriter.BaseWriter):
+	"""
+	A writer that passes output straight through to its handle.
+	"""
+	def write (self, data):
+		self.hndl.write (data)
+
+
+class TeeHandle (object):
+	"""
+	A writable file-like object that copies its output to several others.
+
+	"""
+	def __init__ (self, dsts, mode='w', fmt=None, compression='auto',
+			threaded=False):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			dsts
+				A sequence of destinations, each being a file path or an open
+				and writable file-like object.
+			mode, fmt, compression
+				As for `BaseWriter`, applied to every destination.
+			threaded : boolean
+				Should each destination be written on its own thread? This
+				lets slow destinations (e.g. compressed files or pipes) be
+				written concurrently.
+
+		"""
+		## Preconditions:
+		assert (dsts), "need at least one destination"
+		## Main:
+		self.sinks = []
+		for d in dsts:
+			sink = _SinkWriter (d, mode=mode, fmt=fmt, compression=compression)
+			if (threaded):
+				sink = ThreadedWriter (sink)
+			self.sinks.append (sink)
+		first = self.sinks[0]
+		first = getattr (first, 'wrtr', first)
+		self.name = getattr (first.hndl, 'name', None)
+		self.fmt = first.fmt
+
+	## MUTATORS:
+	def write (self, data):
+		for s in self.sinks:
+			s.write (data)
+
+	def flush (self):
+		for s in self.sinks:
+			s.flush()
+
+	def close (self):
+		"""
+		Flush every destination, closing those given as file paths.
+
+		"""
+		for s in self.sinks:
+			s.close()
+
+
+class TeeWriter (recordwriter.RecordWriter):
+	"""
+	A record writer that writes to several destinations at once.
+
+	Each record is serialized by `format_record` only once, and the buffered
+	output is then written to every destination. Thus the cost of serializing
+	is the same however many destinations there are. As with any
+	`RecordWriter`, subclasses override `format_record`. For example::
+
+		wrtr = MyTeeWriter (['out.txt', 'out.txt.gz', sys.stdout],
+			threaded=True)
+		wrtr.write_iter (recs)
+		wrtr.close()
+
+	"""
+	def __init__ (self, dsts, mode='w', fmt=None, compression='auto',
+			threaded=False, **kwargs):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			dsts
+				A sequence of destinations, each being a file path or an open
+				and writable file-like object.
+			mode, fmt, compression
+				As for `RecordWriter`, applied to every destination.
+			threaded : boolean
+				Write each destination on its own thread. See `TeeHandle`.
+			kwargs
+				Further arguments for `RecordWriter` (e.g. ``flush_bytes``).
+
+		"""
+		tee = TeeHandle (dsts, mode=mode, fmt=fmt, compression=compression,
+			threaded=threaded)
+		recordwriter.RecordWriter.__init__ (self, tee, fmt=tee.fmt, **kwargs)
+
+	def close (self):
+		"""
+		Flush the writer and close every destination given as a path.
+
+		"""
+		if (self.closed):
+			return
+		recordwriter.RecordWriter.close (self)
+		self.hndl.close()
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
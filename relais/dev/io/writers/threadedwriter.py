@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A wrapper that moves the work of a writer onto a background thread.
+
+"""
+
+__docformat__ = 'restructuredtext en'
+
+
+### IMPORTS ###
+
+import sys
+import threading
+import Queue
+
+__all__ = [
+	'ThreadedWriter',
+]
+
+
+## CONSTANTS & DEFINES ###
+
+# the default number of pending operations before write blocks
+QUEUE_SIZE = 64
+
+# the default number of records handed over at a time by write_iter
+BATCH_SIZE = 1024
+
+# operations passed to the writer thread
+WRITE = 'write'
+WRITE_ITER = 'write_iter'
+FLUSH = 'flush'
+CLOSE = 'close'
+
+
+### IMPLEMENTATION ###
+
+class ThreadedWriter (object):
+	"""
+	Wrap a writer, so records are formatted and written on another thread.
+
+	Records passed to `write` are placed on a bounded queue and returned from
+	immediately, while a dedicated thread takes them from the queue and hands
+	them to the wrapped writer. Producing records and writing them thus
+	overlap. If the queue is full, `write` blocks until there is room.
+
+	The first error raised by the wrapped writer is kept and re-raised in the
+	calling thread by every later call to `write`, `flush` or `close`, and
+	any records still queued are discarded. As the thread keeps the wrapper
+	alive, it must be closed explicitly for all records to be written. For
+	example::
+
+		wrtr = ThreadedWriter (MyRecordWriter ('out.txt'))
+		wrtr.write_iter (generate_records())
+		wrtr.close()
+
+	"""
+	def __init__ (self, wrtr, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE):
+		"""
+		Class c'tor.
+
+		:Parameters:
+			wrtr
+				The writer to wrap, which must have ``write``, ``flush`` and
+				``close`` methods (e.g. a `RecordWriter`). After wrapping, it
+				should only be used through the wrapper.
+			queue_size : int
+				The maximum number of pending operations.
+			batch_size : int
+				How many records `write_iter` passes to the thread in one
+				operation.
+
+		"""
+		self.wrtr = wrtr
+		self.batch_size = batch_size
+		self.queue = Queue.Queue (queue_size)
+		self.error = None
+		self.closed = False
+		self.thread = threading.Thread (target=self._run,
+			name='ThreadedWriter')
+		self.thread.daemon = True
+		self.thread.start()
+
+	def __del__ (self):
+		"""
+		Class d'tor.
+
+		This exists purely to close the writer before destroying it.
+		"""
+		try:
+			self.close()
+		except:
+			pass
+
+	## MUTATORS:
+	def write (self, rec):
+		"""
+		Queue a single record to be written.
+
+		"""
+		self._put (WRITE, rec)
+
+	def write_iter (self, recs):
+		"""
+		For every record in an iterable, queue it to be written.
+		"""
+		batch = []
+		for r in recs:
+			batch.append (r)
+			if (self.batch_size <= len (batch)):
+				self._put (WRITE_ITER, batch)
+				batch = []
+		if (batch):
+			self._put (WRITE_ITER, batch)
+
+	def flush (self):
+		"""
+		Wait until all queued records are written and flushed.
+
+		"""
+		self._put (FLUSH)
+		self.queue.join()
+		self._check_error()
+
+	def close (self):
+		"""
+		Write all queued records, close the wrapped writer and stop the thread.
+
+		Closing more than once is harmless.
+		"""
+		if (self.closed):
+			return
+		self.closed = True
+		self.queue.put ((CLOSE, None))
+		self.thread.join()
+		self._check_error()
+
+	## INTERNALS:
+	def _put (self, op, data=None):
+		assert (not self.closed), "can't write to a closed writer"
+		self._check_error()
+		self.queue.put ((op, data))
+
+	def _check_error (self):
+		if (self.error):
+			exc_type, exc_value, exc_tb = self.error
+			raise exc_type, exc_value, exc_tb
+
+	def _run (self):
+		"""
+		Carry out queued operations until closed.
+		"""
+		wrtr = self.wrtr
+		while (True):
+			op, data = self.queue.get()
+			try:
+				if (op is CLOSE):
+					wrtr.close()
+				# after an error, just drain the queue
+				elif (self.error is None):
+					if (op is WRITE):
+						wrtr.write (data)
+					elif (op is WRITE_ITER):
+						wrtr.write_iter (data)
+					elif (op is FLUSH):
+						wrtr.flush()
+			except:
+				if (self.error is None):
+					self.error = sys.exc_info()
+			self.queue.task_done()
+			if (op is CLOSE):
+				break
+
+
+
+### TEST & DEBUG ###
+
+def _doctest ():
+	import doctest
+	doctest.testmod ()
+
+
+### MAIN ###
+
+if __name__ == '__main__':
+	_doctest()
+
+
+### END ######################################################################
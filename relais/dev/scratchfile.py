@@ -22,6 +22,8 @@ import os
 import sys
 import shutil
 
+from relais.dev import dirwalk
+
 
 ## CONSTANTS & DEFINES: ###
 
@@ -179,10 +181,13 @@ def recursive_clear (path):
 	## Preconditions:
 	assert (os.path.exists (path) and os.path.isdir (path))
 	## Main:
-	contents = os.listdir (path)
-	for item in contents:
-		new_path = os.path.join (path, item)
-		recursive_remove (new_path)
+	# links, even to directories, are removed rather than followed
+	for name, is_dir, is_file in dirwalk.list_dir (path, follow_links=False):
+		new_path = os.path.join (path, name)
+		if (is_dir):
+			shutil.rmtree (new_path)
+		else:
+			os.remove (new_path)
 
 
 ### TEST & DEBUG ###
@@ -49,6 +49,7 @@ setup (
 	zip_safe=False,
 	install_requires=[
 		'setuptools',
+		'scandir; python_version < "3.5"',
 		# -*- Extra requirements: -*-
 	],
 	entry_points="""
@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test the dirwalk module.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+
+from relais.dev import dirwalk, scratchfile
+from relais.dev.fileutils import string_to_file
+
+
+### CONSTANTS & DEFINES ###
+
+FILES = {
+	'a.txt': 'alpha\n',
+	'b.log': 'beta beta\n',
+	os.path.join ('sub', 'c.txt'): 'gamma gamma gamma\n',
+	os.path.join ('sub', 'deeper', 'd.txt'): 'delta\n',
+	os.path.join ('skip', 'e.txt'): 'epsilon\n',
+}
+
+
+### TESTS ###
+
+class test_dirwalk (object):
+	outdir = 'test/out/test_dirwalk'
+
+	def setUp (self):
+		for d in ('sub', os.path.join ('sub', 'deeper'), 'skip'):
+			os.makedirs (os.path.join (self.outdir, d))
+		for name, contents in FILES.items():
+			string_to_file (contents, os.path.join (self.outdir, name))
+		self.snap_path = os.path.join ('test/out', 'test_dirwalk.snap')
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+		if (os.path.exists (self.snap_path)):
+			os.remove (self.snap_path)
+
+	def relpaths (self, paths):
+		return sorted ([p[len (self.outdir) + 1:] for p in paths])
+
+	def test_walk (self):
+		found = self.relpaths (dirwalk.walk (self.outdir))
+		assert (found == sorted (FILES.keys()))
+		found = self.relpaths (dirwalk.walk (self.outdir, include='*.txt',
+			exclude=['skip', 'd.*']))
+		assert (found == ['a.txt', os.path.join ('sub', 'c.txt')])
+
+	def test_listdir (self):
+		# the walk without scandir agrees with os.walk
+		expected = []
+		for dirpath, dirnames, filenames in os.walk (self.outdir):
+			expected.extend ([os.path.join (dirpath, f) for f in filenames])
+		found = dirwalk._walk_listdir (self.outdir, [], [], False, True)
+		found = dict (found)
+		assert (sorted (found.keys()) == sorted (expected))
+		for fpath, st in found.items():
+			assert (st.st_size == os.path.getsize (fpath))
+		if (dirwalk.HAVE_SCANDIR):
+			found = dirwalk._walk_scandir (self.outdir, [], [], False, False)
+			assert (sorted ([f[0] for f in found]) == sorted (expected))
+
+	def test_list_dir (self):
+		os.symlink (os.path.abspath (os.path.join (self.outdir, 'sub')),
+			os.path.join (self.outdir, 'link'))
+		entries = dict ((e[0], e[1:]) for e in dirwalk.list_dir (self.outdir))
+		assert (entries == {'a.txt': (False, True), 'b.log': (False, True),
+			'sub': (True, False), 'skip': (True, False), 'link': (True, False)})
+		entries = dirwalk.list_dir (self.outdir, follow_links=False)
+		assert (('link', False, False) in entries)
+
+	def test_clear (self):
+		# a link to a directory is removed, and what it points to is kept
+		target = os.path.join ('test/out', 'test_dirwalk_target')
+		os.mkdir (target)
+		try:
+			os.symlink (os.path.abspath (target),
+				os.path.join (self.outdir, 'link'))
+			scratchfile.recursive_clear (self.outdir)
+			assert (os.listdir (self.outdir) == [])
+			assert (os.path.isdir (target))
+		finally:
+			os.rmdir (target)
+
+	def test_snapshot (self):
+		snap = dirwalk.snapshot_dir (self.outdir)
+		assert (sorted (snap.keys()) == sorted (FILES.keys()))
+		assert (snap['a.txt'][0] == len (FILES['a.txt']))
+		dirwalk.save_snapshot (snap, self.snap_path)
+		assert (dirwalk.load_snapshot (self.snap_path) == snap)
+		assert (dirwalk.diff_snapshots (snap, snap) == [])
+
+	def test_changes (self):
+		changes = list (dirwalk.iter_changes (self.outdir, self.snap_path))
+		assert (sorted (changes) ==
+			sorted ([(dirwalk.ADDED, f) for f in FILES.keys()]))
+		assert (list (dirwalk.iter_changes (self.outdir, self.snap_path)) == [])
+		os.remove (os.path.join (self.outdir, 'b.log'))
+		string_to_file ('alpha, changed\n', os.path.join (self.outdir, 'a.txt'))
+		string_to_file ('zeta\n', os.path.join (self.outdir, 'sub', 'f.txt'))
+		changes = list (dirwalk.iter_changes (self.outdir, self.snap_path,
+			update=False))
+		assert (sorted (changes) == [
+			(dirwalk.ADDED, os.path.join ('sub', 'f.txt')),
+			(dirwalk.CHANGED, 'a.txt'),
+			(dirwalk.REMOVED, 'b.log'),
+		])
+		# without an update, the same changes are found again
+		assert (sorted (dirwalk.iter_changes (self.outdir, self.snap_path)) ==
+			sorted (changes))
+		assert (list (dirwalk.iter_changes (self.outdir, self.snap_path)) == [])
+
+	def test_own_snapshot (self):
+		# a snapshot kept in the tree isn't reported as a change
+		snap_path = os.path.join (self.outdir, 'tree.snap')
+		changes = list (dirwalk.iter_changes (self.outdir, snap_path))
+		assert (len (changes) == len (FILES))
+		assert (list (dirwalk.iter_changes (self.outdir, snap_path)) == [])
+
+
+### END ########################################################################
@@ -0,0 +1,170 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test the fileutils module.
+"""
+
+### IMPORTS ###
+
+import os, shutil, mmap, time
+
+from relais.dev import fileutils
+
+
+### CONSTANTS & DEFINES ###
+
+FILES = {
+	'a.txt': 'alpha\n',
+	'b.txt': 'beta beta\n',
+	'c.log': 'gamma gamma gamma\n',
+}
+
+
+### TESTS ###
+
+class test_hoover_dir (object):
+	outdir = 'test/out/test_hoover_dir'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		os.mkdir (os.path.join (self.outdir, 'subdir'))
+		for name, contents in FILES.items():
+			fileutils.string_to_file (contents,
+				os.path.join (self.outdir, name))
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_all (self):
+		assert (fileutils.hoover_dir (self.outdir) == FILES)
+		assert (fileutils.hoover_dir (self.outdir, threads=1) == FILES)
+
+	def test_select (self):
+		assert (fileutils.hoover_dir (self.outdir, ['a.txt']) ==
+			{'a.txt': 'alpha\n'})
+		found = fileutils.hoover_dir (self.outdir, lambda f: f.endswith ('.txt'))
+		assert (sorted (found.keys()) == ['a.txt', 'b.txt'])
+
+	def test_caps (self):
+		found = fileutils.hoover_dir (self.outdir, max_file_size=10)
+		assert (sorted (found.keys()) == ['a.txt', 'b.txt'])
+		found = fileutils.hoover_dir (self.outdir, ['a.txt', 'b.txt', 'c.log'],
+			max_total_size=20)
+		assert (sorted (found.keys()) == ['a.txt', 'b.txt'])
+
+	def test_mmap (self):
+		found = fileutils.hoover_dir (self.outdir, mode='rb', mmap_size=10)
+		assert (isinstance (found['c.log'], mmap.mmap))
+		assert (found['c.log'][:] == FILES['c.log'])
+		assert (found['a.txt'] == FILES['a.txt'])
+		# an empty file is read, not mapped
+		fileutils.string_to_file ('', os.path.join (self.outdir, 'empty'))
+		found = fileutils.hoover_dir (self.outdir, mode='rb', mmap_size=0)
+		assert (found['empty'] == '')
+		assert (isinstance (found['a.txt'], mmap.mmap))
+
+	def test_lazy (self):
+		files = fileutils.LazyDir (self.outdir, max_bytes=20)
+		assert (sorted (files.keys()) == sorted (FILES.keys()))
+		assert ('subdir' not in files)
+		assert (not files.cache)
+		assert (files['a.txt'] == FILES['a.txt'])
+		assert (files['b.txt'] == FILES['b.txt'])
+		assert (files.cache.keys() == ['a.txt', 'b.txt'])
+		# reading another pushes out the least recently used
+		assert (files['c.log'] == FILES['c.log'])
+		assert (files.cache.keys() == ['c.log'])
+		assert (dict (files.items()) == FILES)
+
+
+class test_file_cache (object):
+	outdir = 'test/out/test_file_cache'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		for name, contents in FILES.items():
+			fileutils.string_to_file (contents,
+				os.path.join (self.outdir, name))
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_hit (self):
+		cache = fileutils.FileCache()
+		path = os.path.join (self.outdir, 'a.txt')
+		assert (cache.get (path) == FILES['a.txt'])
+		assert (cache.get (path) == FILES['a.txt'])
+		stats = cache.stats()
+		assert ((stats['hits'], stats['misses']) == (1, 1))
+		assert (stats['bytes'] == len (FILES['a.txt']))
+		cache.clear()
+		assert (cache.stats()['entries'] == 0)
+
+	def test_changed (self):
+		cache = fileutils.FileCache()
+		path = os.path.join (self.outdir, 'a.txt')
+		assert (cache.get (path) == FILES['a.txt'])
+		fileutils.string_to_file ('alpha, changed\n', path)
+		assert (cache.get (path) == 'alpha, changed\n')
+		stats = cache.stats()
+		assert ((stats['hits'], stats['misses']) == (0, 2))
+		assert (stats['entries'] == 1)
+
+	def test_evict (self):
+		cache = fileutils.FileCache (max_bytes=20)
+		for name in ('a.txt', 'b.txt', 'a.txt', 'c.log'):
+			cache.get (os.path.join (self.outdir, name))
+		stats = cache.stats()
+		assert ((stats['hits'], stats['misses']) == (1, 3))
+		assert (stats['evictions'] == 2)
+		assert (stats['bytes'] == len (FILES['c.log']))
+
+	def get_missing (self, cache, path):
+		try:
+			cache.get (path)
+			assert False, "missing file should raise IOError"
+		except IOError, err:
+			assert (err.filename == path)
+
+	def test_missing (self):
+		path = os.path.join (self.outdir, 'none.txt')
+		cache = fileutils.FileCache()
+		self.get_missing (cache, path)
+		self.get_missing (cache, path)
+		assert (cache.stats()['misses'] == 2)
+		# a file that appears is read
+		fileutils.string_to_file ('new\n', path)
+		assert (cache.get (path) == 'new\n')
+
+	def test_negative (self):
+		path = os.path.join (self.outdir, 'none.txt')
+		cache = fileutils.FileCache (negative_ttl=0.2)
+		self.get_missing (cache, path)
+		# until it expires, a missing file isn't looked for again
+		fileutils.string_to_file ('new\n', path)
+		self.get_missing (cache, path)
+		stats = cache.stats()
+		assert ((stats['hits'], stats['misses']) == (1, 1))
+		time.sleep (0.25)
+		assert (cache.get (path) == 'new\n')
+		assert (not cache.missing)
+
+	def test_negative_bound (self):
+		cache = fileutils.FileCache (negative_ttl=60)
+		old_max = fileutils.MISSING_MAX
+		fileutils.MISSING_MAX = 2
+		try:
+			for name in ('x', 'y', 'z'):
+				self.get_missing (cache, os.path.join (self.outdir, name))
+		finally:
+			fileutils.MISSING_MAX = old_max
+		assert ([k[0] for k in cache.missing.keys()] ==
+			[os.path.abspath (os.path.join (self.outdir, n)) for n in 'yz'])
+
+	def test_shared (self):
+		path = os.path.join (self.outdir, 'b.txt')
+		assert (fileutils.cached_file_to_string (path) == FILES['b.txt'])
+		assert (fileutils.cached_file_to_string (path) == FILES['b.txt'])
+
+
+### END ########################################################################
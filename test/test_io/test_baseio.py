@@ -6,13 +6,21 @@ Tests for the relais.dev.io.baseio, using nose.
 
 ### IMPORTS ###
 
+import os, weakref
 from StringIO import StringIO
 
-from relais.dev.io import baseio
+from relais.dev.io import baseio, iostats, compression
+from relais.dev.io.readers import linereader
+from relais.dev.io.writers import recordwriter
 
 
 ### CONSTANTS & DEFINES ###
 
+class LineWriter (recordwriter.RecordWriter):
+	def format_record (self, rec):
+		return '%s\n' % rec
+
+
 ### TESTS ###
 
 class test_baseio_ctor (object):
@@ -42,4 +50,105 @@ class test_baseio_ctor (object):
 		assert (wrtr.fmt == 'txt')
 
 
+class test_baseio_compression (object):
+
+	def test_gzip_path (self):
+		src = 'test/in/lines.txt.gz'
+		rdr = baseio.BaseIO (src)
+		assert (rdr.fmt == 'txt')
+		assert (rdr.hndl.readline() == 'alpha\n')
+
+	def test_no_compression (self):
+		src = 'test/in/lines.txt.gz'
+		rdr = baseio.BaseIO (src, compression=None)
+		assert (rdr.hndl.read (2) == '\x1f\x8b')
+
+	def test_bz2_roundtrip (self):
+		dst = 'test/out/dummy.txt.bz2'
+		wrtr = baseio.BaseIO (dst, 'w')
+		assert (wrtr.fmt == 'txt')
+		wrtr.hndl.write ('foo\n')
+		wrtr.hndl.close()
+		rdr = baseio.BaseIO (dst)
+		assert (rdr.hndl.read() == 'foo\n')
+		rdr.hndl.close()
+		os.remove (dst)
+
+	def test_stream (self):
+		# concatenated streams, read without seeking
+		data = open ('test/in/lines.txt.gz', 'rb').read()
+		hndl = compression.DecompressingHandle (StringIO (data * 2), 'gz')
+		lines = list (hndl)
+		assert (len (lines) == 9)
+		assert (lines[4] == 'epsilonalpha\n')
+
+
+
+class test_baseio_stats (object):
+
+	def setUp (self):
+		iostats.clear_registry()
+
+	def tearDown (self):
+		iostats.enable (False)
+		iostats.clear_registry()
+
+	def test_disabled (self):
+		rdr = linereader.LineReader ('test/in/lines.txt')
+		assert (rdr.stats() is None)
+		assert ('read' not in rdr.__dict__)
+
+	def test_reader (self):
+		iostats.enable()
+		rdr = linereader.LineReader ('test/in/lines.txt')
+		rdr.read()
+		rdr.read_batch (10)
+		stats = rdr.stats()
+		assert (stats['calls'] == 2)
+		assert (stats['records'] == 5)
+		assert (stats['bytes'] == 30)
+		assert (stats['first_record_time'] is not None)
+		assert (0 <= stats['read_time'])
+		assert (iostats.get_registry() == [stats])
+
+	def test_write_iter (self):
+		# records written by write_iter are counted through the nested writes
+		iostats.enable()
+		wrtr = LineWriter (StringIO(), fmt='txt')
+		wrtr.write_iter (['foo', 'bar', 'baz'])
+		wrtr.write ('qux')
+		stats = wrtr.stats()
+		assert (stats['calls'] == 2)
+		assert (stats['records'] == 4)
+		assert (stats['first_record_time'] is not None)
+		assert (0 <= stats['write_time'])
+
+	def test_finished (self):
+		# the registry keeps the final statistics, but not the reader
+		iostats.enable()
+		rdr = linereader.LineReader ('test/in/lines.txt')
+		list (rdr)
+		ref = weakref.ref (rdr)
+		del rdr
+		assert (ref() is None)
+		stats = iostats.get_registry()
+		assert (len (stats) == 1)
+		assert (stats[0]['records'] == 5)
+		assert (stats[0]['bytes'] == 30)
+		wrtr = LineWriter (StringIO(), fmt='txt')
+		wrtr.write ('foo')
+		del wrtr
+		assert ([s['records'] for s in iostats.get_registry()] == [5, 1])
+
+	def test_dump (self):
+		rdr = linereader.LineReader ('test/in/lines.txt')
+		rdr.collect_stats()
+		list (rdr)
+		out = StringIO()
+		iostats.dump_stats (out)
+		lines = out.getvalue().splitlines()
+		assert (len (lines) == 2)
+		assert (lines[1].startswith ('LineReader (test/in/lines.txt)\t5\t5\t'))
+
+
 ### END ########################################################################
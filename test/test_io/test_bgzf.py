@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.bgzf, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil, gzip, random
+
+from relais.dev.io import bgzf, compression
+
+
+### CONSTANTS & DEFINES ###
+
+RAND = random.Random (1)
+# enough text for several blocks, with some incompressible runs
+TEXT = ''.join (['%s\t%s\n' % (i, RAND.random()) for i in range (20000)]) + \
+	''.join ([chr (RAND.randint (0, 255)) for i in range (70000)])
+
+
+### TESTS ###
+
+class test_bgzf (object):
+	outdir = 'test/out/test_bgzf'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.path = os.path.join (self.outdir, 'text.bgz')
+		hndl = bgzf.BgzfFile (self.path, 'wb', threads=2)
+		# write in uneven pieces
+		for i in range (0, len (TEXT), 7777):
+			hndl.write (TEXT[i:i + 7777])
+		hndl.close()
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_virtual_offsets (self):
+		voffset = bgzf.make_virtual_offset (123456, 789)
+		assert (bgzf.split_virtual_offset (voffset) == (123456, 789))
+
+	def test_gzip (self):
+		# the output is plain multi-member gzip
+		assert (gzip.open (self.path).read() == TEXT)
+		assert (compression.sniff_compression (self.path) == 'bgzf')
+
+	def test_read (self):
+		hndl = bgzf.BgzfFile (self.path)
+		assert (hndl.read (10) == TEXT[:10])
+		assert (hndl.readline() == TEXT[10:TEXT.index ('\n') + 1])
+		hndl = compression.open_compressed (self.path)
+		lines = list (hndl)
+		assert (''.join (lines) == TEXT)
+		assert (len (lines) == TEXT.count ('\n') + 1)
+
+	def test_seek (self):
+		blocks = bgzf.load_gzi (self.path + bgzf.GZI_EXT)
+		assert (len (blocks) > 4)
+		hndl = bgzf.BgzfFile (self.path)
+		for offset in [0, 1, 65279, 65280, 200000, len (TEXT) - 5, len (TEXT)]:
+			hndl.seek (offset)
+			assert (hndl.tell() == offset)
+			assert (hndl.read (100) == TEXT[offset:offset + 100])
+
+	def test_build_index (self):
+		blocks = bgzf.load_gzi (self.path + bgzf.GZI_EXT)
+		os.remove (self.path + bgzf.GZI_EXT)
+		hndl = bgzf.BgzfFile (self.path)
+		assert (hndl.get_index() == blocks)
+		assert (os.path.exists (self.path + bgzf.GZI_EXT))
+
+	def test_seek_virtual (self):
+		hndl = bgzf.BgzfFile (self.path)
+		hndl.seek (100000)
+		voffset = hndl.tell_virtual()
+		hndl.seek (0)
+		hndl.seek_virtual (voffset)
+		assert (hndl.tell() == 100000)
+		assert (hndl.read (10) == TEXT[100000:100010])
+
+
+### END ########################################################################
@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.extsort, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil, random
+
+from relais.dev.io import extsort
+from relais.dev.io.readers.picklereader import PickleReader
+from relais.dev.io.writers.picklewriter import PickleWriter
+
+
+### CONSTANTS & DEFINES ###
+
+RAND = random.Random (1)
+RECS = [(RAND.randint (0, 20), i) for i in range (200)]
+
+
+def first (rec):
+	# a picklable key, for sorting in other processes
+	return rec[0]
+
+
+### TESTS ###
+
+class test_extsort (object):
+	outdir = 'test/out/test_extsort'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_in_memory (self):
+		assert (list (extsort.iter_sorted (RECS)) == sorted (RECS))
+
+	def test_runs (self):
+		recs = extsort.iter_sorted (RECS, key=first, run_size=30,
+			scratch_dir=self.outdir)
+		assert (list (recs) == sorted (RECS, key=first))
+		assert (len (os.listdir (self.outdir)) == 7)
+
+	def test_run_bytes (self):
+		# big records make for short runs, whatever the number allowed
+		recs = [(k, i, 'x' * 100) for k, i in RECS]
+		sorted_recs = extsort.iter_sorted (recs, key=first, run_size=None,
+			run_bytes=1100, scratch_dir=self.outdir)
+		assert (list (sorted_recs) == sorted (recs, key=first))
+		assert (len (os.listdir (self.outdir)) == 20)
+
+	def test_reverse (self):
+		recs = extsort.iter_sorted (RECS, key=first, reverse=True,
+			run_size=30)
+		assert (list (recs) ==
+			sorted (RECS, key=first, reverse=True))
+
+	def test_parallel (self):
+		recs = extsort.iter_sorted (RECS, key=first, run_size=30,
+			processes=2)
+		assert (list (recs) == sorted (RECS, key=first))
+
+	def test_sort_records (self):
+		path = os.path.join (self.outdir, 'recs.pickle')
+		wrtr = PickleWriter (path)
+		wrtr.write_iter (RECS)
+		wrtr.close()
+		sorted_path = os.path.join (self.outdir, 'sorted.pickle')
+		wrtr = PickleWriter (sorted_path)
+		extsort.sort_records (PickleReader (path), wrtr, run_size=50)
+		wrtr.close()
+		assert (list (PickleReader (sorted_path)) == sorted (RECS))
+
+
+### END ########################################################################
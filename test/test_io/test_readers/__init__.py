@@ -0,0 +1,13 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for relais.dev.io.readers, using nose.
+"""
+
+### IMPORTS ###
+
+### CONSTANTS & DEFINES ###
+
+### TESTS ###
+
+### END ########################################################################
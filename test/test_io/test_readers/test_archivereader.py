@@ -0,0 +1,100 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.archivereader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil, tarfile, zipfile
+
+from relais.dev.io.readers import archivereader
+from relais.dev.io.readers.fastareader import FastaReader
+from relais.dev.io.readers.linereader import LineReader
+
+
+### CONSTANTS & DEFINES ###
+
+MEMBERS = [
+	('test/in/lines.txt', 'data/lines.txt'),
+	('test/in/lines.txt.gz', 'data/lines.txt.gz'),
+	('test/in/seqs.fasta', 'data/seqs.fasta'),
+]
+LINES = ['alpha\n', 'beta\n', 'gamma\n', 'delta\n', 'epsilon']
+NAMES = [m[1] for m in MEMBERS]
+
+
+def count_lines (rdr):
+	return len (list (rdr))
+
+
+### TESTS ###
+
+class test_archivereader (object):
+	outdir = 'test/out/test_archivereader'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.zip_path = os.path.join (self.outdir, 'bundle.zip')
+		arch = zipfile.ZipFile (self.zip_path, 'w', zipfile.ZIP_DEFLATED)
+		for src, name in MEMBERS:
+			arch.write (src, name)
+		arch.close()
+		self.tar_path = os.path.join (self.outdir, 'bundle.tar.gz')
+		arch = tarfile.open (self.tar_path, 'w:gz')
+		# a directory member, which should be skipped
+		info = tarfile.TarInfo ('data')
+		info.type = tarfile.DIRTYPE
+		arch.addfile (info)
+		for src, name in MEMBERS:
+			arch.add (src, name)
+		arch.close()
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_list (self):
+		for path in (self.zip_path, self.tar_path):
+			assert (archivereader.list_members (path) == NAMES)
+			assert (archivereader.list_members (path, '*.txt*') == NAMES[:2])
+
+	def test_iter (self):
+		for path in (self.zip_path, self.tar_path):
+			names = []
+			for name, hndl in archivereader.iter_members (path):
+				names.append (name)
+				if (name == 'data/seqs.fasta'):
+					rdr = FastaReader (hndl)
+					assert (len (list (rdr)) == 4)
+				else:
+					# the compressed member is decompressed as it is read
+					rdr = LineReader (hndl)
+					assert (list (rdr) == LINES)
+			assert (names == NAMES)
+
+	def test_batches (self):
+		for path in (self.zip_path, self.tar_path):
+			for name, hndl in archivereader.iter_members (path, '*.txt*'):
+				rdr = LineReader (hndl, sizehint=8)
+				assert (list (rdr.iter_batches (2)) ==
+					[LINES[:2], LINES[2:4], LINES[4:]])
+			hndl = archivereader.open_member (path, 'data/lines.txt')
+			assert (hndl.readlines (8) == LINES[:2])
+			assert (hndl.readlines() == LINES[2:])
+			hndl.close()
+
+	def test_open (self):
+		for path in (self.zip_path, self.tar_path):
+			hndl = archivereader.open_member (path, 'data/lines.txt.gz')
+			assert (hndl.read() == ''.join (LINES))
+			hndl.close()
+			assert (hndl.closed)
+
+	def test_map (self):
+		for path in (self.zip_path, self.tar_path):
+			counts = archivereader.map_members (path, count_lines,
+				pattern='*.txt*', processes=2)
+			assert (list (counts) == [5, 5])
+
+
+### END ########################################################################
@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.bgzfreader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+
+from relais.dev.io.readers.bgzfreader import BgzfReader
+from relais.dev.io.writers.recordwriter import RecordWriter
+
+
+### CONSTANTS & DEFINES ###
+
+LINES = ['line %s\n' % i for i in range (30000)]
+
+
+class LineWriter (RecordWriter):
+	def format_record (self, rec):
+		return rec
+
+
+### TESTS ###
+
+class test_bgzfreader (object):
+	outdir = 'test/out/test_bgzfreader'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.path = os.path.join (self.outdir, 'lines.txt.bgz')
+		wrtr = LineWriter (self.path)
+		wrtr.write_iter (LINES)
+		wrtr.close()
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_read (self):
+		rdr = BgzfReader (self.path)
+		assert (rdr.fmt == 'txt')
+		assert (list (rdr) == LINES)
+
+	def test_seek (self):
+		rdr = BgzfReader (self.path)
+		offsets = []
+		while (not rdr.at_end()):
+			offsets.append (rdr.tell())
+			rdr.read()
+		for i in [29999, 0, 12345, 20000]:
+			rdr.seek (offsets[i])
+			assert (rdr.read() == LINES[i])
+		rdr.seek_offset (len (''.join (LINES[:777])))
+		assert (rdr.read() == LINES[777])
+
+
+### END ########################################################################
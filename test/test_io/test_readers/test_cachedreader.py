@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.cachedreader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+
+from relais.dev.io.readers.cachedreader import CachedReader
+from relais.dev.io.readers.linereader import LineReader
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/lines.txt'
+LINES = ['alpha\n', 'beta\n', 'gamma\n', 'delta\n', 'epsilon']
+
+
+### TESTS ###
+
+class test_cachedreader (object):
+	outdir = 'test/out/test_cachedreader'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.src = os.path.join (self.outdir, 'lines.txt')
+		shutil.copy (SRC, self.src)
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_cache (self):
+		rdr = CachedReader (self.src, LineReader)
+		assert (not rdr.from_cache)
+		assert (list (rdr) == LINES)
+		rdr.close()
+		assert (os.path.exists (rdr.cache_path))
+		rdr = CachedReader (self.src, LineReader)
+		assert (rdr.from_cache)
+		assert (rdr.read_batch (2) == LINES[:2])
+		assert (list (rdr) == LINES[2:])
+		rdr.close()
+
+	def test_frames (self):
+		# batches and single reads cross the frames of the cache
+		rdr = CachedReader (self.src, LineReader, frame_size=2)
+		assert (rdr.read_batch (3) == LINES[:3])
+		assert (list (rdr) == LINES[3:])
+		rdr.close()
+		rdr = CachedReader (self.src, LineReader, frame_size=2)
+		assert (rdr.from_cache)
+		assert (rdr.read() == LINES[0])
+		assert (list (rdr.iter_batches (3)) == [LINES[1:4], LINES[4:]])
+		assert (rdr.at_end())
+		rdr.close()
+
+	def test_invalidate (self):
+		rdr = CachedReader (self.src, LineReader)
+		list (rdr)
+		rdr.close()
+		# a changed file or reader arguments make for a new cache
+		hndl = open (self.src, 'a')
+		hndl.write ('\nzeta')
+		hndl.close()
+		rdr = CachedReader (self.src, LineReader)
+		assert (not rdr.from_cache)
+		assert (list (rdr) == LINES[:-1] + ['epsilon\n', 'zeta'])
+		rdr.close()
+		rdr = CachedReader (self.src, LineReader, reader_args={'sizehint': 10})
+		assert (not rdr.from_cache)
+		rdr.close()
+
+	def test_partial (self):
+		rdr = CachedReader (self.src, LineReader)
+		rdr.read()
+		rdr.close()
+		assert (os.listdir (self.outdir) == ['lines.txt'])
+
+
+### END ########################################################################
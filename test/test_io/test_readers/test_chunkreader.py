@@ -0,0 +1,61 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.chunkreader, using nose.
+"""
+
+### IMPORTS ###
+
+import re
+from StringIO import StringIO
+
+from relais.dev.io.readers.chunkreader import ChunkReader
+
+
+### CONSTANTS & DEFINES ###
+
+GENBANK = 'LOCUS a\nORIGIN\n//\nLOCUS bb\nORIGIN\n//\n'
+STANZAS = '\nfirst\nstanza\n\n\nsecond\n  \nthird'
+FASTA = '>a\nACGT\n>b x\nGG\nTT\n>c\n'
+
+
+def read_all (text, delim, **kwargs):
+	# read every record, with every block size up to the whole text
+	results = []
+	for size in range (1, len (text) + 2):
+		rdr = ChunkReader (StringIO (text), delim, block_size=size, **kwargs)
+		results.append (list (rdr))
+	for r in results[1:]:
+		assert (r == results[0]), "%s != %s" % (r, results[0])
+	return results[0]
+
+
+### TESTS ###
+
+class test_chunkreader (object):
+
+	def test_keep_end (self):
+		assert (read_all (GENBANK, '//\n', keep='end') ==
+			['LOCUS a\nORIGIN\n//\n', 'LOCUS bb\nORIGIN\n//\n'])
+
+	def test_keep_none (self):
+		assert (read_all (STANZAS, '\n\n') ==
+			['\nfirst\nstanza', '\nsecond\n  \nthird'])
+
+	def test_regex (self):
+		assert (read_all (STANZAS, re.compile (r'\n\s*\n'), overlap=8) ==
+			['\nfirst\nstanza', 'second', 'third'])
+
+	def test_keep_start (self):
+		assert (read_all (FASTA, re.compile ('^>', re.M), keep='start') ==
+			['>a\nACGT\n', '>b x\nGG\nTT\n', '>c\n'])
+		assert (read_all (FASTA, '>', keep='start') ==
+			['>a\nACGT\n', '>b x\nGG\nTT\n', '>c\n'])
+
+	def test_empty (self):
+		rdr = ChunkReader (StringIO (''), '//\n')
+		assert (rdr.at_end())
+		assert (list (ChunkReader (StringIO ('\n//\n'), '//\n')) == [])
+
+
+### END ########################################################################
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.delimreader, using nose.
+"""
+
+### IMPORTS ###
+
+import math
+from array import array
+
+from relais.dev.io.readers.delimreader import DelimReader, sniff_types, \
+	make_column
+
+
+### CONSTANTS & DEFINES ###
+
+TSV = 'test/in/table.tsv'
+CSV = 'test/in/table.csv'
+
+
+### TESTS ###
+
+class test_delimreader (object):
+
+	def test_sniff (self):
+		assert (sniff_types ([['1', '2.5', 'a'], ['3', '4', '']]) ==
+			[int, float, str])
+		# missing values are ignored
+		assert (sniff_types ([['1', '', 'NA'], ['NA', '4', '']], ['', 'NA']) ==
+			[int, int, str])
+
+	def test_make_column (self):
+		col = make_column (['1', 'NA', '3'], int, na_values=['NA'])
+		assert (col.typecode == 'd')
+		assert (math.isnan (col[1]))
+		assert (list (col[::2]) == [1.0, 3.0])
+		assert (make_column (['a', 'NA'], str, na_values=['NA']) == ['a', None])
+		try:
+			make_column (['1', 'x'], int, na_values=['NA'])
+			assert False, "should have raised"
+		except ValueError:
+			pass
+
+	def test_columns (self):
+		# the blank line counts towards the sample and batch sizes
+		rdr = DelimReader (TSV, sample_size=4, use_numpy=False)
+		assert (rdr.names == ['name', 'count', 'score'])
+		assert (rdr.types == [str, int, float])
+		names, counts, scores = rdr.read_columns (4)
+		assert (names == ['alpha', 'beta', 'gamma'])
+		assert (counts == array ('l', [1, 2, 3]))
+		assert (scores == array ('d', [0.5, 1.0, -2.25]))
+		# a missing value makes an int column float, not str
+		names, counts, scores = rdr.read_columns (3)
+		assert (counts.typecode == 'd')
+		assert (math.isnan (counts[0]))
+		assert (rdr.types == [str, float, float])
+		assert (rdr.at_end())
+		assert (rdr.read_columns (3) == [])
+
+	def test_read (self):
+		rdr = DelimReader (TSV, use_numpy=False)
+		assert (rdr.types == [str, int, float])
+		assert (rdr.read() == ['alpha', 1, 0.5])
+		rows = list (rdr)
+		assert (len (rows) == 3)
+		assert (math.isnan (rows[-1][1]))
+
+	def test_csv (self):
+		rdr = DelimReader (CSV, use_numpy=False)
+		assert (list (rdr.iter_columns (1)) == [
+			[array ('l', [1]), ['a, quoted'], array ('d', [2.5])],
+			[array ('l', [2]), ['plain'], array ('d', [3.0])],
+		])
+
+	def test_types (self):
+		rdr = DelimReader (CSV, types=[str, str, str], use_numpy=False)
+		assert (rdr.read() == ['1', 'a, quoted', '2.5'])
+
+
+### END ########################################################################
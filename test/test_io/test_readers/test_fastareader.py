@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.fastareader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil, gzip
+
+from relais.dev.io.readers.fastareader import FastaReader
+from relais.dev.io.fasta import FastaRecord, FaiIndex
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/seqs.fasta'
+RECS = [
+	FastaRecord ('seq1', 'ACGTACGTACGTACGTACGTACG', 'first sequence'),
+	FastaRecord ('seq2', 'TTTTTGGGGGCC'),
+	FastaRecord ('empty', ''),
+	FastaRecord ('seq3', 'AAAAA', 'last one'),
+]
+FAI = 'seq1\t23\t21\t10\t11\nseq2\t12\t53\t10\t11\nempty\t0\t74\t0\t0\n' \
+	'seq3\t5\t89\t5\t6\n'
+
+
+### TESTS ###
+
+class test_fastareader (object):
+	outdir = 'test/out/test_fastareader'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.src = os.path.join (self.outdir, 'seqs.fasta')
+		shutil.copy (SRC, self.src)
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_read (self):
+		assert (list (FastaReader (SRC)) == RECS)
+
+	def test_small_blocks (self):
+		# records and titles straddle the block boundaries
+		for size in range (1, 12):
+			assert (list (FastaReader (SRC, block_size=size)) == RECS)
+
+	def test_compressed (self):
+		hndl = gzip.open (self.src + '.gz', 'wb')
+		hndl.write (open (SRC).read())
+		hndl.close()
+		assert (list (FastaReader (self.src + '.gz')) == RECS)
+
+	def test_index (self):
+		rdr = FastaReader (self.src)
+		idx = rdr.get_index()
+		assert (idx.names() == ['seq1', 'seq2', 'empty', 'seq3'])
+		assert (open (self.src + '.fai').read() == FAI)
+		assert (FaiIndex.load (self.src + '.fai')['seq2'].offset == 53)
+
+	def test_fetch (self):
+		rdr = FastaReader (self.src)
+		assert (rdr.read() == RECS[0])
+		seq1 = RECS[0].seq
+		for start, end in [(0, None), (3, 17), (9, 11), (10, 20), (22, 23),
+				(5, 5)]:
+			assert (rdr.fetch ('seq1', start, end) == seq1[start:end])
+		assert (rdr.fetch ('seq3') == 'AAAAA')
+		assert (rdr.fetch ('empty') == '')
+		# reading carries on where it was
+		assert (list (rdr) == RECS[1:])
+
+
+### END ########################################################################
@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.linereader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+
+from relais.dev.io.readers import linereader, lineindex
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/lines.txt'
+LINES = ['alpha\n', 'beta\n', 'gamma\n', 'delta\n', 'epsilon']
+
+
+### TESTS ###
+
+class test_linereader (object):
+
+	def test_read (self):
+		rdr = linereader.LineReader (SRC)
+		lines = []
+		while (not rdr.at_end()):
+			lines.append (rdr.read())
+		assert (lines == LINES)
+
+	def test_iter (self):
+		rdr = linereader.LineReader (SRC)
+		assert (list (rdr) == LINES)
+
+	def test_read_batch (self):
+		# a tiny sizehint forces several bulk reads per batch
+		rdr = linereader.LineReader (SRC, sizehint=1)
+		assert (rdr.read_batch (2) == LINES[:2])
+		assert (rdr.read() == LINES[2])
+		assert (rdr.read_batch (5) == LINES[3:])
+		assert (rdr.at_end())
+		assert (rdr.read_batch (5) == [])
+
+	def test_read_batch_surplus (self):
+		rdr = linereader.LineReader (SRC)
+		assert (rdr.read_batch (1) == LINES[:1])
+		assert (rdr.read() == LINES[1])
+		assert (rdr.read_batch (2) == LINES[2:4])
+		assert (list (rdr) == LINES[4:])
+
+	def test_iter_batches (self):
+		rdr = linereader.LineReader (SRC)
+		batches = list (rdr.iter_batches (2))
+		assert (batches == [LINES[:2], LINES[2:4], LINES[4:]])
+
+
+class test_linereader_index (object):
+	src = 'test/out/lines.txt'
+	index_path = 'test/out/lines.txt.lidx'
+
+	def setUp (self):
+		shutil.copyfile (SRC, self.src)
+
+	def tearDown (self):
+		for p in (self.src, self.index_path):
+			if (os.path.exists (p)):
+				os.remove (p)
+
+	def test_index (self):
+		idx = lineindex.LineIndex (self.src)
+		assert (len (idx) == len (LINES))
+		assert (idx.span (1, 3) == (6, 17))
+		assert (idx.offset (len (LINES)) == len (''.join (LINES)))
+		assert (idx.is_current())
+		# a changed file invalidates the index
+		hndl = open (self.src, 'a')
+		hndl.write ('\n')
+		hndl.close()
+		assert (not idx.is_current())
+		idx = lineindex.LineIndex (self.src)
+		assert (len (idx) == len (LINES))
+		assert (idx.offset (len (LINES)) == len (''.join (LINES)) + 1)
+
+	def test_empty (self):
+		open (self.src, 'w').close()
+		idx = lineindex.LineIndex (self.src)
+		assert (len (idx) == 0)
+		assert (idx.offset (0) == 0)
+
+	def test_seek_record (self):
+		rdr = linereader.LineReader (self.src)
+		rdr.seek_record (3)
+		assert (rdr.read() == LINES[3])
+		rdr.seek_record (1)
+		assert (rdr.read_batch (2) == LINES[1:3])
+		assert (os.path.exists (self.index_path))
+
+	def test_read_range (self):
+		rdr = linereader.LineReader (self.src)
+		assert (rdr.read_range (1, 3) == ''.join (LINES[1:3]))
+		assert (rdr.read() == LINES[3])
+
+
+class test_mmaplinereader (object):
+
+	def test_read (self):
+		rdr = linereader.MmapLineReader (SRC)
+		assert (len (rdr) == len (LINES))
+		lines = []
+		while (not rdr.at_end()):
+			lines.append (rdr.read())
+		assert (lines == LINES)
+
+	def test_buffer (self):
+		rdr = linereader.MmapLineReader (SRC, as_buffer=True)
+		line = rdr.read()
+		assert (isinstance (line, buffer))
+		assert (str (line) == LINES[0])
+
+	def test_read_range (self):
+		rdr = linereader.MmapLineReader (SRC, as_buffer=True)
+		assert (str (rdr.read_range (1, 3)) == ''.join (LINES[1:3]))
+		assert (str (rdr.read_range (2, 2)) == '')
+
+	def test_iter_batches (self):
+		rdr = linereader.MmapLineReader (SRC)
+		batches = list (rdr.iter_batches (3))
+		assert (batches == [LINES[:3], LINES[3:]])
+
+	def test_seek_record (self):
+		rdr = linereader.MmapLineReader (SRC)
+		rdr.seek_record (3)
+		assert (rdr.read() == LINES[3])
+		assert (rdr.read() == LINES[4])
+		assert (rdr.at_end())
+
+
+### END ########################################################################
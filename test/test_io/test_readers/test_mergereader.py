@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.mergereader, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+from operator import itemgetter
+
+from relais.dev.io import iostats
+from relais.dev.io.readers.recordreader import RecordReader
+from relais.dev.io.readers.mergereader import MergeReader
+from relais.dev.io.readers.picklereader import PickleReader
+from relais.dev.io.writers.picklewriter import PickleWriter
+
+
+### CONSTANTS & DEFINES ###
+
+SRCS = [
+	[(1, 'a'), (4, 'a'), (7, 'a')],
+	[(2, 'b'), (4, 'b'), (9, 'b')],
+	[],
+	[(0, 'd'), (4, 'd')],
+]
+
+
+### TESTS ###
+
+class test_mergereader (object):
+	outdir = 'test/out/test_mergereader'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_merge (self):
+		rdr = MergeReader (SRCS, key=itemgetter (0))
+		merged = sorted (sum (SRCS, []), key=itemgetter (0))
+		assert (list (rdr) == merged)
+		assert (rdr.at_end())
+		assert (isinstance (rdr, RecordReader))
+
+	def test_unique (self):
+		rdr = MergeReader (SRCS, key=itemgetter (0), unique=True)
+		# the first source wins ties
+		assert ([r[1] for r in rdr] == ['d', 'a', 'b', 'a', 'a', 'b'])
+
+	def test_reverse (self):
+		srcs = [list (reversed (s)) for s in SRCS]
+		rdr = MergeReader (srcs, key=itemgetter (0), reverse=True)
+		assert ([r[0] for r in rdr] == [9, 7, 4, 4, 4, 2, 1, 0])
+
+	def test_read_batch (self):
+		rdr = MergeReader (SRCS)
+		assert (rdr.read_batch (3) == [(0, 'd'), (1, 'a'), (2, 'b')])
+		assert (rdr.read() == (4, 'a'))
+		assert (len (list (rdr.iter_batches (2))) == 2)
+		assert (rdr.read_batch (3) == [])
+
+	def test_paths (self):
+		paths = []
+		for i, s in enumerate (SRCS):
+			path = os.path.join (self.outdir, '%d.pickle' % i)
+			wrtr = PickleWriter (path)
+			wrtr.write_iter (s)
+			wrtr.close()
+			paths.append (path)
+		rdr = MergeReader (paths, reader_cls=PickleReader)
+		assert (list (rdr) == sorted (sum (SRCS, [])))
+		rdr.close()
+		assert (all ([r.hndl.closed for r in rdr.opened]))
+
+	def test_stats (self):
+		rdr = MergeReader (SRCS)
+		rdr.collect_stats()
+		rdr.read_batch (3)
+		rdr.read()
+		stats = rdr.stats()
+		assert (stats['calls'] == 2)
+		assert (stats['records'] == 4)
+		assert (stats['bytes'] is None)
+		rdr.close()
+		iostats.clear_registry()
+
+
+### END ########################################################################
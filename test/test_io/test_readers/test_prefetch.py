@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.prefetch, using nose.
+"""
+
+### IMPORTS ###
+
+from StringIO import StringIO
+
+from relais.dev.io.readers import prefetch, linereader, singlereader
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/lines.txt'
+LINES = ['alpha\n', 'beta\n', 'gamma\n', 'delta\n', 'epsilon']
+TEXT = ''.join (LINES)
+
+
+### TESTS ###
+
+class test_prefetchhandle (object):
+
+	def test_read (self):
+		for block_size in (1, 3, 100):
+			hndl = prefetch.PrefetchHandle (StringIO (TEXT), block_size)
+			assert (hndl.read (4) == TEXT[:4])
+			assert (hndl.read() == TEXT[4:])
+			assert (hndl.read() == '')
+
+	def test_readline (self):
+		for block_size in (1, 3, 100):
+			hndl = prefetch.PrefetchHandle (StringIO (TEXT), block_size, 3)
+			assert (list (hndl) == LINES)
+
+	def test_readlines (self):
+		for block_size in (1, 3, 100):
+			hndl = prefetch.PrefetchHandle (StringIO (TEXT), block_size)
+			lines = hndl.readlines (8)
+			assert (lines == LINES[:len (lines)])
+			assert (lines + hndl.readlines() == LINES)
+
+	def test_close (self):
+		src = StringIO (TEXT)
+		hndl = prefetch.PrefetchHandle (src, 1)
+		hndl.readline()
+		hndl.close()
+		assert (src.closed)
+		assert (not hndl.thread.isAlive())
+
+	def test_readers (self):
+		hndl = prefetch.open_prefetched (SRC, block_size=4)
+		rdr = linereader.LineReader (hndl)
+		assert (rdr.fmt == 'txt')
+		assert (rdr.read_batch (10) == LINES)
+		hndl = prefetch.open_prefetched (SRC, block_size=4)
+		rdr = singlereader.SingleReader (hndl)
+		assert (rdr.read() == TEXT)
+
+
+### END ########################################################################
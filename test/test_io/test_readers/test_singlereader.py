@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.singlereader, using nose.
+"""
+
+### IMPORTS ###
+
+from StringIO import StringIO
+
+from relais.dev.io.readers import singlereader
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/lines.txt'
+TEXT = open (SRC, 'rb').read()
+
+
+### TESTS ###
+
+class test_singlereader (object):
+
+	def test_read (self):
+		rdr = singlereader.SingleReader (SRC)
+		assert (rdr.read() == TEXT)
+
+	def test_read_into (self):
+		rdr = singlereader.SingleReader (SRC, mode='rb')
+		buf = bytearray (10)
+		assert (rdr.read_into (buf) == 10)
+		assert (buf == TEXT[:10])
+		buf = bytearray (100)
+		assert (rdr.read_into (buf) == len (TEXT) - 10)
+		assert (buf[:len (TEXT) - 10] == TEXT[10:])
+
+	def test_read_into_buffer (self):
+		rdr = singlereader.SingleReader (StringIO (TEXT), fmt='txt')
+		buf = bytearray (100)
+		assert (rdr.read_into (memoryview (buf)[5:]) == len (TEXT))
+		assert (buf[5:5 + len (TEXT)] == TEXT)
+
+	def test_read_bytearray (self):
+		rdr = singlereader.SingleReader (SRC, mode='rb')
+		buf = rdr.read_bytearray()
+		assert (isinstance (buf, bytearray))
+		assert (buf == TEXT)
+		rdr = singlereader.SingleReader (StringIO (TEXT), fmt='txt')
+		assert (rdr.read_bytearray() == TEXT)
+
+	def test_gzip (self):
+		rdr = singlereader.SingleReader ('test/in/lines.txt.gz')
+		assert (rdr.read_bytearray() == TEXT)
+
+
+class test_mmapsinglereader (object):
+
+	def test_read (self):
+		rdr = singlereader.MmapSingleReader (SRC)
+		assert (rdr.fmt == 'txt')
+		data = rdr.read()
+		assert (data[:] == TEXT)
+		assert (data.find ('gamma') == TEXT.find ('gamma'))
+
+
+### END ########################################################################
@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.readers.splitreader, using nose.
+"""
+
+### IMPORTS ###
+
+from relais.dev.io.readers import splitreader
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/lines.txt'
+LINES = ['alpha\n', 'beta\n', 'gamma\n', 'delta\n', 'epsilon']
+TEXT = ''.join (LINES)
+
+def read_all (rdr):
+	return list (rdr)
+
+
+### TESTS ###
+
+class test_split_ranges (object):
+
+	def check_ranges (self, ranges, delim='\n', split_at=1):
+		assert (ranges[0][0] == 0)
+		assert (ranges[-1][1] == len (TEXT))
+		for i in range (1, len (ranges)):
+			assert (ranges[i - 1][1] == ranges[i][0])
+			bound = ranges[i][0]
+			assert (TEXT[bound - split_at:].startswith (delim))
+
+	def test_newlines (self):
+		for count in range (1, 12):
+			ranges = splitreader.split_ranges (SRC, count)
+			assert (len (ranges) <= min (count, len (LINES)))
+			self.check_ranges (ranges)
+
+	def test_delim (self):
+		for count in range (1, 12):
+			ranges = splitreader.split_ranges (SRC, count, '\nd', 1)
+			assert (len (ranges) <= 2)
+			self.check_ranges (ranges, '\nd', 1)
+
+
+class test_rangehandle (object):
+
+	def test_read (self):
+		hndl = splitreader.RangeHandle (SRC, 6, 17)
+		assert (hndl.read() == TEXT[6:17])
+		assert (hndl.read() == '')
+
+	def test_lines (self):
+		hndl = splitreader.RangeHandle (SRC, 6, 17)
+		assert (list (hndl) == LINES[1:3])
+		hndl = splitreader.RangeHandle (SRC, 6, 17)
+		assert (hndl.readlines (1) == LINES[1:2])
+		assert (hndl.readlines() == LINES[2:3])
+		hndl = splitreader.RangeHandle (SRC, 17, len (TEXT))
+		assert (hndl.readlines() == LINES[3:])
+
+
+class test_map_ranges (object):
+
+	def test_ordered (self):
+		results = splitreader.map_ranges (SRC, read_all, processes=2,
+			count=3)
+		assert (sum (results, []) == LINES)
+
+	def test_unordered (self):
+		results = splitreader.map_ranges (SRC, read_all, processes=2,
+			ordered=False)
+		assert (sorted (sum (results, [])) == sorted (LINES))
+
+
+### END ########################################################################
@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.writers.fastawriter, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+from StringIO import StringIO
+
+from relais.dev.io.writers.fastawriter import FastaWriter
+from relais.dev.io.readers.fastareader import FastaReader
+from relais.dev.io.fasta import FastaRecord, FaiIndex
+
+
+### CONSTANTS & DEFINES ###
+
+SRC = 'test/in/seqs.fasta'
+
+
+### TESTS ###
+
+class test_fastawriter (object):
+	outdir = 'test/out/test_fastawriter'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_write (self):
+		path = os.path.join (self.outdir, 'seqs.fasta')
+		wrtr = FastaWriter (path, width=10, index=True)
+		wrtr.write_iter (FastaReader (SRC))
+		wrtr.close()
+		assert (open (path).read() == open (SRC).read())
+		# the index made while writing matches one made from the file
+		assert (open (path + '.fai').read() ==
+			''.join (['%s\t%s\t%s\t%s\t%s\n' % (e.name, e.length, e.offset,
+				e.line_bases, e.line_width) for e in FaiIndex.build (path)]))
+
+	def test_wrap (self):
+		hndl = StringIO()
+		wrtr = FastaWriter (hndl, width=4, fmt='fasta')
+		wrtr.write (FastaRecord ('a', 'ACGTACGT', 'two lines'))
+		wrtr.write (FastaRecord ('b', 'ACGTAC'))
+		wrtr.close()
+		assert (hndl.getvalue() ==
+			'>a two lines\nACGT\nACGT\n>b\nACGT\nAC\n')
+		assert (wrtr.index['b'].offset == 26)
+		assert (wrtr.index['b'].line_bases == 4)
+
+	def test_unwrapped (self):
+		hndl = StringIO()
+		wrtr = FastaWriter (hndl, width=None, fmt='fasta')
+		wrtr.write (FastaRecord ('a', 'ACGTACGT'))
+		wrtr.close()
+		assert (hndl.getvalue() == '>a\nACGTACGT\n')
+
+
+### END ########################################################################
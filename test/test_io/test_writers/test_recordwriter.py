@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.writers.recordwriter, using nose.
+"""
+
+### IMPORTS ###
+
+from StringIO import StringIO
+
+from relais.dev.io.writers import recordwriter
+
+
+### CONSTANTS & DEFINES ###
+
+class LineWriter (recordwriter.RecordWriter):
+	def format_record (self, rec):
+		return '%s\n' % rec
+
+
+class CountingIO (StringIO):
+	def __init__ (self):
+		StringIO.__init__ (self)
+		self.writes = 0
+		self.flushes = 0
+
+	def write (self, s):
+		self.writes += 1
+		StringIO.write (self, s)
+
+	def flush (self):
+		self.flushes += 1
+		StringIO.flush (self)
+
+
+### TESTS ###
+
+class test_recordwriter (object):
+
+	def test_buffered (self):
+		dst = CountingIO()
+		wrtr = LineWriter (dst, fmt='txt')
+		wrtr.write_iter (['foo', 'bar', 'baz'])
+		assert (dst.writes == 0)
+		wrtr.flush()
+		assert (dst.writes == 1)
+		assert (dst.getvalue() == 'foo\nbar\nbaz\n')
+
+	def test_flush_recs (self):
+		dst = CountingIO()
+		wrtr = LineWriter (dst, fmt='txt', flush_recs=2)
+		wrtr.write_iter (range (5))
+		assert (dst.writes == 2)
+		assert (dst.getvalue() == '0\n1\n2\n3\n')
+		# a full buffer is written out, but the handle isn't flushed
+		assert (dst.flushes == 0)
+		wrtr.flush()
+		assert (dst.flushes == 1)
+
+	def test_flush_bytes (self):
+		dst = CountingIO()
+		wrtr = LineWriter (dst, fmt='txt', flush_bytes=4)
+		wrtr.write ('a')
+		assert (dst.writes == 0)
+		wrtr.write ('b')
+		assert (dst.writes == 1)
+
+	def test_close (self):
+		src = 'test/out/dummy.txt'
+		wrtr = LineWriter (src)
+		wrtr.write ('foo')
+		wrtr.close()
+		assert (wrtr.hndl.closed)
+		assert (open (src).read() == 'foo\n')
+		wrtr.close()
+
+
+### END ########################################################################
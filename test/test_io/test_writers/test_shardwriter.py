@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.writers.shardwriter, using nose.
+"""
+
+### IMPORTS ###
+
+import os, shutil
+from StringIO import StringIO
+
+from relais.dev.io.writers import recordwriter, shardwriter
+
+
+### CONSTANTS & DEFINES ###
+
+class LineWriter (recordwriter.RecordWriter):
+	def format_record (self, rec):
+		return '%s\n' % rec
+
+
+### TESTS ###
+
+class test_shardwriter (object):
+	outdir = 'test/out/test_shardwriter'
+
+	def setUp (self):
+		os.mkdir (self.outdir)
+		self.template = os.path.join (self.outdir, 'shard.%02d.txt')
+
+	def tearDown (self):
+		shutil.rmtree (self.outdir)
+
+	def test_max_recs (self):
+		manifest = StringIO()
+		wrtr = shardwriter.ShardWriter (self.template, LineWriter, max_recs=2,
+			manifest=manifest)
+		wrtr.write_iter (range (5))
+		wrtr.close()
+		paths = [self.template % i for i in range (3)]
+		assert ([s[0] for s in wrtr.shards] == paths)
+		assert (open (paths[0]).read() == '0\n1\n')
+		assert (open (paths[2]).read() == '4\n')
+		assert (manifest.getvalue().splitlines()[0] == '%s\t2\t4' % paths[0])
+
+	def test_max_bytes (self):
+		wrtr = shardwriter.ShardWriter (self.template, LineWriter,
+			max_bytes=5)
+		wrtr.write_iter (['ab', 'cd', 'ef', 'gh'])
+		wrtr.close()
+		# no empty shard is left at the end
+		assert ([s[1:] for s in wrtr.shards] == [(2, 6), (2, 6)])
+		assert (sorted (os.listdir (self.outdir)) ==
+			['shard.00.txt', 'shard.01.txt'])
+
+	def test_manifest_path (self):
+		manifest = os.path.join (self.outdir, 'manifest.txt')
+		wrtr = shardwriter.ShardWriter (self.template + '.gz', LineWriter,
+			max_recs=3, manifest=manifest)
+		wrtr.write_iter (range (3))
+		wrtr.close()
+		lines = open (manifest).read().splitlines()
+		assert (lines == ['%s.gz\t3\t6' % (self.template % 0)])
+
+
+### END ########################################################################
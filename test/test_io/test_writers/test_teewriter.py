@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.writers.teewriter, using nose.
+"""
+
+### IMPORTS ###
+
+import os, gzip
+from StringIO import StringIO
+
+from relais.dev.io.writers import teewriter
+
+
+### CONSTANTS & DEFINES ###
+
+class LineTeeWriter (teewriter.TeeWriter):
+	formatted = 0
+
+	def format_record (self, rec):
+		self.formatted += 1
+		return '%s\n' % rec
+
+
+### TESTS ###
+
+class test_teewriter (object):
+	path = 'test/out/tee.txt.gz'
+
+	def tearDown (self):
+		if (os.path.exists (self.path)):
+			os.remove (self.path)
+
+	def check_tee (self, threaded):
+		dst1 = StringIO()
+		dst2 = StringIO()
+		wrtr = LineTeeWriter ([dst1, dst2, self.path], fmt='txt',
+			threaded=threaded)
+		wrtr.write_iter (['foo', 'bar', 'baz'])
+		wrtr.close()
+		assert (wrtr.formatted == 3)
+		assert (dst1.getvalue() == 'foo\nbar\nbaz\n')
+		assert (dst2.getvalue() == dst1.getvalue())
+		assert (not dst1.closed)
+		assert (gzip.open (self.path).read() == dst1.getvalue())
+
+	def test_tee (self):
+		self.check_tee (False)
+
+	def test_tee_threaded (self):
+		self.check_tee (True)
+
+
+### END ########################################################################
@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the relais.dev.io.writers.threadedwriter, using nose.
+"""
+
+### IMPORTS ###
+
+from StringIO import StringIO
+
+from relais.dev.io.writers import recordwriter, threadedwriter
+
+
+### CONSTANTS & DEFINES ###
+
+class LineWriter (recordwriter.RecordWriter):
+	def format_record (self, rec):
+		if (rec is None):
+			raise ValueError ("can't write None")
+		return '%s\n' % rec
+
+
+### TESTS ###
+
+class test_threadedwriter (object):
+
+	def test_write (self):
+		dst = StringIO()
+		wrtr = threadedwriter.ThreadedWriter (LineWriter (dst, fmt='txt'))
+		wrtr.write ('foo')
+		wrtr.write_iter (['bar', 'baz'])
+		wrtr.flush()
+		assert (dst.getvalue() == 'foo\nbar\nbaz\n')
+		wrtr.close()
+		wrtr.close()
+
+	def test_batches (self):
+		dst = StringIO()
+		wrtr = threadedwriter.ThreadedWriter (LineWriter (dst, fmt='txt'),
+			queue_size=2, batch_size=3)
+		wrtr.write_iter (xrange (100))
+		wrtr.flush()
+		assert (dst.getvalue() == ''.join (['%s\n' % i for i in range (100)]))
+
+	def test_error (self):
+		dst = StringIO()
+		wrtr = threadedwriter.ThreadedWriter (LineWriter (dst, fmt='txt'))
+		wrtr.write_iter (['foo', None, 'bar'])
+		try:
+			wrtr.flush()
+			assert (False), "should fail as record can't be written"
+		except ValueError:
+			pass
+		try:
+			wrtr.close()
+			assert (False), "should fail as error persists"
+		except ValueError:
+			pass
+		assert (not wrtr.thread.isAlive())
+
+
+### END ########################################################################